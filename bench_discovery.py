@@ -0,0 +1,122 @@
+import argparse
+import builtins
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# File-system call benchmark for PbipParser project discovery. Counts the os-level
+# calls (each one is a syscall, and a network round trip on mounted checkouts) made
+# to find a project's definition and table files: with the previous glob/exists
+# sequence, with a cold project_layout scan, and with a cached layout.
+
+COUNTED_CALLS = (('os', os, 'stat'), ('os', os, 'lstat'), ('os', os, 'scandir'), ('os', os, 'listdir'),
+                 ('builtins', builtins, 'open'))
+
+@contextmanager
+def count_calls():
+    counts = {name: 0 for _, _, name in COUNTED_CALLS}
+    originals = []
+    for _, module, name in COUNTED_CALLS:
+        original = getattr(module, name)
+        originals.append((module, name, original))
+
+        def counted(*args, _name=name, _original=original, **kwargs):
+            counts[_name] += 1
+            return _original(*args, **kwargs)
+
+        setattr(module, name, counted)
+    try:
+        yield counts
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+def legacy_discovery(pbip_folder_path, config_path):
+    # The discovery sequence PbipParser used before project_layout: a fresh
+    # ConfigLoader per parser, a glob per pattern and an exists check per file
+    import glob
+    from config_loader import ConfigLoader
+
+    config = ConfigLoader(config_path)
+    glob.glob(os.path.join(pbip_folder_path, config.get_pbip_file_pattern()))
+    glob.glob(os.path.join(pbip_folder_path, config.get_report_folder_pattern()))
+    models = glob.glob(os.path.join(pbip_folder_path, config.get_model_folder_pattern()))
+    definition_path = os.path.join(models[0], config.get_definition_folder_name())
+    os.path.exists(definition_path)
+    files = []
+    for filename in config.get_definition_files().values():
+        file_path = os.path.join(definition_path, filename)
+        if os.path.exists(file_path):
+            files.append(file_path)
+    tables_path = os.path.join(definition_path, config.get_definition_folders()["tables"])
+    if os.path.exists(tables_path):
+        files.extend(glob.glob(os.path.join(tables_path, "*.tmdl")))
+    return files
+
+def layout_discovery(pbip_folder_path, config_path):
+    from pbip_parser import PbipParser
+    return PbipParser(pbip_folder_path, config_path).definition_files()
+
+def _create_project(root, tables):
+    project = os.path.join(root, "Bench")
+    definition = os.path.join(project, "Bench.SemanticModel", "definition")
+    os.makedirs(os.path.join(definition, "tables"))
+    os.makedirs(os.path.join(project, "Bench.Report"))
+    with open(os.path.join(project, "Bench.pbip"), 'w', encoding='utf-8') as f:
+        f.write("{}")
+    for name in ("database.tmdl", "model.tmdl", "relationships.tmdl", "expressions.tmdl"):
+        with open(os.path.join(definition, name), 'w', encoding='utf-8') as f:
+            f.write("")
+    for index in range(tables):
+        with open(os.path.join(definition, "tables", f"Table{index}.tmdl"), 'w', encoding='utf-8') as f:
+            f.write(f"table Table{index}\n")
+    # Backdate the folders so the cached layout is not treated as racily fresh
+    for dir_path in (project, definition, os.path.join(definition, "tables")):
+        os.utime(dir_path, ns=(0, 0))
+    return project
+
+def run_benchmark(tables, parsers):
+    import project_layout
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(here, "pbip_definition.json")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        project = _create_project(tmp_dir, tables)
+
+        with count_calls() as counts:
+            for _ in range(parsers):
+                expected = legacy_discovery(project, config_path)
+        results['legacy'] = counts
+
+        project_layout.clear_layout_cache()
+        project_layout._COMPILED_CONFIGS.clear()
+        with count_calls() as counts:
+            found = layout_discovery(project, config_path)
+        results['cold'] = counts
+
+        with count_calls() as counts:
+            for _ in range(parsers):
+                layout_discovery(project, config_path)
+        results['warm'] = counts
+
+    if sorted(found) != sorted(expected):
+        raise AssertionError("layout discovery found different files than the glob sequence")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Count file-system calls made by PbipParser project discovery.")
+    parser.add_argument("--tables", type=int, default=50, help="Number of table files in the generated project")
+    parser.add_argument("--parsers", type=int, default=10, help="Parser instances created for the legacy and warm cases")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.tables, args.parsers)
+    print(f"{'case':<8} {'parsers':>7} " + " ".join(f"{name:>8}" for _, _, name in COUNTED_CALLS) + f" {'total':>8}")
+    for case, counts in results.items():
+        runs = 1 if case == 'cold' else args.parsers
+        print(f"{case:<8} {runs:>7} " + " ".join(f"{count:>8}" for count in counts.values()) + f" {sum(counts.values()):>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Wall-clock benchmark for parallel parsing of one large TMDL file. Generates a
+# table with enough columns and measures to reach the requested line count, then
+# times the serial parser against parse_tmdl(path, workers=N) for each N and checks
+# that every result matches the serial one. parse_tmdl never starts more workers
+# than there are usable CPUs, so on a small machine the timed runs are serial.
+# The chunk breakdown runs each worker job in this process instead: the slowest
+# chunk (including pickling its result) plus the parent's unpickle and merge is
+# the wall time to expect with one free core per worker, excluding pool start-up.
+
+def generate_file(path, lines):
+    from tmdl_corpus import generate_table_tmdl
+
+    rng = random.Random(0)
+    # A generated column or measure averages about 9 lines
+    content = generate_table_tmdl(rng, columns=lines * 2 // 27, measures=lines // 27, partitions=3)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return content.count('\n')
+
+def best_time(function, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def chunk_breakdown(path, workers):
+    import pickle
+    from tmdl_parser import _parse_file_chunk, merge_chunk_roots
+
+    size = os.path.getsize(path)
+    offsets = [size * index // workers for index in range(workers + 1)]
+    slowest = 0.0
+    payloads = []
+    for start, end in zip(offsets, offsets[1:]):
+        began = time.perf_counter()
+        payloads.append(pickle.dumps(_parse_file_chunk((path, start, end))))
+        slowest = max(slowest, time.perf_counter() - began)
+    began = time.perf_counter()
+    root = {}
+    for payload in payloads:
+        merge_chunk_roots(root, pickle.loads(payload)[0])
+    return slowest, time.perf_counter() - began
+
+def run_benchmark(lines, worker_counts, repeat):
+    from tmdl_parser import available_cpus, parse_tmdl
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "Large.tmdl")
+        line_count = generate_file(path, lines)
+        size = os.path.getsize(path)
+        print(f"{line_count} lines, {size / 1024 / 1024:.1f} MB, {available_cpus()} usable CPU(s)")
+
+        serial_time, expected = best_time(lambda: parse_tmdl(path), repeat)
+        print(f"  serial     {serial_time:7.3f} s")
+        for workers in worker_counts:
+            elapsed, result = best_time(lambda: parse_tmdl(path, workers=workers), repeat)
+            status = "ok" if result == expected else "MISMATCH"
+            print(f"  workers={workers:<3} {elapsed:7.3f} s  {serial_time / elapsed:5.2f}x  {status}")
+        for workers in worker_counts:
+            slowest, merge = chunk_breakdown(path, workers)
+            print(f"  {workers} chunks: slowest {slowest:.3f} s + merge {merge:.3f} s"
+                  f" = {slowest + merge:.3f} s  {serial_time / (slowest + merge):5.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time serial against parallel parsing of one large TMDL file.")
+    parser.add_argument("--lines", type=int, default=270000, help="Approximate size of the generated file")
+    parser.add_argument("--workers", type=int, nargs='+', default=[2, 4], help="Worker counts to time")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the best is reported")
+    args = parser.parse_args()
+    run_benchmark(args.lines, args.workers, args.repeat)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
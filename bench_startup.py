@@ -0,0 +1,63 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Startup latency benchmark for the tmdl2json CLI. Each case is run as a fresh
+# interpreter so module import cost is included, and is reported as overhead on top
+# of a bare `python -c pass` so results are comparable across machines.
+
+# Target overhead in milliseconds over bare interpreter startup
+TARGETS_MS = {
+    'help': 10.0,
+    'convert': 25.0,
+}
+
+SAMPLE_TMDL = "table Sample\n\tcolumn Id\n\t\tdataType: int64\n\tmeasure Total = SUM(Sample[Id])\n"
+
+def _time_command(command, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def run_benchmark(runs):
+    here = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(here, 'tmdl2json.py')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmdl_path = os.path.join(tmp_dir, 'Sample.tmdl')
+        with open(tmdl_path, 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_TMDL)
+
+        baseline = _time_command([sys.executable, '-c', 'pass'], runs)
+        cases = {
+            'help': [sys.executable, cli, '--help'],
+            'convert': [sys.executable, cli, 'convert', tmdl_path, '-o', os.path.join(tmp_dir, 'out.json')],
+        }
+        results = {name: _time_command(command, runs) - baseline for name, command in cases.items()}
+    return baseline, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start latency of the tmdl2json CLI.")
+    parser.add_argument("--runs", type=int, default=20, help="Number of runs per case (median is reported)")
+    args = parser.parse_args()
+
+    baseline, results = run_benchmark(args.runs)
+    print(f"interpreter startup: {baseline:.1f} ms")
+
+    failed = False
+    for name, overhead in results.items():
+        target = TARGETS_MS[name]
+        status = "ok" if overhead <= target else "SLOW"
+        failed = failed or overhead > target
+        print(f"{name:<8} +{overhead:6.1f} ms  (target +{target:.0f} ms)  {status}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import os
+import json
+import sqlite3
+import time
+from validator import object_name, column_expression, relationship_endpoint
+
+# SQLite catalog of parsed models. Each PbipParser output is normalized into one row
+# per model, table, column, measure, partition and relationship so fleet-wide
+# questions ("which models use column X?") are indexed queries instead of loading
+# every JSON document. Models are keyed by path and re-ingested only when the
+# fingerprint of their definition files changes.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT,
+    fingerprint TEXT NOT NULL,
+    ingested_at REAL NOT NULL,
+    properties TEXT
+);
+CREATE TABLE IF NOT EXISTS tables (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    lineage_tag TEXT,
+    properties TEXT
+);
+CREATE TABLE IF NOT EXISTS columns (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    table_id INTEGER NOT NULL REFERENCES tables(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    data_type TEXT,
+    format_string TEXT,
+    source_column TEXT,
+    sort_by_column TEXT,
+    expression TEXT,
+    lineage_tag TEXT,
+    properties TEXT
+);
+CREATE TABLE IF NOT EXISTS measures (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    table_id INTEGER NOT NULL REFERENCES tables(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    expression TEXT,
+    format_string TEXT,
+    display_folder TEXT,
+    lineage_tag TEXT,
+    properties TEXT
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    table_id INTEGER NOT NULL REFERENCES tables(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    partition_type TEXT,
+    mode TEXT,
+    source TEXT,
+    properties TEXT
+);
+CREATE TABLE IF NOT EXISTS relationships (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    name TEXT,
+    from_table TEXT,
+    from_column TEXT,
+    to_table TEXT,
+    to_column TEXT,
+    properties TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tables_model ON tables(model_id);
+CREATE INDEX IF NOT EXISTS idx_tables_name ON tables(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_columns_model ON columns(model_id);
+CREATE INDEX IF NOT EXISTS idx_columns_table ON columns(table_id);
+CREATE INDEX IF NOT EXISTS idx_columns_name ON columns(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_measures_model ON measures(model_id);
+CREATE INDEX IF NOT EXISTS idx_measures_table ON measures(table_id);
+CREATE INDEX IF NOT EXISTS idx_measures_name ON measures(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_measures_format_string ON measures(format_string);
+CREATE INDEX IF NOT EXISTS idx_partitions_model ON partitions(model_id);
+CREATE INDEX IF NOT EXISTS idx_partitions_table ON partitions(table_id);
+CREATE INDEX IF NOT EXISTS idx_relationships_model ON relationships(model_id);
+CREATE INDEX IF NOT EXISTS idx_relationships_from ON relationships(from_table COLLATE NOCASE, from_column COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_relationships_to ON relationships(to_table COLLATE NOCASE, to_column COLLATE NOCASE);
+"""
+
+# Keys stored in dedicated columns (or implied by the row) rather than in 'properties'
+_COMMON_KEYS = ('name', 'type', 'lineageTag')
+_CHILD_KEYS = ('columns', 'measures', 'partitions', 'annotations')
+
+def _properties(obj, stored_keys):
+    # Everything not stored in its own column is kept as JSON, queryable with json_extract()
+    extra = {key: value for key, value in obj.items() if key not in stored_keys and key not in _CHILD_KEYS}
+    if obj.get('annotations'):
+        extra['annotations'] = obj['annotations']
+    return json.dumps(extra) if extra else None
+
+class Catalog:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fingerprint_of(self, path):
+        row = self.connection.execute("SELECT fingerprint FROM models WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def ingest_project(self, pbip_folder_path, source=None, key=None, config_path="pbip_definition.json"):
+        """Upserts one project; returns 'added', 'updated', 'unchanged' or 'failed'."""
+        from pbip_parser import PbipParser
+
+        key = key or os.path.abspath(pbip_folder_path)
+        pbip_parser = PbipParser(pbip_folder_path, config_path, source=source)
+        fingerprint = pbip_parser.fingerprint()
+        if fingerprint is None:
+            return 'failed'
+        previous = self.fingerprint_of(key)
+        if previous == fingerprint:
+            return 'unchanged'
+
+        model_data = pbip_parser.parse()
+        if model_data is None:
+            return 'failed'
+        with self.connection:
+            self.connection.execute("DELETE FROM models WHERE path = ?", (key,))
+            self._insert_model(key, fingerprint, model_data)
+        return 'added' if previous is None else 'updated'
+
+    def remove(self, path):
+        with self.connection:
+            return self.connection.execute("DELETE FROM models WHERE path = ?", (path,)).rowcount
+
+    def _insert_model(self, key, fingerprint, model_data):
+        execute = self.connection.execute
+        model = model_data.get('model', {})
+        model_id = execute(
+            "INSERT INTO models (path, name, fingerprint, ingested_at, properties) VALUES (?, ?, ?, ?, ?)",
+            (key, os.path.basename(key.rstrip('/\\')), fingerprint, time.time(),
+             _properties(model, _COMMON_KEYS))).lastrowid
+
+        for table in model_data.get('tables', []):
+            table_id = execute(
+                "INSERT INTO tables (model_id, name, lineage_tag, properties) VALUES (?, ?, ?, ?)",
+                (model_id, object_name(table.get('name', '')), table.get('lineageTag'),
+                 _properties(table, _COMMON_KEYS))).lastrowid
+
+            self.connection.executemany(
+                "INSERT INTO columns (model_id, table_id, name, data_type, format_string, source_column, "
+                "sort_by_column, expression, lineage_tag, properties) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(model_id, table_id, object_name(column.get('name', '')), column.get('dataType'),
+                  column.get('formatString'), column.get('sourceColumn'),
+                  object_name(column['sortByColumn']) if 'sortByColumn' in column else None,
+                  column_expression(column.get('name', '')), column.get('lineageTag'),
+                  _properties(column, _COMMON_KEYS + ('dataType', 'formatString', 'sourceColumn', 'sortByColumn')))
+                 for column in table.get('columns', [])])
+
+            self.connection.executemany(
+                "INSERT INTO measures (model_id, table_id, name, expression, format_string, display_folder, "
+                "lineage_tag, properties) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(model_id, table_id, measure.get('name'), measure.get('expression'), measure.get('formatString'),
+                  measure.get('displayFolder'), measure.get('lineageTag'),
+                  _properties(measure, _COMMON_KEYS + ('expression', 'formatString', 'displayFolder')))
+                 for measure in table.get('measures', [])])
+
+            self.connection.executemany(
+                "INSERT INTO partitions (model_id, table_id, name, partition_type, mode, source, properties) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(model_id, table_id, object_name(partition.get('name', '')), partition.get('partitionType'),
+                  partition.get('mode'), partition.get('source'),
+                  _properties(partition, _COMMON_KEYS + ('partitionType', 'mode', 'source')))
+                 for partition in table.get('partitions', [])])
+
+        rows = []
+        for relationship in model_data.get('relationships', []):
+            from_table, from_column = relationship_endpoint(relationship, 'from') or (None, None)
+            to_table, to_column = relationship_endpoint(relationship, 'to') or (None, None)
+            rows.append((model_id, relationship.get('name'), from_table, from_column, to_table, to_column,
+                         _properties(relationship, _COMMON_KEYS + ('fromTable', 'fromColumnName', 'toTable', 'toColumnName'))))
+        self.connection.executemany(
+            "INSERT INTO relationships (model_id, name, from_table, from_column, to_table, to_column, properties) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def query(self, sql, parameters=()):
+        cursor = self.connection.execute(sql, parameters)
+        names = [description[0] for description in cursor.description or ()]
+        return names, cursor.fetchall()
+
+def iter_ingest_targets(paths):
+    # Yields (pbip_folder_path, source, key) for project folders, archives and
+    # folders containing projects
+    from pbip_parser import find_pbip_projects
+    from vfs import is_archive, open_source
+
+    for path in paths:
+        if is_archive(path):
+            source, root = open_source(path)
+            with source:
+                yield root, source, os.path.abspath(path)
+        elif os.path.isdir(path):
+            for project in find_pbip_projects(path):
+                yield project, None, os.path.abspath(project)
+
+def main(argv=None, prog=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog=prog, description="Ingest parsed PBIP models into a SQLite catalog and query it.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Add or update models (unchanged models are skipped)")
+    ingest_parser.add_argument("database", help="Path to the SQLite catalog (created if missing)")
+    ingest_parser.add_argument("paths", nargs='+', help="PBIP project folders or archives, or folders to search for projects")
+
+    query_parser = subparsers.add_parser("query", help="Run a SQL query against the catalog")
+    query_parser.add_argument("database", help="Path to the SQLite catalog")
+    query_parser.add_argument("sql", help="SQL statement, e.g. \"SELECT m.path FROM columns c JOIN models m ON m.id = c.model_id WHERE c.name = 'DateKey'\"")
+    query_parser.add_argument("--json", action="store_true", help="Print rows as JSON objects instead of tab-separated values")
+
+    args = parser.parse_args(argv)
+
+    with Catalog(args.database) as catalog:
+        if args.action == "ingest":
+            counts = {}
+            for pbip_folder_path, source, key in iter_ingest_targets(args.paths):
+                status = catalog.ingest_project(pbip_folder_path, source=source, key=key)
+                counts[status] = counts.get(status, 0) + 1
+                if status != 'unchanged':
+                    print(f"{status}: {key}")
+            print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "No projects found")
+            return 1 if counts.get('failed') else 0
+
+        try:
+            names, rows = catalog.query(args.sql)
+        except sqlite3.Error as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        if args.json:
+            print(json.dumps([dict(zip(names, row)) for row in rows], indent=4))
+        else:
+            if names:
+                print("\t".join(names))
+            for row in rows:
+                print("\t".join("" if value is None else str(value) for value in row))
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -1,4 +1,3 @@
-import json
 import os
 
 class ConfigLoader:
@@ -11,6 +10,8 @@ class ConfigLoader:
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
         
+        import json
+
         with open(self.config_path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
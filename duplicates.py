@@ -0,0 +1,218 @@
+import hashlib
+import re
+import zlib
+from pbip_parser import PbipParser, find_pbip_projects, shared_expressions
+from tokenizers import let_bindings, tokenize_dax, tokenize_m, unquote_m_identifier
+
+# Fleet-wide duplicate detection for DAX and M expressions. Each expression is
+# normalized into a token stream (comments and whitespace dropped, quoting and local
+# names canonicalized) and hashed into an index, so exact duplicates are grouped in a
+# single pass. Near-duplicates are found with MinHash signatures and LSH banding,
+# which only compares expressions that share a band bucket.
+
+_SIMPLE_IDENTIFIER = re.compile(r'[A-Za-z_][\w.]*\Z')
+
+MIN_TOKENS = 3
+SHINGLE_SIZE = 4
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+_MERSENNE_PRIME = (1 << 61) - 1
+
+def normalize_dax(expression):
+    tokens = []
+    variables = {}
+    previous = None
+    raw_tokens = list(tokenize_dax(expression))
+    for index, (kind, text) in enumerate(raw_tokens):
+        # A name directly followed by [Column] is a table, never a variable
+        table_reference = index + 1 < len(raw_tokens) and raw_tokens[index + 1][0] == 'column'
+        if kind == 'table':
+            # 'Sales'[Amount] and Sales[Amount] refer to the same table
+            text = text[1:-1].replace("''", "'").lower()
+            kind = 'word'
+        elif kind in ('word', 'column'):
+            # DAX identifiers are case-insensitive
+            text = text.lower()
+
+        if kind == 'word' and not table_reference:
+            if previous == 'var':
+                variables[text] = f"__v{len(variables)}"
+            text = variables.get(text, text)
+        tokens.append(text)
+        previous = text
+    return tokens
+
+def normalize_m(expression):
+    raw_tokens = []
+    for kind, text in tokenize_m(expression):
+        if kind == 'quoted_identifier':
+            name = unquote_m_identifier(text)
+            # #"Source" and Source are the same identifier
+            if _SIMPLE_IDENTIFIER.match(name):
+                text = name
+                kind = 'word'
+        elif kind == 'field':
+            # [ Data ] and [Data] access the same field
+            text = f"[{text[1:-1].strip()}]"
+        raw_tokens.append((kind, text))
+
+    # Step names bound in let expressions are local aliases; rename them by
+    # position so identical queries with different step names match
+    bindings = {}
+    for index in let_bindings(raw_tokens):
+        bindings.setdefault(raw_tokens[index][1], f"__s{len(bindings)}")
+    return [bindings.get(text, text) if kind in ('word', 'quoted_identifier') else text for kind, text in raw_tokens]
+
+def fingerprint(tokens):
+    return hashlib.sha1('\x1f'.join(tokens).encode('utf-8')).hexdigest()
+
+class MinHasher:
+    def __init__(self, permutations=MINHASH_PERMUTATIONS, seed=1):
+        import random
+        rng = random.Random(seed)
+        self.coefficients = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(permutations)]
+
+    def signature(self, tokens):
+        if len(tokens) < SHINGLE_SIZE:
+            shingles = {zlib.crc32('\x1f'.join(tokens).encode('utf-8'))}
+        else:
+            shingles = {zlib.crc32('\x1f'.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8'))
+                        for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+        return tuple(min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles) for a, b in self.coefficients)
+
+def _estimated_similarity(signature_a, signature_b):
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+def iter_model_expressions(model_data, project):
+    for table in model_data.get('tables', []):
+        table_name = table.get('name')
+        for measure in table.get('measures', []):
+            yield {'project': project, 'table': table_name, 'name': measure.get('name'), 'kind': 'measure',
+                   'language': 'dax', 'expression': measure.get('expression', '')}
+        for partition in table.get('partitions', []):
+            if 'source' not in partition:
+                continue
+            language = 'dax' if partition.get('partitionType') == 'calculated' else 'm'
+            yield {'project': project, 'table': table_name, 'name': partition.get('name'), 'kind': 'partition',
+                   'language': language, 'expression': partition['source']}
+    for name, expression in shared_expressions(model_data.get('expressions', {})):
+        yield {'project': project, 'table': None, 'name': name, 'kind': 'expression',
+               'language': 'm', 'expression': expression}
+
+class DuplicateIndex:
+    def __init__(self, near_duplicates=False, threshold=0.8):
+        self.exact = {}
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.signatures = {}
+        self._minhasher = MinHasher() if near_duplicates else None
+
+    def add(self, item):
+        normalize = normalize_dax if item['language'] == 'dax' else normalize_m
+        tokens = normalize(item['expression'])
+        if len(tokens) < MIN_TOKENS:
+            return
+        # The language is part of the key so identical DAX and M text never group
+        key = item['language'] + ':' + fingerprint(tokens)
+        entry = {k: v for k, v in item.items() if k != 'expression'}
+        if key in self.exact:
+            self.exact[key].append(entry)
+            return
+        self.exact[key] = [entry]
+        if self._minhasher is not None:
+            self.signatures[key] = self._minhasher.signature(tokens)
+
+    def add_project(self, pbip_folder_path, config_path="pbip_definition.json", source=None, project=None):
+        model_data = PbipParser(pbip_folder_path, config_path, source=source).parse()
+        if model_data:
+            for item in iter_model_expressions(model_data, project or pbip_folder_path):
+                self.add(item)
+
+    def exact_groups(self):
+        return [{'fingerprint': key, 'members': members} for key, members in self.exact.items() if len(members) > 1]
+
+    def near_groups(self):
+        if not self.near_duplicates:
+            return []
+        rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        buckets = {}
+        for key, signature in self.signatures.items():
+            for band in range(LSH_BANDS):
+                band_key = (key.split(':', 1)[0], band, signature[band * rows:(band + 1) * rows])
+                buckets.setdefault(band_key, []).append(key)
+
+        parents = {key: key for key in self.signatures}
+
+        def find(key):
+            while parents[key] != key:
+                parents[key] = parents[parents[key]]
+                key = parents[key]
+            return key
+
+        min_similarity = {}
+        for keys in buckets.values():
+            first = keys[0]
+            for other in keys[1:]:
+                root_first, root_other = find(first), find(other)
+                if root_first == root_other:
+                    continue
+                similarity = _estimated_similarity(self.signatures[first], self.signatures[other])
+                if similarity >= self.threshold:
+                    parents[root_other] = root_first
+                    min_similarity[root_first] = min(similarity, min_similarity.get(root_first, 1.0),
+                                                     min_similarity.get(root_other, 1.0))
+
+        groups = {}
+        for key in self.signatures:
+            groups.setdefault(find(key), []).append(key)
+
+        return [{
+            'minSimilarity': min_similarity[root],
+            'members': [member for key in keys for member in self.exact[key]],
+        } for root, keys in groups.items() if len(keys) > 1]
+
+def main(argv=None, prog=None):
+    import argparse
+    import json
+    import os
+    import sys
+    from contextlib import redirect_stdout
+    from vfs import is_archive, open_source
+
+    parser = argparse.ArgumentParser(prog=prog, description="Find duplicate DAX measures and M queries across PBIP projects.")
+    parser.add_argument("paths", nargs='+', help="PBIP project folders or archives, or folders to search for projects")
+    parser.add_argument("--near", action="store_true", help="Also group near-duplicates using MinHash signatures")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Minimum estimated similarity for near-duplicates (default: 0.8)")
+    parser.add_argument("--output", help="Path to output JSON file (optional)", default=None)
+
+    args = parser.parse_args(argv)
+
+    index = DuplicateIndex(args.near, args.threshold)
+    exit_code = 0
+    # Parser warnings go to stderr so they never mix with the JSON written to stdout
+    with redirect_stdout(sys.stderr):
+        for path in args.paths:
+            if is_archive(path):
+                source, root = open_source(path)
+                with source:
+                    index.add_project(root, source=source, project=path)
+            elif os.path.isdir(path):
+                for project in find_pbip_projects(path):
+                    index.add_project(project)
+            else:
+                print(f"Path not found: {path}", file=sys.stderr)
+                exit_code = 1
+
+    result = {'exact': index.exact_groups(), 'near': index.near_groups()}
+    json_output = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json_output)
+        print(f"Output written to {args.output} ({len(result['exact'])} exact, {len(result['near'])} near-duplicate groups)")
+    else:
+        print(json_output)
+    return exit_code
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
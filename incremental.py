@@ -0,0 +1,177 @@
+import os
+import posixpath
+import subprocess
+from pbip_parser import DEFINITION_FILE_KEYS, PbipParser, model_entry
+from tmdl_parser import parse_tmdl_text
+
+# Git-aware incremental conversion: asks a local clone which files under the
+# semantic model's definition folder changed between two refs, re-parses only those
+# (as they are at each ref, not in the working tree) and patches a previous full
+# JSON output. Works offline; only the git CLI is required.
+
+GIT_STATUS_NAMES = {'A': 'added', 'M': 'modified', 'D': 'deleted', 'R': 'renamed', 'C': 'added', 'T': 'modified'}
+
+def _git(repo_path, *args):
+    result = subprocess.run(['git', '-C', repo_path, *args], capture_output=True, check=True)
+    return result.stdout
+
+def changed_files(repo_path, base_ref, head_ref, path_prefix):
+    # -z keeps paths with spaces or quotes intact; renames report old and new path.
+    # path_prefix is relative to the top level, which :(top) anchors the pathspec to
+    # when repo_path is a subfolder of the clone
+    output = _git(repo_path, 'diff', '--name-status', '-z', '--find-renames', base_ref, head_ref,
+                  '--', f":(top){path_prefix}")
+    fields = output.decode('utf-8').split('\0')
+    changes = []
+    index = 0
+    while index < len(fields) and fields[index]:
+        status = fields[index][0]
+        if status in ('R', 'C'):
+            old_path, new_path = fields[index + 1], fields[index + 2]
+            index += 3
+        else:
+            old_path = new_path = fields[index + 1]
+            index += 2
+        changes.append((status, old_path, new_path))
+    return changes
+
+def read_file_at(repo_path, ref, path):
+    return _git(repo_path, 'show', f"{ref}:{path}").decode('utf-8')
+
+def _table_index(tables, table_name):
+    for index, table in enumerate(tables):
+        if table.get('name') == table_name:
+            return index
+    return None
+
+class IncrementalConverter:
+    def __init__(self, pbip_folder_path, repo_path=None, config_path="pbip_definition.json"):
+        self.pbip_parser = PbipParser(pbip_folder_path, config_path)
+        self.repo_path = repo_path or pbip_folder_path
+
+    def _definition_prefix(self):
+        definition_path = self.pbip_parser.definition_path()
+        if definition_path is None:
+            return None
+        top_level = _git(self.repo_path, 'rev-parse', '--show-toplevel').decode('utf-8').strip()
+        relative = os.path.relpath(os.path.realpath(definition_path), os.path.realpath(top_level))
+        return relative.replace(os.sep, '/')
+
+    def update(self, previous_model, base_ref, head_ref):
+        definition_prefix = self._definition_prefix()
+        if definition_prefix is None:
+            return None, []
+
+        files_config = self.pbip_parser.config_loader.get_definition_files()
+        file_keys = {files_config[config_key]: key for config_key, key in DEFINITION_FILE_KEYS.items() if config_key in files_config}
+        tables_folder = self.pbip_parser.config_loader.get_definition_folders().get("tables")
+
+        def target(path):
+            # The model key a file feeds: a definition file's key, 'tables' or None
+            relative_path = posixpath.relpath(path, definition_prefix)
+            if relative_path in file_keys:
+                return file_keys[relative_path]
+            if tables_folder and posixpath.dirname(relative_path) == tables_folder and relative_path.endswith('.tmdl'):
+                return 'tables'
+            return None
+
+        def steps():
+            for status, old_path, new_path in changed_files(self.repo_path, base_ref, head_ref, definition_prefix):
+                if status == 'C':
+                    # The copied file is still there; only the copy is new
+                    yield 'A', target(new_path), new_path, new_path
+                elif status == 'R' and target(old_path) != target(new_path):
+                    # Moved into or out of the tables folder, or between definition
+                    # files: the old content goes away and the new content arrives
+                    yield 'D', target(old_path), old_path, old_path
+                    yield 'A', target(new_path), new_path, new_path
+                else:
+                    yield status, target(new_path), old_path, new_path
+
+        model = previous_model
+        change_list = []
+        for status, key, old_path, new_path in steps():
+            status_name = GIT_STATUS_NAMES.get(status, 'modified')
+            if key == 'tables':
+                change_list.append(self._apply_table_change(model, status, old_path, new_path, base_ref, head_ref))
+            elif key is not None:
+                if status == 'D':
+                    model.pop(key, None)
+                else:
+                    model[key] = model_entry(key, parse_tmdl_text(read_file_at(self.repo_path, head_ref, new_path)))
+                change_list.append({'path': new_path, 'status': status_name, 'object': key})
+            else:
+                change_list.append({'path': new_path, 'status': status_name, 'object': None})
+
+        return model, change_list
+
+    def _apply_table_change(self, model, status, old_path, new_path, base_ref, head_ref):
+        tables = model.setdefault('tables', [])
+        old_index = None
+        old_name = None
+        if status != 'A':
+            # The previous output has no file mapping, so find the table by the name
+            # it had at the base ref
+            old_name = parse_tmdl_text(read_file_at(self.repo_path, base_ref, old_path)).get('name')
+            old_index = _table_index(tables, old_name)
+
+        change = {'path': new_path, 'status': GIT_STATUS_NAMES.get(status, 'modified'), 'object': 'table'}
+        if status == 'D':
+            if old_index is not None:
+                tables.pop(old_index)
+            change['name'] = old_name
+            return change
+
+        table = parse_tmdl_text(read_file_at(self.repo_path, head_ref, new_path))
+        if old_index is not None:
+            tables[old_index] = table
+        else:
+            tables.append(table)
+        change['name'] = table.get('name')
+        if old_name is not None and old_name != change['name']:
+            change['previousName'] = old_name
+        return change
+
+def main(argv=None, prog=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog=prog, description="Update a previous PBIP JSON output with only the TMDL files changed between two git refs.")
+    parser.add_argument("pbip_folder", help="Path to the PBIP report folder inside a git clone")
+    parser.add_argument("--previous", required=True, help="Full JSON output for the base ref")
+    parser.add_argument("--base", required=True, help="Base git ref (e.g. origin/main)")
+    parser.add_argument("--head", default="HEAD", help="Head git ref (default: HEAD)")
+    parser.add_argument("--repo", help="Path to the git repository (default: the PBIP folder)", default=None)
+    parser.add_argument("--output", help="Path to output JSON file (optional)", default=None)
+    parser.add_argument("--changes", help="Path to write the change list as JSON (optional)", default=None)
+
+    args = parser.parse_args(argv)
+
+    with open(args.previous, 'r', encoding='utf-8') as f:
+        previous_model = json.load(f)
+
+    converter = IncrementalConverter(args.pbip_folder, args.repo)
+    try:
+        model, change_list = converter.update(previous_model, args.base, args.head)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: git failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+        return 1
+    if model is None:
+        return 1
+
+    json_output = json.dumps(model, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json_output)
+        print(f"Output written to {args.output} ({len(change_list)} changed files)")
+    else:
+        print(json_output)
+
+    if args.changes:
+        with open(args.changes, 'w', encoding='utf-8') as f:
+            json.dump(change_list, f, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import re
+from pbip_parser import shared_expressions
+from tokenizers import let_bindings, record_fields, tokenize_m, unquote_m_identifier
+from validator import object_name
+
+# Dependency DAG between shared M expressions (expressions.tmdl), M parameters and
+# partition sources. Each expression is tokenized once; every identifier that names
+# a shared expression (Name or #"Name") and is not a local let binding becomes an
+# edge from that expression to the one using it. Topological order and downstream
+# sets are computed on first use and cached, so refresh planning for a change is a
+# lookup instead of a rescan of every source.
+
+_PARAMETER_META = re.compile(r'\bmeta\s*\[[^\]]*\bIsParameterQuery\s*=\s*true', re.IGNORECASE)
+
+def expression_node(name):
+    return ('expression', name)
+
+def partition_node(table, name):
+    return ('partition', table, name)
+
+def referenced_names(expression, known_names):
+    """Returns the names from known_names referenced by an M expression, in first-use order."""
+    tokens = list(tokenize_m(expression))
+    # Step names bound in let expressions shadow shared queries of the same name
+    local_names = {_identifier(*tokens[index]) for index in let_bindings(tokens)}
+
+    # Field names ([Name] accesses and record fields) are never references; the
+    # values inside records are
+    fields = set(record_fields(tokens))
+    references = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind not in ('word', 'quoted_identifier') or index in fields:
+            continue
+        name = _identifier(kind, text)
+        if name in known_names and name not in local_names and name not in references:
+            references.append(name)
+    return references
+
+def _identifier(kind, text):
+    return unquote_m_identifier(text) if kind == 'quoted_identifier' else text
+
+def is_parameter(expression):
+    return _PARAMETER_META.search(expression) is not None
+
+class MDependencyGraph:
+    def __init__(self):
+        # node -> 'expression', 'parameter' or 'partition'
+        self.kinds = {}
+        self.sources = {}
+        # node -> nodes it references / nodes referencing it
+        self.dependencies = {}
+        self.dependents = {}
+        self._order = None
+        self._cycle_nodes = None
+        self._downstream = {}
+
+    def add_expression(self, name, expression):
+        node = expression_node(name)
+        self.kinds[node] = 'parameter' if is_parameter(expression) else 'expression'
+        self.sources[node] = expression
+
+    def add_partition(self, table, name, source):
+        node = partition_node(table, name)
+        self.kinds[node] = 'partition'
+        self.sources[node] = source
+
+    def link(self):
+        """Extracts references from every source; call once all nodes are added."""
+        known_names = {node[1] for node, kind in self.kinds.items() if kind != 'partition'}
+        self.dependencies = {node: [] for node in self.kinds}
+        self.dependents = {node: [] for node in self.kinds}
+        for node, source in self.sources.items():
+            for name in referenced_names(source, known_names):
+                dependency = expression_node(name)
+                if dependency == node:
+                    continue
+                self.dependencies[node].append(dependency)
+                self.dependents[dependency].append(node)
+        self._order = None
+        self._cycle_nodes = None
+        self._downstream = {}
+        return self
+
+    def topological_order(self):
+        # Kahn's algorithm; nodes on a cycle (invalid in Power Query) are left out
+        # and reported by cycle_nodes()
+        if self._order is None:
+            from collections import deque
+
+            remaining = {node: len(dependencies) for node, dependencies in self.dependencies.items()}
+            ready = deque(node for node in self.kinds if remaining[node] == 0)
+            order = []
+            while ready:
+                node = ready.popleft()
+                order.append(node)
+                for dependent in self.dependents[node]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+            self._order = order
+            ordered = set(order)
+            self._cycle_nodes = [node for node in self.kinds if node not in ordered]
+        return self._order
+
+    def cycle_nodes(self):
+        self.topological_order()
+        return self._cycle_nodes
+
+    def downstream(self, node):
+        """All nodes that directly or transitively depend on node (cached per node)."""
+        result = self._downstream.get(node)
+        if result is None:
+            seen = set()
+            stack = list(self.dependents.get(node, ()))
+            while stack:
+                current = stack.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                cached = self._downstream.get(current)
+                if cached is not None:
+                    seen.update(cached)
+                else:
+                    stack.extend(self.dependents[current])
+            seen.discard(node)
+            result = frozenset(seen)
+            self._downstream[node] = result
+        return result
+
+    def refresh_plan(self, changed_names):
+        """Expressions and partitions affected by changed shared expressions, in dependency order."""
+        affected = set()
+        for name in changed_names:
+            node = expression_node(name)
+            if node in self.kinds:
+                affected.update(self.downstream(node))
+        order = self.topological_order() + self.cycle_nodes()
+        return {
+            'changed': list(changed_names),
+            'unknown': [name for name in changed_names if expression_node(name) not in self.kinds],
+            'expressions': [node[1] for node in order if node in affected and self.kinds[node] != 'partition'],
+            'partitions': [{'table': node[1], 'partition': node[2]} for node in order
+                           if node in affected and self.kinds[node] == 'partition'],
+        }
+
+    def to_dict(self):
+        def node_dict(node):
+            entry = {'kind': self.kinds[node], 'name': node[-1]}
+            if self.kinds[node] == 'partition':
+                entry['table'] = node[1]
+            return entry
+
+        return {
+            'nodes': [node_dict(node) for node in self.topological_order()],
+            'edges': [{'from': node_dict(dependency), 'to': node_dict(node)}
+                      for node in self.kinds for dependency in self.dependencies[node]],
+            'cycles': [node_dict(node) for node in self.cycle_nodes()],
+        }
+
+def _is_m_partition(partition):
+    return 'source' in partition and partition.get('partitionType', 'm') != 'calculated'
+
+def graph_from_model(model_data):
+    graph = MDependencyGraph()
+    for name, expression in shared_expressions(model_data.get('expressions', {})):
+        graph.add_expression(name, expression)
+    for table in model_data.get('tables', []):
+        for partition in table.get('partitions', []):
+            if _is_m_partition(partition):
+                graph.add_partition(object_name(table.get('name', '')), object_name(partition.get('name', '')), partition['source'])
+    return graph.link()
+
+def graph_from_project(pbip_folder_path, source=None, config_path="pbip_definition.json"):
+    # Streams the definition files, keeping only expression and partition sources
+    from pbip_parser import PbipParser
+    from tmdl_parser import iter_objects
+
+    pbip_parser = PbipParser(pbip_folder_path, config_path, source=source)
+    if pbip_parser.definition_path() is None:
+        return None
+    graph = MDependencyGraph()
+    for file_path in pbip_parser.definition_files():
+        for kind, parent_path, obj in iter_objects(file_path, decode_payloads=False, source=pbip_parser.source):
+            if kind == 'partition' and len(parent_path) == 1 and _is_m_partition(obj):
+                graph.add_partition(object_name(parent_path[0]), object_name(obj.get('name', '')), obj['source'])
+            elif not parent_path and kind == 'root':
+                for name, expression in shared_expressions(obj):
+                    graph.add_expression(name, expression)
+    return graph.link()
+
+def main(argv=None, prog=None):
+    import argparse
+    import json
+    import sys
+    from vfs import open_source
+
+    parser = argparse.ArgumentParser(prog=prog, description="Build the M dependency graph of a PBIP project and plan targeted refreshes.")
+    parser.add_argument("pbip_folder", help="Path to the PBIP report folder, or a .zip/.tar archive of one")
+    parser.add_argument("--changed", nargs='+', metavar="NAME", help="Shared expressions or parameters that changed; prints the partitions to refresh")
+    parser.add_argument("--output", help="Path to output JSON file (optional)", default=None)
+
+    args = parser.parse_args(argv)
+
+    source, pbip_folder_path = open_source(args.pbip_folder)
+    with source:
+        graph = graph_from_project(pbip_folder_path, source)
+    if graph is None:
+        return 1
+
+    result = graph.refresh_plan(args.changed) if args.changed else graph.to_dict()
+    if args.changed and result['unknown']:
+        print(f"Warning: not a shared expression: {', '.join(result['unknown'])}", file=sys.stderr)
+    json_output = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json_output)
+        print(f"Output written to {args.output}")
+    else:
+        print(json_output)
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
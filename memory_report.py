@@ -0,0 +1,210 @@
+import os
+import json
+import tracemalloc
+from contextlib import contextmanager
+from tmdl_parser import TmdlParser
+
+# TmdlParser methods whose allocations are attributed separately in the report
+INSTRUMENTED_HANDLERS = ('_extract_base64_content', '_normalize_block', '_handle_multiline_block')
+
+class MemoryReport:
+    """Attributes peak traced allocation to parsed files and parser handlers.
+
+    Peaks are measured with tracemalloc.reset_peak(). Measurements nest (handlers
+    inside files, and handlers inside handlers), so before each reset the current
+    peak is carried into every enclosing measurement still open.
+    """
+
+    def __init__(self):
+        self.files = []
+        self.handlers = {}
+        self._open_peaks = []
+        self._started_tracing = False
+        self._original_handlers = {}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        for name in INSTRUMENTED_HANDLERS:
+            self._original_handlers[name] = getattr(TmdlParser, name)
+            setattr(TmdlParser, name, self._wrap_handler(name, self._original_handlers[name]))
+
+    def stop(self):
+        for name, handler in self._original_handlers.items():
+            setattr(TmdlParser, name, handler)
+        self._original_handlers = {}
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _begin_measurement(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self._open_peaks = [max(open_peak, peak) for open_peak in self._open_peaks]
+        tracemalloc.reset_peak()
+        self._open_peaks.append(0)
+        return current
+
+    def _end_measurement(self):
+        current, peak = tracemalloc.get_traced_memory()
+        return current, max(self._open_peaks.pop(), peak)
+
+    def _wrap_handler(self, name, handler):
+        report = self
+
+        def measured_handler(*args, **kwargs):
+            before = report._begin_measurement()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                current, peak = report._end_measurement()
+                stats = report.handlers.setdefault(name, {'calls': 0, 'retainedBytes': 0, 'maxPeakBytes': 0})
+                stats['calls'] += 1
+                stats['retainedBytes'] += current - before
+                stats['maxPeakBytes'] = max(stats['maxPeakBytes'], peak - before)
+
+        return measured_handler
+
+    @contextmanager
+    def measure_file(self, file_path):
+        before = self._begin_measurement()
+        try:
+            yield
+        finally:
+            current, peak = self._end_measurement()
+            self.files.append({
+                'file': file_path,
+                'size': os.path.getsize(file_path) if os.path.exists(file_path) else None,
+                'peakBytes': peak - before,
+                'retainedBytes': current - before,
+            })
+
+    def summary(self):
+        return {
+            'files': sorted(self.files, key=lambda entry: entry['peakBytes'], reverse=True),
+            'handlers': self.handlers,
+        }
+
+    def format(self, top=10):
+        lines = ["Peak allocation by file:"]
+        for entry in self.summary()['files'][:top]:
+            lines.append(f"  {_format_bytes(entry['peakBytes']):>10}  peak  {_format_bytes(entry['retainedBytes']):>10}  retained  {entry['file']}")
+        lines.append("Allocation by handler:")
+        for name, stats in sorted(self.handlers.items(), key=lambda item: item[1]['maxPeakBytes'], reverse=True):
+            lines.append(f"  {_format_bytes(stats['maxPeakBytes']):>10}  max peak  {_format_bytes(stats['retainedBytes']):>10}  retained  {stats['calls']:>7} calls  {name}")
+        return "\n".join(lines)
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+    # No current RSS outside Linux; the peak is the closest cheap measure. ru_maxrss
+    # is in bytes on macOS and in kilobytes elsewhere.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class MemoryBudget:
+    """Tracks process memory against a byte budget for PbipParser's degraded modes.
+
+    Level 0 is normal parsing, level 1 stops decoding embedded Base64 payloads and
+    drops already decoded ones, level 2 additionally spills parsed tables to disk.
+    Memory is read as the process RSS, which costs nothing while parsing; tracemalloc,
+    which slows parsing several times over, is only used where RSS is unavailable.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.level = 0
+        self._created_spill_dir = False
+        self._started_tracing = False
+        if current_rss() is None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def used_bytes(self):
+        rss = current_rss()
+        return rss if rss is not None else tracemalloc.get_traced_memory()[0]
+
+    def exceeded(self):
+        return self.used_bytes() > self.max_bytes
+
+    def escalate(self):
+        if self.level < 2:
+            self.level += 1
+        return self.level
+
+    def spill_table(self, table):
+        import tempfile
+
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='tmdl2json-spill-')
+            self._created_spill_dir = True
+        os.makedirs(self.spill_dir, exist_ok=True)
+        fd, spill_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(table, f)
+        return {'name': table.get('name'), 'type': table.get('type'), 'spilledTo': spill_path}
+
+    def close(self):
+        # Spilled tables can no longer be loaded after this; call it once the model
+        # has been written
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self._created_spill_dir:
+            import shutil
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._created_spill_dir = False
+
+def is_spilled(table):
+    return 'spilledTo' in table
+
+def load_spilled_table(table):
+    if not is_spilled(table):
+        return table
+    with open(table['spilledTo'], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def drop_decoded_payloads(model_data):
+    for table in model_data.get('tables', []):
+        for partition in table.get('partitions', []):
+            for detail in partition.get('sourceDetails', []):
+                if 'content' in detail:
+                    detail['contentType'] = 'dropped'
+                    detail['contentLength'] = len(detail.pop('content'))
+
+def dump_model(model_data, f, indent=4):
+    # Produces exactly json.dumps(model_data, indent=indent) but loads spilled
+    # tables back one at a time while writing them
+    pad = ' ' * indent
+    f.write('{')
+    for key_index, (key, value) in enumerate(model_data.items()):
+        f.write(',\n' if key_index else '\n')
+        f.write(f"{pad}{json.dumps(key)}: ")
+        if key == 'tables' and value:
+            f.write('[')
+            for table_index, table in enumerate(value):
+                f.write(',\n' if table_index else '\n')
+                table_json = json.dumps(load_spilled_table(table), indent=indent)
+                f.write(pad * 2 + table_json.replace('\n', '\n' + pad * 2))
+            f.write(f"\n{pad}]")
+        else:
+            f.write(json.dumps(value, indent=indent).replace('\n', '\n' + pad))
+    f.write('\n}' if model_data else '}')
@@ -0,0 +1,248 @@
+import argparse
+import io
+import random
+import sys
+from reference_parser import reference_parse
+
+# Differential test harness for TmdlParser. Randomized documents (tmdl_corpus plus
+# hand-written edge cases) and line-level mutations of them are parsed by the frozen
+# reference parser and by each alternative engine, and the results are compared
+# structurally. A mismatching input is shrunk to a minimal one by deleting lines.
+# New engines (e.g. a lazy parser) are added to ENGINES as a function from a list of
+# lines to the parsed root dict.
+
+class NotApplicable(Exception):
+    """Raised by an engine for inputs it makes no claim about."""
+
+def _serial(lines):
+    from tmdl_parser import TmdlParser
+    return TmdlParser(None).parse_lines(lines)
+
+def _positions(lines):
+    # Recording the position index must not change the parsed output
+    from tmdl_parser import TmdlParser
+    return TmdlParser(None, record_positions=True).parse_lines(lines)
+
+def _chunked(lines):
+    # The parse_parallel merge, in process, with a chunk at every safe split point
+    from tmdl_parser import _chunk_lines, _parse_chunk, merge_chunk_roots
+
+    root = {}
+    for chunk in _chunk_lines(lines, max(len(lines), 1)):
+        merge_chunk_roots(root, _parse_chunk(chunk))
+    return root
+
+def _parallel(lines):
+    from tmdl_parser import parse_lines_parallel
+    return parse_lines_parallel(lines, workers=2, min_chunk_bytes=1)
+
+def _streaming(lines):
+    # Reassembles iter_objects events: objects not owned by another yielded object go
+    # back into the root's child lists, nested ones are already part of their owner
+    from tmdl_parser import CHILD_KINDS, CHILD_LIST_KEYS, iter_objects_from_lines
+
+    list_keys = {kind: key for key, kind in CHILD_KINDS.items()}
+    events = list(iter_objects_from_lines(iter(lines)))
+    _, _, root = events[-1]
+    owned = {id(child) for _, _, obj in events[:-1] for key in CHILD_LIST_KEYS for child in obj.get(key, ())}
+    children = {}
+    for kind, _, obj in events[:-1]:
+        if id(obj) not in owned:
+            children.setdefault(list_keys[kind], []).append(obj)
+    root.update(children)
+    return root
+
+def _round_trip(lines):
+    from reference_parser import ReferenceTmdlParser
+    from tmdl_writer import to_tmdl
+
+    parser = ReferenceTmdlParser()
+    parsed = parser.parse_lines(lines)
+    if parser.unparsed_lines:
+        # tmdl_writer does not rewrite such files, so there is nothing to guarantee
+        raise NotApplicable()
+    return reference_parse(split_lines(to_tmdl(parsed)))
+
+ENGINES = {
+    'serial': _serial,
+    'positions': _positions,
+    'chunked': _chunked,
+    'parallel': _parallel,
+    'streaming': _streaming,
+    'round_trip': _round_trip,
+}
+
+# 'parallel' starts a process pool per input, so it is opt-in
+DEFAULT_ENGINES = ('serial', 'positions', 'chunked', 'streaming', 'round_trip')
+
+def _edge_case_table(rng):
+    # Constructs whose line consumption differs from plain property lines
+    lines = [f"table Edge{rng.randint(0, 999)}"]
+    lines += ["\tmeasure Implicit = ", "\t\t\tVAR a = 1", "", "\t\t\tRETURN a", "\t\tformatString: 0"]
+    # Empty expression followed by a property: not an implicit block
+    lines += ["\tmeasure Empty = ", "\t\tdisplayFolder: Edge"]
+    lines += ["\tmeasure 'Quoted Name' = ```", "\t\t\t\tSUM ( T[x] )", "", "\t\t\t```"]
+    lines += ["\tmeasure NoExpression"]
+    lines += ["\tcolumn Calc = [A] + 1", "\t\tisHidden", "\t\tdescription =", "\t\t\tline one",
+              "\t\t\t\tindented", "", "\t\tlineageTag: backtracked"]
+    payload = rng.choice(['', 'bm90IGNvbXByZXNzZWQ=', 'not*base64'])
+    lines += ["\tpartition Edge = m", "\t\tsource =",
+              f'\t\t\tSource = Binary.FromText("{payload or "eJwrSS0uAQAEXQHB"}", BinaryEncoding.Base64),',
+              '\t\t\tData = Source{ [ Schema = "s" , Item = "i" ] }[Data]']
+    lines += ["\tannotation Broken", "\tannotation Key = a = b", "\t\tsummarizeBy: none"]
+    if rng.random() < 0.5:
+        # Unterminated ``` block running to the end of the file
+        lines += ["\tmeasure Open = ```", "\t\t\tx"]
+    return "\n".join(lines) + "\n"
+
+def _edge_case_relationships(rng):
+    lines = ["relationship a", "\tfromColumn: 'Fact Sales'.'Key.1'", "\ttoColumn: NoDot",
+             "\tannotation A = 1", "ref table X", "relationship b", "\tfromColumn: T.C", "\tfromColumn: T.D"]
+    return "\n".join(lines) + "\n"
+
+def generate_document(rng):
+    from tmdl_corpus import generate_expressions_tmdl, generate_relationships_tmdl, generate_table_tmdl
+
+    choice = rng.random()
+    if choice < 0.5:
+        return generate_table_tmdl(rng, rng.randint(0, 6), rng.randint(0, 6), rng.randint(0, 2))
+    if choice < 0.65:
+        return generate_relationships_tmdl(rng, rng.randint(1, 6))
+    if choice < 0.8:
+        return generate_expressions_tmdl(rng, rng.randint(1, 6))
+    if choice < 0.95:
+        return _edge_case_table(rng)
+    return _edge_case_relationships(rng)
+
+# Lines inserted by mutations; each one changes how the lines around it are consumed
+_INSERTED_LINES = ("", "\t\t\t", "```", "\t\t\t```", "\tmeasure M = ", "\tmeasure M = ```", "\t\tsource =",
+                   "\tcolumn Inserted", "relationship r", "table Other", "\tannotation K = V", "   spaced: 1",
+                   "\t\tkey = value", "\t\tflag", "\t\tfromColumn: A.B", "\t\t\t\tdeep line")
+
+def _mutate_once(lines, rng):
+    if not lines:
+        return [rng.choice(_INSERTED_LINES)]
+    index = rng.randrange(len(lines))
+    operation = rng.randrange(8)
+    if operation == 0:
+        del lines[index]
+    elif operation == 1:
+        lines.insert(index, lines[index])
+    elif operation == 2 and index + 1 < len(lines):
+        lines[index], lines[index + 1] = lines[index + 1], lines[index]
+    elif operation == 3:
+        lines[index] = "\t" + lines[index]
+    elif operation == 4:
+        lines[index] = lines[index][1:] if lines[index].startswith("\t") else lines[index]
+    elif operation == 5:
+        lines.insert(index, rng.choice(_INSERTED_LINES))
+    elif operation == 6:
+        del lines[index:]
+    else:
+        # Turn a `key: value` line into other property forms
+        line = lines[index]
+        lines[index] = line.replace(": ", rng.choice([" = ", ":", " =\t", ": "]), 1) + rng.choice(["", " ", " =", "\r"])
+    return lines
+
+def mutate(text, rng, count=None):
+    lines = text.split("\n")
+    for _ in range(count if count is not None else rng.randint(1, 4)):
+        lines = _mutate_once(lines, rng)
+    return "\n".join(lines)
+
+def iter_cases(seed=0, count=200, mutation_rate=0.7):
+    """Yields (case id, text) pairs; the same seed always yields the same cases."""
+    rng = random.Random(seed)
+    for case in range(count):
+        text = generate_document(rng)
+        if rng.random() < mutation_rate:
+            text = mutate(text, rng)
+        yield f"{seed}:{case}", text
+
+def split_lines(text):
+    # The line list readlines() gives for a file with this content
+    return io.StringIO(text).readlines()
+
+def diff_structures(expected, actual, path="$"):
+    """Returns (path, expected, actual) for every difference between two parsed values."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in expected:
+            if key not in actual:
+                diffs.append((f"{path}.{key}", expected[key], "<missing>"))
+            else:
+                diffs.extend(diff_structures(expected[key], actual[key], f"{path}.{key}"))
+        diffs.extend((f"{path}.{key}", "<missing>", actual[key]) for key in actual if key not in expected)
+        return diffs
+    if isinstance(expected, list) and isinstance(actual, list):
+        diffs = []
+        for index, (expected_item, actual_item) in enumerate(zip(expected, actual)):
+            diffs.extend(diff_structures(expected_item, actual_item, f"{path}[{index}]"))
+        if len(expected) != len(actual):
+            diffs.append((f"{path}.length", len(expected), len(actual)))
+        return diffs
+    if expected != actual or type(expected) is not type(actual):
+        return [(path, expected, actual)]
+    return []
+
+def compare(text, engine):
+    """Diffs of one engine's output against the reference for a TMDL text."""
+    lines = split_lines(text)
+    expected = reference_parse(lines)
+    try:
+        actual = ENGINES[engine](lines)
+    except NotApplicable:
+        return []
+    except Exception as e:
+        return [("$", "<parsed>", f"<{type(e).__name__}: {e}>")]
+    return diff_structures(expected, actual)
+
+def shrink(text, engine):
+    # Greedy line deletion, largest spans first, keeping the input failing
+    lines = text.split("\n")
+    span = max(len(lines) // 2, 1)
+    while span >= 1:
+        index = 0
+        while index < len(lines):
+            candidate = lines[:index] + lines[index + span:]
+            if compare("\n".join(candidate), engine):
+                lines = candidate
+            else:
+                index += span
+        span //= 2
+    return "\n".join(lines)
+
+def run_harness(seed=0, cases=200, engines=DEFAULT_ENGINES, shrink_failures=True, mutation_rate=0.7):
+    """Returns a failure dict for every (case, engine) whose output differs from the reference."""
+    failures = []
+    for case_id, text in iter_cases(seed, cases, mutation_rate):
+        for engine in engines:
+            diffs = compare(text, engine)
+            if diffs:
+                minimal = shrink(text, engine) if shrink_failures else text
+                failures.append({'case': case_id, 'engine': engine, 'diffs': diffs,
+                                 'input': text, 'minimal_input': minimal})
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TmdlParser engines with the frozen reference parser on randomized TMDL.")
+    parser.add_argument("--cases", type=int, default=500, help="Number of generated documents")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; runs are reproducible per seed")
+    parser.add_argument("--engines", nargs='+', choices=sorted(ENGINES), default=list(DEFAULT_ENGINES),
+                        help="Engines to compare with the reference (default: %(default)s)")
+    parser.add_argument("--no-shrink", action="store_true", help="Report failing inputs without minimizing them")
+    args = parser.parse_args()
+
+    failures = run_harness(args.seed, args.cases, args.engines, not args.no_shrink)
+    for failure in failures:
+        print(f"case {failure['case']} engine {failure['engine']}: {len(failure['diffs'])} difference(s)")
+        for path, expected, actual in failure['diffs'][:5]:
+            print(f"  {path}: expected {expected!r}, got {actual!r}")
+        print("  minimal input:")
+        for line in failure['minimal_input'].split("\n"):
+            print(f"    | {line!r}")
+    print(f"{args.cases} case(s), {len(args.engines)} engine(s), {len(failures)} failure(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,125 +1,302 @@
 import os
-import argparse
-import glob
-import json
-from config_loader import ConfigLoader
-from tmdl_parser import TmdlParser
+from tmdl_parser import TmdlParser, iter_objects
+from vfs import OS_SOURCE
+from project_layout import compile_config, get_layout
+
+# Definition file config keys -> key of the parsed content in the model output
+DEFINITION_FILE_KEYS = {
+    "database_tmdl": "database",
+    "model_tmdl": "model",
+    "relationships_tmdl": "relationships",
+    "expressions_tmdl": "expressions",
+}
+
+def model_entry(key, parsed_content):
+    # TmdlParser returns a root dict; for relationships.tmdl the model stores the
+    # list found under its 'relationships' key instead
+    if key == "relationships" and 'relationships' in parsed_content:
+        return parsed_content['relationships']
+    return parsed_content
+
+def shared_expressions(expressions_data):
+    # expressions.tmdl parses into root properties named "expression <Name>". A multi-line
+    # expression body is indented one level deeper than the expression's own properties
+    # (lineageTag, annotations), which end up appended to the block; keep only the body.
+    for key, value in expressions_data.items():
+        if not key.startswith('expression '):
+            continue
+        name = key[len('expression '):].strip()
+        if name.startswith("'") and name.endswith("'"):
+            name = name[1:-1]
+
+        lines = value.split('\n')
+        if lines and lines[0].startswith('\t'):
+            body = []
+            for line in lines:
+                if line and not line.startswith('\t'):
+                    break
+                body.append(line[1:])
+            while body and not body[-1].strip():
+                body.pop()
+            value = '\n'.join(body)
+        yield name, value
+
+def find_pbip_projects(root_path, config_path="pbip_definition.json"):
+    # A project is any folder directly containing a folder that matches the
+    # configured model folder pattern, the same match PbipParser discovers it with
+    match_model_folder = compile_config(config_path).match_model_folder
+    if match_model_folder is None:
+        return []
+
+    projects = []
+    for dir_path, dir_names, _ in os.walk(root_path):
+        if any(match_model_folder(name) for name in dir_names):
+            projects.append(dir_path)
+            # Do not descend into the project itself
+            dir_names[:] = []
+    return sorted(projects)
 
 class PbipParser:
-    def __init__(self, pbip_folder_path, config_path="pbip_definition.json"):
+    def __init__(self, pbip_folder_path, config_path="pbip_definition.json", memory_budget=None, memory_report=None, source=None):
         self.pbip_folder_path = pbip_folder_path
-        self.config_loader = ConfigLoader(config_path)
+        # A vfs source (archive or in-memory mapping); defaults to the local filesystem
+        self.source = source if source is not None else OS_SOURCE
+        self.config_path = config_path
+        self._layout = None
         self.model_data = {}
+        self._definition_path = None
+        # Optional memory_report.MemoryBudget / MemoryReport instances
+        self.memory_budget = memory_budget
+        self.memory_report = memory_report
+
+    @property
+    def config_loader(self):
+        # Loaded and compiled on first use, then shared by every parser with this config
+        return compile_config(self.config_path).loader
+
+    @property
+    def layout(self):
+        # Discovered (or revalidated from the shared cache) once per parser instance
+        if self._layout is None:
+            self._layout = get_layout(self.pbip_folder_path, self.config_path, self.source)
+        return self._layout
 
     def parse(self):
+        if self.definition_path() is None:
+            return None
+
+        # 3. Parse the definition files defined in config (database, model,
+        # relationships, expressions)
+        for config_key, key in DEFINITION_FILE_KEYS.items():
+            file_path = self.layout.definition_files.get(config_key)
+            if file_path is not None:
+                self._parse_file(file_path, key)
+
+        # 4. Parse the tables folder defined in config
+        if self.layout.table_files is not None:
+            self._parse_tables_folder(self.layout.table_files)
+
+        return self.model_data
+
+    def definition_path(self):
+        """Returns the model's definition folder, or None (with a warning) if the project has none."""
+        if self._definition_path is not None:
+            return self._definition_path
+
+        compiled = compile_config(self.config_path)
+        layout = self.layout
+
         # 0. Validate PBIP structure
-        pbip_file_pattern = self.config_loader.get_pbip_file_pattern()
-        if pbip_file_pattern:
-            found_pbip_files = glob.glob(os.path.join(self.pbip_folder_path, pbip_file_pattern))
-            if not found_pbip_files:
-                print(f"Warning: No PBIP file found matching '{pbip_file_pattern}' in '{self.pbip_folder_path}'")
-        
-        report_folder_pattern = self.config_loader.get_report_folder_pattern()
-        if report_folder_pattern:
-             found_report_folders = glob.glob(os.path.join(self.pbip_folder_path, report_folder_pattern))
-             if not found_report_folders:
-                 print(f"Warning: No Report folder found matching '{report_folder_pattern}' in '{self.pbip_folder_path}'")
+        if compiled.pbip_file_pattern and not layout.pbip_files:
+            print(f"Warning: No PBIP file found matching '{compiled.pbip_file_pattern}' in '{self.pbip_folder_path}'")
+
+        if compiled.report_folder_pattern and not layout.report_folders:
+            print(f"Warning: No Report folder found matching '{compiled.report_folder_pattern}' in '{self.pbip_folder_path}'")
 
         # 1. Find the Semantic Model folder
-        model_pattern = self.config_loader.get_model_folder_pattern()
-        search_path = os.path.join(self.pbip_folder_path, model_pattern)
-        found_models = glob.glob(search_path)
+        if not layout.model_folders:
+            print(f"No Semantic Model folder found matching pattern '{compiled.model_folder_pattern}' in '{self.pbip_folder_path}'")
+            return None
 
-        if not found_models:
-            print(f"No Semantic Model folder found matching pattern '{model_pattern}' in '{self.pbip_folder_path}'")
+        # 2. Locate definition folder (one model per PBIP folder)
+        if layout.definition_path is None:
+            print(f"Definition folder not found at: {self.source.join(layout.model_folders[0], compiled.definition_folder or '')}")
             return None
-        
-        # Assuming one model per PBIP folder for now, but usually true
-        semantic_model_path = found_models[0]
-        
-        # 2. Locate definition folder
-        def_folder_name = self.config_loader.get_definition_folder_name()
-        definition_path = os.path.join(semantic_model_path, def_folder_name)
-        
-        if not os.path.exists(definition_path):
-            print(f"Definition folder not found at: {definition_path}")
+
+        self._definition_path = layout.definition_path
+        return self._definition_path
+
+    def definition_files(self):
+        # Every file parse() reads, in the same order
+        if self.definition_path() is None:
+            return []
+        files = [self.layout.definition_files[config_key] for config_key in DEFINITION_FILE_KEYS
+                 if config_key in self.layout.definition_files]
+        files.extend(self.layout.table_files or ())
+        return files
+
+    def fingerprint(self):
+        # Changes whenever a definition file is added, removed or touched; computed from
+        # file signatures (size and mtime on disk) so nothing is read or parsed
+        import hashlib
+
+        definition_path = self.definition_path()
+        if definition_path is None:
             return None
+        digest = hashlib.sha1()
+        for file_path in self.definition_files():
+            relative_path = file_path[len(definition_path):]
+            digest.update(repr((relative_path, self.source.signature(file_path))).encode('utf-8'))
+        return digest.hexdigest()
 
-        # 3. Parse specific files defined in config
-        files_config = self.config_loader.get_definition_files()
-        
-        # Parse database.tmdl
-        if "database_tmdl" in files_config:
-            self._parse_file(definition_path, files_config["database_tmdl"], "database")
-
-        # Parse model.tmdl
-        if "model_tmdl" in files_config:
-            self._parse_file(definition_path, files_config["model_tmdl"], "model")
-
-        # Parse relationships.tmdl
-        if "relationships_tmdl" in files_config:
-            self._parse_file(definition_path, files_config["relationships_tmdl"], "relationships")
-
-        # Parse expressions.tmdl
-        if "expressions_tmdl" in files_config:
-            self._parse_file(definition_path, files_config["expressions_tmdl"], "expressions")
-
-        # 4. Parse folders defined in config
-        folders_config = self.config_loader.get_definition_folders()
-        
-        # Parse tables folder
-        if "tables" in folders_config:
-            tables_path = os.path.join(definition_path, folders_config["tables"])
-            if os.path.exists(tables_path):
-                self._parse_tables_folder(tables_path)
+    def iter_objects(self):
+        # Streams every definition file through tmdl_parser.iter_objects; each table
+        # file ends with a ('table', (), table_properties) event
+        decode_payloads = self.memory_budget is None or self.memory_budget.level == 0
+        for file_path in self.definition_files():
+            yield from iter_objects(file_path, decode_payloads, self.source)
 
-        return self.model_data
+    def iter_tables(self):
+        # Yields each parsed table as soon as its file is done, without keeping the
+        # others in memory. Consumers such as the ERD emitter can stream from this.
+        if self.definition_path() is None:
+            return
+        yield from self._iter_table_files(self.layout.table_files or ())
 
-    def _parse_file(self, base_path, filename, key):
-        file_path = os.path.join(base_path, filename)
-        if os.path.exists(file_path):
-            parser = TmdlParser(file_path)
-            parsed_content = parser.parse()
-            # If the parser returns a list (like for relationships), store it directly
-            # If it returns a dict, store it under the key
-            
-            # Special handling based on typical TmdlParser output
-            # TmdlParser.parse() returns a dict representing the root element
-            
-            if key == "relationships":
-                 # Relationships might be at the root or inside 'relationships' key depending on implementation
-                 # Based on recent changes, they are in 'relationships' key of the returned dict
-                 if 'relationships' in parsed_content:
-                     self.model_data['relationships'] = parsed_content['relationships']
-                 else:
-                     # Fallback if parser returns something else
-                     self.model_data[key] = parsed_content
-            else:
-                self.model_data[key] = parsed_content
+    def parse_relationships(self):
+        if self.definition_path() is None:
+            return []
+        file_path = self.layout.definition_files.get("relationships_tmdl")
+        if file_path is None:
+            return []
+        return TmdlParser(file_path, source=self.source).parse().get('relationships', [])
 
-    def _parse_tables_folder(self, tables_path):
+    def _parse_file(self, file_path, key):
+        parsed_content = self._parse_tmdl_file(file_path)
+        self.model_data[key] = model_entry(key, parsed_content)
+        self._enforce_memory_budget()
+
+    def _parse_tables_folder(self, table_files):
         tables = []
-        # Find all .tmdl files in the tables directory
-        tmdl_files = glob.glob(os.path.join(tables_path, "*.tmdl"))
-        
-        for tmdl_file in tmdl_files:
-            parser = TmdlParser(tmdl_file)
-            parsed_content = parser.parse()
-            tables.append(parsed_content)
-        
         self.model_data['tables'] = tables
+        for table in self._iter_table_files(table_files):
+            if self.memory_budget is not None and self.memory_budget.level >= 2:
+                table = self.memory_budget.spill_table(table)
+            tables.append(table)
+            self._enforce_memory_budget()
+
+    def _parse_tmdl_file(self, file_path):
+        decode_payloads = self.memory_budget is None or self.memory_budget.level == 0
+        parser = TmdlParser(file_path, decode_payloads=decode_payloads, source=self.source)
+        try:
+            if self.memory_report is not None:
+                with self.memory_report.measure_file(file_path):
+                    return parser.parse()
+            return parser.parse()
+        except MemoryError:
+            if self.memory_budget is None or self.memory_budget.level >= 2:
+                raise
+            # Free what we can and retry this file in the most degraded mode
+            self._degrade(2, "parsing ran out of memory")
+            return TmdlParser(file_path, decode_payloads=False, source=self.source).parse()
+
+    def _enforce_memory_budget(self):
+        budget = self.memory_budget
+        if budget is not None and budget.level < 2 and budget.exceeded():
+            self._degrade(budget.level + 1, f"memory budget of {budget.max_bytes} bytes exceeded")
+
+    def _degrade(self, level, reason):
+        # Applies each degradation step up to `level` that is not in effect yet:
+        # level 1 drops decoded payloads, level 2 spills the parsed tables
+        import sys
+        from memory_report import drop_decoded_payloads, is_spilled
 
-def main():
-    parser = argparse.ArgumentParser(description="Parse a PBIP report folder and convert TMDL to JSON.")
-    parser.add_argument("pbip_folder", help="Path to the PBIP report folder")
+        budget = self.memory_budget
+        while budget.level < level:
+            budget.escalate()
+            # stderr, so the warning cannot end up in JSON written to stdout
+            print(f"Warning: {reason}, switching to degraded mode {budget.level}", file=sys.stderr)
+            if budget.level == 1:
+                drop_decoded_payloads(self.model_data)
+            else:
+                tables = self.model_data.get('tables', [])
+                for index, table in enumerate(tables):
+                    if not is_spilled(table):
+                        tables[index] = budget.spill_table(table)
+
+    def _iter_table_files(self, table_files):
+        for tmdl_file in table_files:
+            yield self._parse_tmdl_file(tmdl_file)
+
+def main(argv=None, prog=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog=prog, description="Parse a PBIP report folder and convert TMDL to JSON.")
+    parser.add_argument("pbip_folder", help="Path to the PBIP report folder, or a .zip/.tar archive of one")
     parser.add_argument("--output", help="Path to output JSON file (optional)", default=None)
+    parser.add_argument("--shard-dir", help="Write one JSON file per table plus a manifest to this directory instead", default=None)
+    parser.add_argument("--workers", type=int, help="Worker processes used to parse and write table shards", default=None)
+    parser.add_argument("--memory-report", action="store_true", help="Print peak allocation per file and parser handler to stderr")
+    parser.add_argument("--max-memory", type=int, help="Memory budget in MB; above it payloads are dropped and tables spilled to disk", default=None)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.shard_dir and (args.memory_report or args.max_memory):
+        # Shards are parsed in worker processes and written one table at a time
+        parser.error("--memory-report and --max-memory cannot be combined with --shard-dir")
     
-    pbip_parser = PbipParser(args.pbip_folder)
-    result = pbip_parser.parse()
+    memory_budget = None
+    memory_report = None
+    if args.max_memory or args.memory_report:
+        import memory_report as memory_report_module
+        if args.max_memory:
+            memory_budget = memory_report_module.MemoryBudget(args.max_memory * 1024 * 1024)
+        if args.memory_report:
+            memory_report = memory_report_module.MemoryReport()
+            memory_report.start()
+
+    from vfs import open_source
+    source, pbip_folder_path = open_source(args.pbip_folder)
+    pbip_parser = PbipParser(pbip_folder_path, memory_budget=memory_budget, memory_report=memory_report, source=source)
+
+    with source:
+        if args.shard_dir:
+            import sys
+            from pbip_shards import write_sharded_model
+            try:
+                manifest = write_sharded_model(pbip_parser, args.shard_dir, args.workers)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+            if manifest is None:
+                return 1
+            print(f"Sharded output written to {args.shard_dir} ({len(manifest.get('tables', []))} tables)")
+            return 0
+
+        result = pbip_parser.parse()
+
+    if memory_report is not None:
+        memory_report.stop()
+        import sys
+        print(memory_report.format(), file=sys.stderr)
     
     if result:
+        if memory_budget is not None:
+            # Tables may have been spilled to disk; write them back one at a time
+            import sys
+            from memory_report import dump_model
+            try:
+                if args.output:
+                    with open(args.output, 'w', encoding='utf-8') as f:
+                        dump_model(result, f)
+                    print(f"Output written to {args.output}")
+                else:
+                    dump_model(result, sys.stdout)
+                    print()
+            finally:
+                memory_budget.close()
+            return 0
+
         json_output = json.dumps(result, indent=4)
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
@@ -127,6 +304,9 @@ def main():
             print(f"Output written to {args.output}")
         else:
             print(json_output)
+        return 0
+    return 1
 
 if __name__ == "__main__":
-    main()
+    import sys
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import os
+import hashlib
+import json
+from pbip_parser import DEFINITION_FILE_KEYS, model_entry
+from tmdl_parser import TmdlParser, parse_tmdl_text
+from validator import object_name
+from vfs import OS_SOURCE
+
+# Sharded output for PbipParser: one JSON file per table plus one per definition file,
+# described by a manifest. Table shards live at a path derived only from the table
+# name (unquoted and casefolded, since table names are case-insensitive), so a single
+# table can be loaded without reading the manifest or other shards.
+
+MANIFEST_FILENAME = "manifest.json"
+TABLES_SHARD_FOLDER = "tables"
+
+def shard_filename(table_name):
+    from urllib.parse import quote
+    # 'Dim Date', Dim Date and 'dim date' name the same shard: table names ignore case,
+    # and so do the file systems of Windows and macOS. Percent-encode anything that is
+    # not safe in a file name on every platform.
+    return quote(object_name(table_name).casefold(), safe=" -_.'") + ".json"
+
+def _write_shard(output_dir, relative_path, data, exclusive=False):
+    payload = json.dumps(data, indent=4).encode('utf-8')
+    with open(os.path.join(output_dir, relative_path), 'xb' if exclusive else 'wb') as f:
+        f.write(payload)
+    return {
+        'path': relative_path.replace(os.sep, '/'),
+        'size': len(payload),
+        'sha256': hashlib.sha256(payload).hexdigest(),
+    }
+
+def _parse_and_write_table(tmdl_file, output_dir, text=None):
+    # Runs in a worker process; only the small manifest entry travels back. Files from
+    # archive or in-memory sources are sent as text since workers cannot reopen them.
+    table = TmdlParser(tmdl_file).parse() if text is None else parse_tmdl_text(text)
+    table_name = table.get('name') or os.path.splitext(os.path.basename(tmdl_file))[0]
+    relative_path = os.path.join(TABLES_SHARD_FOLDER, shard_filename(table_name))
+    try:
+        # The tables folder starts empty, so an existing shard means two tables share a name
+        entry = _write_shard(output_dir, relative_path, table, exclusive=True)
+    except FileExistsError:
+        raise ValueError(f"Table {table_name} in {os.path.basename(tmdl_file)} has the same name as another "
+                         f"table, ignoring case; both would be written to {relative_path}") from None
+    entry['name'] = table_name
+    entry['source'] = os.path.basename(tmdl_file)
+    return entry
+
+def write_sharded_model(pbip_parser, output_dir, workers=None):
+    from concurrent.futures import ProcessPoolExecutor
+
+    if pbip_parser.definition_path() is None:
+        return None
+
+    tables_dir = os.path.join(output_dir, TABLES_SHARD_FOLDER)
+    os.makedirs(tables_dir, exist_ok=True)
+    # Drop shards from a previous run, or tables deleted from the model would
+    # still load through load_table
+    for name in os.listdir(tables_dir):
+        if name.endswith(".json"):
+            os.remove(os.path.join(tables_dir, name))
+    manifest = {'shards': {}}
+
+    source = pbip_parser.source
+    layout = pbip_parser.layout
+    tmdl_files = layout.table_files
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Table shards are parsed and written by the workers while the definition
+        # files are handled here
+        table_futures = [executor.submit(_parse_and_write_table, tmdl_file, output_dir,
+                                         None if source is OS_SOURCE else source.read_text(tmdl_file))
+                         for tmdl_file in tmdl_files or []]
+
+        for config_key, shard_name in DEFINITION_FILE_KEYS.items():
+            file_path = layout.definition_files.get(config_key)
+            if file_path is None:
+                continue
+            parsed_content = model_entry(shard_name, TmdlParser(file_path, source=source).parse())
+            manifest['shards'][shard_name] = _write_shard(output_dir, shard_name + ".json", parsed_content)
+
+        # Keep the manifest in the same table order as PbipParser.parse
+        if tmdl_files is not None:
+            manifest['tables'] = [future.result() for future in table_futures]
+
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+def load_manifest(shard_dir):
+    with open(os.path.join(shard_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_table(shard_dir, table_name):
+    table_path = os.path.join(shard_dir, TABLES_SHARD_FOLDER, shard_filename(table_name))
+    if not os.path.exists(table_path):
+        return None
+    with open(table_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_sharded_model(shard_dir):
+    # Reassembles the same document PbipParser.parse would have returned
+    manifest = load_manifest(shard_dir)
+    model_data = {}
+    for shard_name, entry in manifest['shards'].items():
+        with open(os.path.join(shard_dir, entry['path']), 'r', encoding='utf-8') as f:
+            model_data[shard_name] = json.load(f)
+    if 'tables' in manifest:
+        model_data['tables'] = []
+        for entry in manifest['tables']:
+            with open(os.path.join(shard_dir, entry['path']), 'r', encoding='utf-8') as f:
+                model_data['tables'].append(json.load(f))
+    return model_data
@@ -0,0 +1,134 @@
+from array import array
+
+# Side-index of where each object and property block of a TMDL file is defined,
+# recorded by TmdlParser(record_positions=True) while it walks the lines. Entries
+# are stored column-wise in typed arrays (kind code, parent entry, start/end line,
+# column) plus one list of names, instead of a dict per node, so the index of a very
+# large file stays small and serializes as a handful of flat lists. Lines and columns
+# are 1-based; the column counts tabs as one character.
+
+FORMAT_VERSION = 1
+
+KINDS = ('table', 'database', 'model', 'column', 'measure', 'partition', 'relationship', 'annotation', 'property')
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+class PositionIndex:
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        self.kinds = array('B')
+        self.parents = array('i')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.columns = array('I')
+        self.names = []
+        # id() of each parsed object dict still open during parsing -> its entry
+        self._open = {}
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add(self, kind, name, parent, start, column, end=None):
+        """Appends an entry and returns its index; parent is an entry index or -1."""
+        self.kinds.append(_KIND_CODES[kind])
+        self.names.append(name)
+        self.parents.append(parent)
+        self.starts.append(start)
+        self.ends.append(start if end is None else end)
+        self.columns.append(column)
+        self._lookup = None
+        return len(self.kinds) - 1
+
+    def open(self, obj, entry):
+        self._open[id(obj)] = entry
+
+    def entry_of(self, obj):
+        return self._open.get(id(obj), -1)
+
+    def set_end(self, entry, end):
+        self.ends[entry] = end
+
+    def close(self, obj, end):
+        entry = self._open.pop(id(obj), None)
+        if entry is not None:
+            self.ends[entry] = end
+
+    def close_all(self, end):
+        for entry in self._open.values():
+            self.ends[entry] = end
+        self._open.clear()
+
+    def entry(self, index):
+        return {'kind': KINDS[self.kinds[index]], 'name': self.names[index], 'parent': self.parents[index],
+                'start': self.starts[index], 'end': self.ends[index], 'column': self.columns[index]}
+
+    def path(self, index):
+        names = []
+        while index != -1:
+            names.append(self.names[index])
+            index = self.parents[index]
+        return tuple(reversed(names))
+
+    def find(self, kind, *path):
+        """Index of the entry with this kind and name path (e.g. 'column', 'Sales', 'Amount'), or None."""
+        if self._lookup is None:
+            # Built on first lookup; later lookups are a single dict access
+            lookup = {}
+            for index in range(len(self.kinds)):
+                lookup.setdefault((self.kinds[index], self.path(index)), index)
+            self._lookup = lookup
+        return self._lookup.get((_KIND_CODES.get(kind), path))
+
+    def span(self, kind, *path):
+        """(start line, end line) of an object or property block, or None."""
+        index = self.find(kind, *path)
+        if index is None:
+            return None
+        return self.starts[index], self.ends[index]
+
+    def to_dict(self):
+        return {
+            'version': FORMAT_VERSION,
+            'file': self.file_path,
+            'kinds': list(KINDS),
+            'kind': self.kinds.tolist(),
+            'name': list(self.names),
+            'parent': self.parents.tolist(),
+            'start': self.starts.tolist(),
+            'end': self.ends.tolist(),
+            'column': self.columns.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported positions format version: {data.get('version')}")
+        index = cls(data.get('file'))
+        # Kind codes are remapped by name so older files survive a reordered KINDS
+        codes = [_KIND_CODES[kind] for kind in data['kinds']]
+        index.kinds = array('B', (codes[code] for code in data['kind']))
+        index.parents = array('i', data['parent'])
+        index.starts = array('I', data['start'])
+        index.ends = array('I', data['end'])
+        index.columns = array('I', data['column'])
+        index.names = list(data['name'])
+        return index
+
+    def save(self, path):
+        import json
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        import json
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+def positions_path(output_path):
+    # model.json -> model.positions.json, next to the JSON output
+    import os
+
+    return os.path.splitext(output_path)[0] + '.positions.json'
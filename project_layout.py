@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import fnmatch
+import weakref
+from vfs import OS_SOURCE
+
+# File discovery for PbipParser. pbip_definition.json is loaded and its patterns
+# compiled once per config path, and a project's layout (PBIP file, report and model
+# folders, definition files, table files) is found with one directory scan per level
+# instead of a glob or exists call per configured name. Layouts are cached per source
+# and reused until the mtime of a scanned directory changes, so batch and watch
+# modes only pay a few stat calls per project after the first scan.
+
+# Directory mtimes this close to the scan time may still change within the same
+# timestamp tick (coarse on network file systems), so such layouts are rescanned
+RACY_MTIME_NS = 2 * 10**9
+
+_COMPILED_CONFIGS = {}
+_LAYOUT_CACHE = weakref.WeakKeyDictionary()
+
+def _compile_pattern(pattern):
+    if not pattern:
+        return None
+    regex = re.compile(fnmatch.translate(os.path.normcase(pattern)))
+    # Like glob, wildcards do not match names starting with '.' unless the pattern does
+    hidden_ok = pattern.startswith('.')
+    return lambda name: (hidden_ok or not name.startswith('.')) and regex.match(os.path.normcase(name)) is not None
+
+class CompiledConfig:
+    def __init__(self, loader):
+        self.loader = loader
+        self.pbip_file_pattern = loader.get_pbip_file_pattern()
+        self.report_folder_pattern = loader.get_report_folder_pattern()
+        self.model_folder_pattern = loader.get_model_folder_pattern()
+        self.match_pbip_file = _compile_pattern(self.pbip_file_pattern)
+        self.match_report_folder = _compile_pattern(self.report_folder_pattern)
+        self.match_model_folder = _compile_pattern(self.model_folder_pattern)
+        self.definition_folder = loader.get_definition_folder_name()
+        # normalized file name -> config key, in config order
+        self.definition_files = {os.path.normcase(name): config_key
+                                 for config_key, name in loader.get_definition_files().items()}
+        self.tables_folder = loader.get_definition_folders().get("tables")
+        self.match_table_file = _compile_pattern("*.tmdl")
+
+def compile_config(config_path="pbip_definition.json"):
+    key = os.path.abspath(config_path)
+    compiled = _COMPILED_CONFIGS.get(key)
+    if compiled is None:
+        from config_loader import ConfigLoader
+        compiled = CompiledConfig(ConfigLoader(config_path))
+        _COMPILED_CONFIGS[key] = compiled
+    return compiled
+
+class ProjectLayout:
+    def __init__(self, root):
+        self.root = root
+        self.pbip_files = []
+        self.report_folders = []
+        self.model_folders = []
+        self.definition_path = None
+        # config key -> path, only for definition files that exist
+        self.definition_files = {}
+        self.tables_path = None
+        # None when there is no tables folder
+        self.table_files = None
+        # scanned directory -> version (mtime) at scan time, None if it was missing
+        self.versions = {}
+        self.scanned_at = time.time_ns()
+
+    def is_current(self, source=OS_SOURCE):
+        for path, version in self.versions.items():
+            if version is not None and self.scanned_at - version < RACY_MTIME_NS:
+                return False
+            if source.dir_version(path) != version:
+                return False
+        return True
+
+def _scan(layout, source, path):
+    scanned = source.scan_dir(path)
+    if scanned is None:
+        layout.versions[path] = None
+        return None
+    version, entries = scanned
+    layout.versions[path] = version
+    return entries
+
+def discover_layout(root, compiled, source=OS_SOURCE):
+    layout = ProjectLayout(root)
+    for name, is_dir in _scan(layout, source, root) or ():
+        if is_dir:
+            if compiled.match_report_folder and compiled.match_report_folder(name):
+                layout.report_folders.append(source.join(root, name))
+            if compiled.match_model_folder and compiled.match_model_folder(name):
+                layout.model_folders.append(source.join(root, name))
+        elif compiled.match_pbip_file and compiled.match_pbip_file(name):
+            layout.pbip_files.append(source.join(root, name))
+
+    if not layout.model_folders or not compiled.definition_folder:
+        return layout
+
+    # One model per PBIP folder: the first match, as glob would have returned it
+    definition_path = source.join(layout.model_folders[0], compiled.definition_folder)
+    entries = _scan(layout, source, definition_path)
+    if entries is None:
+        return layout
+    layout.definition_path = definition_path
+
+    files = {}
+    for name, is_dir in entries:
+        normalized = os.path.normcase(name)
+        if is_dir:
+            if compiled.tables_folder and normalized == os.path.normcase(compiled.tables_folder):
+                layout.tables_path = source.join(definition_path, name)
+        elif normalized in compiled.definition_files:
+            files[compiled.definition_files[normalized]] = source.join(definition_path, name)
+    # Keep config order regardless of directory order
+    layout.definition_files = {config_key: files[config_key] for config_key in compiled.definition_files.values() if config_key in files}
+
+    if layout.tables_path is not None:
+        layout.table_files = [source.join(layout.tables_path, name)
+                              for name, is_dir in _scan(layout, source, layout.tables_path) or ()
+                              if not is_dir and compiled.match_table_file(name)]
+    return layout
+
+def get_layout(root, config_path="pbip_definition.json", source=OS_SOURCE):
+    """Returns the cached layout of a project, rescanning it if a scanned directory changed."""
+    compiled = compile_config(config_path)
+    layouts = _LAYOUT_CACHE.setdefault(source, {})
+    key = (root, id(compiled))
+    layout = layouts.get(key)
+    if layout is None or not layout.is_current(source):
+        layout = discover_layout(root, compiled, source)
+        layouts[key] = layout
+    return layout
+
+def clear_layout_cache():
+    _LAYOUT_CACHE.clear()
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+DEFAULT_MAX_CACHE_MB = 512
+
+class RenderCache:
+    """Content-addressed on-disk cache for rendered diagram outputs.
+
+    Entries are keyed by the SHA-256 of the Mermaid text plus the output suffix
+    (e.g. '.png', '.md', '.mmd'). Hits refresh the entry's mtime and the oldest
+    entries are evicted once the total size exceeds max_bytes. Outputs larger than
+    max_bytes are not cached at all, since storing one would evict every other entry.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(mermaid_code):
+        return hashlib.sha256(mermaid_code.encode("utf8")).hexdigest()
+
+    def _entry_path(self, key, suffix):
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def get(self, key, suffix):
+        path = self._entry_path(key, suffix)
+        try:
+            # Touch on access so eviction drops the least recently used entries first
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, suffix, data):
+        """Stores data and returns the entry path, or None if it is too large to cache."""
+        if len(data) > self.max_bytes:
+            return None
+        return self._store(key, suffix, lambda f: f.write(data))
+
+    def put_file(self, key, suffix, source_path):
+        """Like put, but copies an existing file without reading it into memory."""
+        if os.path.getsize(source_path) > self.max_bytes:
+            return None
+
+        def copy(f):
+            with open(source_path, 'rb') as source:
+                shutil.copyfileobj(source, f)
+        return self._store(key, suffix, copy)
+
+    def _store(self, key, suffix, write):
+        path = self._entry_path(key, suffix)
+        # Write to a temp file and rename so a concurrent reader never sees a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def copy_to(self, key, suffix, output_path):
+        cached_path = self.get(key, suffix)
+        if cached_path is None:
+            return False
+        shutil.copyfile(cached_path, output_path)
+        return True
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
@@ -0,0 +1,242 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Long-running localhost JSON API over parsed PBIP models. Parsed models are kept in
+# a size-bounded LRU keyed by project path and invalidated when the definition files'
+# fingerprint (stat signatures) changes. Responses carry an ETag derived from that
+# fingerprint, so a matching If-None-Match is answered with 304 after a few stat
+# calls, without parsing or serializing anything. Concurrent requests for a model
+# that is not cached yet wait for a single parse instead of each parsing it.
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MB = 256
+
+class ModelCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024, config_path="pbip_definition.json"):
+        self.max_bytes = max_bytes
+        self.config_path = config_path
+        self.entries = OrderedDict()
+        self.size = 0
+        self.parse_count = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def fingerprint(self, pbip_folder_path):
+        from pbip_parser import PbipParser
+        return PbipParser(pbip_folder_path, self.config_path).fingerprint()
+
+    def get(self, pbip_folder_path, fingerprint=None):
+        """Returns the cache entry for a project, parsing it at most once per fingerprint."""
+        from concurrent.futures import Future
+
+        if fingerprint is None:
+            fingerprint = self.fingerprint(pbip_folder_path)
+            if fingerprint is None:
+                return None
+        key = (pbip_folder_path, fingerprint)
+        with self._lock:
+            entry = self.entries.get(pbip_folder_path)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                self.entries.move_to_end(pbip_folder_path)
+                return entry
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.parse_count += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            entry = self._load(pbip_folder_path, fingerprint)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if entry is not None:
+                self._store(pbip_folder_path, entry)
+            del self._in_flight[key]
+        future.set_result(entry)
+        return entry
+
+    def _load(self, pbip_folder_path, fingerprint):
+        from pbip_parser import PbipParser
+
+        model_data = PbipParser(pbip_folder_path, self.config_path).parse()
+        if model_data is None:
+            return None
+        body = json.dumps(model_data, indent=4).encode('utf-8')
+        # The serialized size stands in for the entry's memory footprint
+        return {'path': pbip_folder_path, 'fingerprint': fingerprint, 'model': model_data,
+                'body': body, 'renders': {}, 'size': len(body)}
+
+    def _store(self, pbip_folder_path, entry):
+        previous = self.entries.pop(pbip_folder_path, None)
+        if previous is not None:
+            self.size -= previous['size']
+        self.entries[pbip_folder_path] = entry
+        self.size += entry['size']
+        self._evict()
+
+    def _evict(self):
+        # The most recently used entry is always kept, even if it alone exceeds the budget
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.size -= entry['size']
+
+    def render(self, entry, kind, name=None):
+        """Returns the body for a table or ERD response, rendered once per entry."""
+        render_key = (kind, name)
+        body = entry['renders'].get(render_key)
+        if body is not None:
+            return body
+
+        if kind == 'table':
+            from validator import object_name
+            wanted = name.lower()
+            table = next((t for t in entry['model'].get('tables', []) if object_name(t.get('name', '')).lower() == wanted), None)
+            if table is None:
+                return None
+            body = json.dumps(table, indent=4).encode('utf-8')
+        else:
+            from erd_generator import generate_mermaid_erd
+            body = generate_mermaid_erd(entry['model']).encode('utf-8')
+
+        with self._lock:
+            if render_key not in entry['renders']:
+                entry['renders'][render_key] = body
+                entry['size'] += len(body)
+                if self.entries.get(entry['path']) is entry:
+                    self.size += len(body)
+                    self._evict()
+        return body
+
+def make_etag(fingerprint, kind, name=None):
+    digest = hashlib.sha1(f"{fingerprint}\x1f{kind}\x1f{name or ''}".encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+# route -> (kind, content type)
+ROUTES = {
+    '/model': ('model', 'application/json'),
+    '/table': ('table', 'application/json'),
+    '/erd': ('erd', 'text/plain; charset=utf-8'),
+}
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            self._handle_get()
+        except Exception as e:
+            # A failing parse or render answers this request with 500 instead of
+            # dropping the connection without a response
+            import traceback
+            self.log_error("Error serving %s\n%s", self.path, traceback.format_exc())
+            self._send_error(500, f"{type(e).__name__}: {e}")
+
+    def _handle_get(self):
+        from urllib.parse import urlsplit, parse_qs
+
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        if url.path not in ROUTES:
+            return self._send_error(404, f"Unknown endpoint '{url.path}'")
+        kind, content_type = ROUTES[url.path]
+
+        pbip_folder_path = self.server.resolve_project(params.get('path', [''])[0])
+        if pbip_folder_path is None:
+            return self._send_error(400, "Query parameter 'path' must name a project folder under the served root")
+        name = params.get('name', [None])[0]
+        if kind == 'table' and not name:
+            return self._send_error(400, "Query parameter 'name' is required")
+
+        cache = self.server.cache
+        fingerprint = cache.fingerprint(pbip_folder_path)
+        if fingerprint is None:
+            return self._send_error(404, "No semantic model definition found")
+
+        etag = make_etag(fingerprint, kind, name)
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        entry = cache.get(pbip_folder_path, fingerprint)
+        if entry is None:
+            return self._send_error(404, "No semantic model definition found")
+        body = entry['body'] if kind == 'model' else cache.render(entry, kind, name)
+        if body is None:
+            return self._send_error(404, f"Table '{name}' not found")
+        self._send_body(200, body, content_type, etag)
+
+    def _send_body(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_body(status, json.dumps({'error': message}).encode('utf-8'), 'application/json')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Errors are logged even when request logging is off
+        super().log_message(format, *args)
+
+class ModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root, cache=None, verbose=False):
+        super().__init__(address, ServiceHandler)
+        self.root = os.path.realpath(root)
+        self.cache = cache if cache is not None else ModelCache()
+        self.verbose = verbose
+
+    def resolve_project(self, relative_path):
+        # Only folders under the served root can be requested
+        pbip_folder_path = os.path.realpath(os.path.join(self.root, relative_path))
+        if os.path.commonpath([self.root, pbip_folder_path]) != self.root or not os.path.isdir(pbip_folder_path):
+            return None
+        return pbip_folder_path
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Serve parsed PBIP models, tables and ERDs over a localhost HTTP/JSON API.")
+    parser.add_argument("--root", default=".", help="Folder containing the PBIP projects to serve (default: current directory)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_MB, help=f"Size bound of the parsed model cache in MB (default: {DEFAULT_CACHE_MB})")
+    parser.add_argument("--verbose", action="store_true", help="Log every request to stderr")
+
+    args = parser.parse_args(argv)
+
+    server = ModelServer((args.host, args.port), args.root, ModelCache(args.cache_mb * 1024 * 1024), args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving {server.root} on http://{host}:{port} (GET /model?path=..., /table?path=...&name=..., /erd?path=...)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
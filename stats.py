@@ -0,0 +1,154 @@
+import os
+from pbip_parser import PbipParser, shared_expressions
+from tmdl_parser import iter_objects
+from validator import column_expression
+
+# Per-model inventory numbers for capacity planning, computed in one streaming pass
+# over each project's definition files with tmdl_parser.iter_objects. Embedded
+# Base64 payloads are measured by their encoded length instead of being decoded.
+# Projects are independent, so several are processed in parallel worker processes.
+
+SCALAR_FIELDS = ('project', 'tables', 'columns', 'calculatedColumns', 'measures', 'partitions', 'relationships',
+                 'expressions', 'expressionChars', 'maxExpressionLength', 'payloadEncodedBytes')
+COUNTER_FIELDS = ('partitionModes', 'relationshipCardinalities')
+
+class ModelStats:
+    def __init__(self, project):
+        self.stats = {field: 0 for field in SCALAR_FIELDS}
+        self.stats['project'] = project
+        for field in COUNTER_FIELDS:
+            self.stats[field] = {}
+
+    def _count(self, field, key):
+        counter = self.stats[field]
+        counter[key] = counter.get(key, 0) + 1
+
+    def _expression(self, expression):
+        if expression is None:
+            return
+        self.stats['expressions'] += 1
+        self.stats['expressionChars'] += len(expression)
+        self.stats['maxExpressionLength'] = max(self.stats['maxExpressionLength'], len(expression))
+
+    def add_event(self, kind, parent_path, obj):
+        stats = self.stats
+        if kind == 'table':
+            stats['tables'] += 1
+        elif kind == 'column':
+            stats['columns'] += 1
+            expression = column_expression(obj.get('name', ''))
+            if expression is not None:
+                stats['calculatedColumns'] += 1
+                self._expression(expression)
+        elif kind == 'measure':
+            stats['measures'] += 1
+            self._expression(obj.get('expression', ''))
+        elif kind == 'partition':
+            stats['partitions'] += 1
+            # Partitions without an explicit mode use the model default, import
+            self._count('partitionModes', obj.get('mode', 'import'))
+            self._expression(obj.get('source'))
+            for detail in obj.get('sourceDetails', []):
+                stats['payloadEncodedBytes'] += detail.get('encodedLength', 0)
+        elif kind == 'relationship':
+            stats['relationships'] += 1
+            # TMDL omits the defaults: many on the from side, one on the to side
+            self._count('relationshipCardinalities', f"{obj.get('fromCardinality', 'many')}:{obj.get('toCardinality', 'one')}")
+        elif not parent_path:
+            # Root of expressions.tmdl (or any other file): shared M expressions
+            for _, expression in shared_expressions(obj):
+                self._expression(expression)
+
+def collect_stats(pbip_folder_path, source=None, project=None, config_path="pbip_definition.json"):
+    """Returns the stats dict for one project, or None if it has no semantic model."""
+    pbip_parser = PbipParser(pbip_folder_path, config_path, source=source)
+    if pbip_parser.definition_path() is None:
+        return None
+    model_stats = ModelStats(project or pbip_folder_path)
+    # One file's parse state at a time; each object is dropped once counted
+    for file_path in pbip_parser.definition_files():
+        for kind, parent_path, obj in iter_objects(file_path, decode_payloads=False, source=pbip_parser.source):
+            model_stats.add_event(kind, parent_path, obj)
+    return model_stats.stats
+
+def _collect_path(path):
+    # Worker entry point: archives are opened in the worker since sources do not pickle.
+    # Parser warnings go to stderr so they never mix with stats written to stdout.
+    import sys
+    from contextlib import redirect_stdout
+    from vfs import is_archive, open_source
+
+    with redirect_stdout(sys.stderr):
+        if is_archive(path):
+            source, root = open_source(path)
+            with source:
+                return collect_stats(root, source, project=path)
+        return collect_stats(path)
+
+def iter_project_paths(paths):
+    from pbip_parser import find_pbip_projects
+    from vfs import is_archive
+
+    for path in paths:
+        if is_archive(path):
+            yield path
+        elif os.path.isdir(path):
+            yield from find_pbip_projects(path)
+
+def collect_all(paths, workers=None):
+    projects = list(iter_project_paths(paths))
+    if workers == 1 or len(projects) < 2:
+        results = [_collect_path(project) for project in projects]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_collect_path, projects))
+    return [result for result in results if result is not None]
+
+def flatten_stats(stats):
+    # CSV rows: counters become one column per key, e.g. partitionModes.import
+    row = {field: stats[field] for field in SCALAR_FIELDS}
+    for field in COUNTER_FIELDS:
+        for key, count in sorted(stats[field].items()):
+            row[f"{field}.{key}"] = count
+    return row
+
+def write_csv(all_stats, f):
+    import csv
+
+    rows = [flatten_stats(stats) for stats in all_stats]
+    counter_columns = sorted({column for row in rows for column in row} - set(SCALAR_FIELDS))
+    writer = csv.DictWriter(f, fieldnames=list(SCALAR_FIELDS) + counter_columns, restval=0, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
+
+def main(argv=None, prog=None):
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(prog=prog, description="Report per-model inventory statistics for PBIP projects.")
+    parser.add_argument("paths", nargs='+', help="PBIP project folders or archives, or folders to search for projects")
+    parser.add_argument("--format", choices=("json", "csv"), default="json", help="Output format (default: json)")
+    parser.add_argument("--output", help="Path to output file (optional)", default=None)
+    parser.add_argument("--workers", type=int, help="Worker processes used across projects", default=None)
+
+    args = parser.parse_args(argv)
+
+    all_stats = collect_all(args.paths, args.workers)
+    f = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            write_csv(all_stats, f)
+        else:
+            f.write(json.dumps(all_stats, indent=4) + "\n")
+    finally:
+        if args.output:
+            f.close()
+    if args.output:
+        print(f"Statistics for {len(all_stats)} model(s) written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import unittest
+import os
+import shutil
+import tempfile
+from catalog import Catalog, iter_ingest_targets
+from test_support import ProjectFiles
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.fleet = os.path.join(self.test_dir, "fleet")
+        self.projects = {name: ProjectFiles(os.path.join(self.fleet, name)) for name in ("A", "B")}
+        self.projects["A"].write("tables/Sales.tmdl", "table Sales\n"
+                    "\tcolumn DateKey\n\t\tdataType: int64\n"
+                    "\tcolumn 'Net Amount' = [Amount] - [Discount]\n\t\tdataType: decimal\n"
+                    "\tmeasure Total = SUM(Sales[Amount])\n\t\tformatString: #,0.00\n"
+                    "\tpartition Sales = m\n\t\tmode: import\n\t\tsource = Sql.Database(\"srv\", \"db\")\n")
+        self.projects["A"].write("relationships.tmdl", "relationship r1\n\tfromColumn: Sales.DateKey\n\ttoColumn: 'Dim Date'.DateKey\n"
+                    "relationship r2\n\tfromColumn: Sales.'Amount.USD'\n\ttoColumn: 'Dim Date'.DateKey\n")
+        self.projects["B"].write("tables/Dim Date.tmdl", "table 'Dim Date'\n\tcolumn DateKey\n\t\tdataType: int64\n"
+                    "\tmeasure Days = COUNTROWS('Dim Date')\n\t\tformatString: #,0.00\n")
+        self.db_path = os.path.join(self.test_dir, "catalog.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _ingest(self, catalog):
+        return sorted(catalog.ingest_project(path, source, key) for path, source, key in iter_ingest_targets([self.fleet]))
+
+    def test_ingest_and_query(self):
+        with Catalog(self.db_path) as catalog:
+            self.assertEqual(self._ingest(catalog), ['added', 'added'])
+
+            _, rows = catalog.query("SELECT m.name, t.name FROM columns c JOIN tables t ON t.id = c.table_id "
+                                    "JOIN models m ON m.id = c.model_id WHERE c.name = 'datekey' COLLATE NOCASE ORDER BY m.name")
+            self.assertEqual(rows, [('A', 'Sales'), ('B', 'Dim Date')])
+
+            _, rows = catalog.query("SELECT name, expression FROM columns WHERE expression IS NOT NULL")
+            self.assertEqual(rows, [('Net Amount', '[Amount] - [Discount]')])
+
+            _, rows = catalog.query("SELECT name FROM measures WHERE format_string = ? ORDER BY name", ('#,0.00',))
+            self.assertEqual(rows, [('Days',), ('Total',)])
+
+            _, rows = catalog.query("SELECT from_table, from_column, to_table, to_column FROM relationships ORDER BY name")
+            self.assertEqual(rows, [('Sales', 'DateKey', 'Dim Date', 'DateKey'), ('Sales', 'Amount.USD', 'Dim Date', 'DateKey')])
+
+            _, rows = catalog.query("SELECT partition_type, mode FROM partitions")
+            self.assertEqual(rows, [('m', 'import')])
+
+    def test_incremental_upsert(self):
+        with Catalog(self.db_path) as catalog:
+            self._ingest(catalog)
+        with Catalog(self.db_path) as catalog:
+            self.assertEqual(self._ingest(catalog), ['unchanged', 'unchanged'])
+
+            self.projects["B"].write("tables/Budget.tmdl", "table Budget\n\tcolumn Amount\n\t\tdataType: decimal\n")
+            self.assertEqual(self._ingest(catalog), ['unchanged', 'updated'])
+
+            _, rows = catalog.query("SELECT t.name FROM tables t JOIN models m ON m.id = t.model_id WHERE m.name = 'B' ORDER BY t.name")
+            self.assertEqual(rows, [('Budget',), ('Dim Date',)])
+            # The previous rows of B were replaced, not duplicated
+            _, rows = catalog.query("SELECT COUNT(*) FROM columns")
+            self.assertEqual(rows, [(4,)])
+
+if __name__ == '__main__':
+    unittest.main()
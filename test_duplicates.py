@@ -0,0 +1,103 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from duplicates import DuplicateIndex, normalize_dax, normalize_m
+from pbip_parser import find_pbip_projects
+from test_support import ProjectFiles
+
+class TestNormalization(unittest.TestCase):
+    def test_dax_whitespace_comments_quotes_and_variables(self):
+        a = "VAR Total = SUM ( 'Sales'[Amount] ) // total\nRETURN Total"
+        b = "var t = sum(Sales[amount]) /* same */ return t"
+        self.assertEqual(normalize_dax(a), normalize_dax(b))
+        self.assertNotEqual(normalize_dax(a), normalize_dax("SUM(Sales[Cost])"))
+
+    def test_m_step_names(self):
+        a = 'let\n    Source = Sql.Database("srv", "db"),\n    #"Filtered Rows" = Table.SelectRows(Source, each [Id] > 0)\nin\n    #"Filtered Rows"'
+        b = 'let S = Sql.Database("srv", "db"), F = Table.SelectRows(S, each [Id] > 0) // filter\nin F'
+        self.assertEqual(normalize_m(a), normalize_m(b))
+        # M string literals are case-sensitive
+        self.assertNotEqual(normalize_m(a), normalize_m(a.replace('"srv"', '"SRV"')))
+
+    def test_m_records_are_normalized_inside(self):
+        a = 'let S = Sql.Database("srv", "db"), T = S{[Schema="dbo",Item="T"]}[Data] in T'
+        b = 'let S = Sql.Database("srv", "db"), T = S{[ Schema = "dbo", /* table */ Item = "T" ]}[ Data ] in T'
+        self.assertEqual(normalize_m(a), normalize_m(b))
+        # Record field names are not step names
+        self.assertNotEqual(normalize_m(a), normalize_m(a.replace('Item=', 'Name=')))
+
+    def test_dax_variables_do_not_rename_tables(self):
+        a = "VAR Sales = SUM(Sales[Amount]) RETURN Sales"
+        b = "VAR x = SUM('Sales'[Amount]) RETURN x"
+        self.assertEqual(normalize_dax(a), normalize_dax(b))
+        self.assertIn("sales", normalize_dax(a))
+        self.assertNotEqual(normalize_dax(a), normalize_dax("VAR x = SUM(Other[Amount]) RETURN x"))
+
+class TestDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self._make_project("A", "\tmeasure 'Total Sales' = SUM('Sales'[Amount])\n"
+                                "\tmeasure Margin = ```\n"
+                                "\t\t\tVAR s = SUM(Sales[Amount])\n"
+                                "\t\t\tVAR c = SUM(Sales[Cost])\n"
+                                "\t\t\tRETURN DIVIDE(s - c, s) + 0 * COUNTROWS(Sales) + 0 * COUNTROWS(Returns)\n"
+                                "\t\t\t```\n")
+        self._make_project("B", "\tmeasure Revenue = sum ( Sales[Amount] )\n"
+                                "\tmeasure 'Margin %' = ```\n"
+                                "\t\t\tVAR x = SUM(Sales[Amount])\n"
+                                "\t\t\tVAR y = SUM(Sales[Cost])\n"
+                                "\t\t\tRETURN DIVIDE(x - y, x) + 0 * COUNTROWS(Sales) + 0 * COUNTROWS(Refunds)\n"
+                                "\t\t\t```\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _make_project(self, name, measures):
+        ProjectFiles(os.path.join(self.test_dir, "fleet", name)).write("tables/Sales.tmdl", "table Sales\n" + measures)
+
+    def test_exact_and_near_groups(self):
+        projects = find_pbip_projects(os.path.join(self.test_dir, "fleet"))
+        self.assertEqual([os.path.basename(p) for p in projects], ["A", "B"])
+
+        index = DuplicateIndex(near_duplicates=True, threshold=0.5)
+        for project in projects:
+            index.add_project(project)
+
+        exact = index.exact_groups()
+        self.assertEqual(len(exact), 1)
+        self.assertEqual(sorted(m['name'] for m in exact[0]['members']), ['Revenue', 'Total Sales'])
+
+        near = index.near_groups()
+        self.assertEqual(len(near), 1)
+        self.assertEqual(sorted(m['name'] for m in near[0]['members']), ['Margin', 'Margin %'])
+
+    def test_projects_found_with_configured_model_pattern(self):
+        with open("pbip_definition.json", encoding='utf-8') as f:
+            config = json.load(f)
+        config["model_folder_pattern"] = "*.Dataset"
+        config_path = os.path.join(self.test_dir, "dataset_config.json")
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        os.makedirs(os.path.join(self.test_dir, "fleet", "C", "C.Dataset"))
+
+        projects = find_pbip_projects(os.path.join(self.test_dir, "fleet"), config_path)
+        self.assertEqual([os.path.basename(p) for p in projects], ["C"])
+
+    def test_cli_reports_missing_paths(self):
+        import io
+        from contextlib import redirect_stderr, redirect_stdout
+        from duplicates import main
+
+        out, err = io.StringIO(), io.StringIO()
+        missing = os.path.join(self.test_dir, "missing")
+        with redirect_stdout(out), redirect_stderr(err):
+            self.assertEqual(main([os.path.join(self.test_dir, "fleet"), missing]), 1)
+        self.assertIn(f"Path not found: {missing}", err.getvalue())
+        # The fixture projects have no .pbip file; that warning must not corrupt the JSON
+        self.assertIn("No PBIP file found", err.getvalue())
+        self.assertEqual(len(json.loads(out.getvalue())['exact']), 1)
+
+if __name__ == '__main__':
+    unittest.main()
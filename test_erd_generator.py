@@ -0,0 +1,47 @@
+import unittest
+import os
+import io
+import shutil
+import tempfile
+from erd_generator import generate_mermaid_erd, write_mermaid_erd
+from pbip_parser import PbipParser
+
+class TestErdGenerator(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.pbip_folder = os.path.join(self.test_dir, "TestReport.pbip")
+        definition_folder = os.path.join(self.pbip_folder, "TestModel.SemanticModel", "definition")
+        tables_folder = os.path.join(definition_folder, "tables")
+        os.makedirs(tables_folder)
+
+        with open(os.path.join(tables_folder, "FactSales.tmdl"), 'w') as f:
+            f.write("table FactSales\n\tcolumn DateKey\n\t\tdataType: int64\n\tcolumn 'Sales Amount'\n\t\tdataType: decimal\n")
+        with open(os.path.join(tables_folder, "DimDate.tmdl"), 'w') as f:
+            f.write("table DimDate\n\tcolumn DateKey\n\t\tdataType: int64\n")
+        with open(os.path.join(tables_folder, "LocalDateTable_1.tmdl"), 'w') as f:
+            f.write("table LocalDateTable_1\n\tcolumn Date\n\t\tdataType: dateTime\n")
+        with open(os.path.join(definition_folder, "relationships.tmdl"), 'w') as f:
+            f.write("relationship r1\n\tfromColumn: FactSales.DateKey\n\ttoColumn: DimDate.DateKey\n\n"
+                    "relationship r2\n\tfromColumn: DimDate.DateKey\n\ttoColumn: LocalDateTable_1.Date\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_streaming_matches_in_memory(self):
+        model = PbipParser(self.pbip_folder).parse()
+        expected = generate_mermaid_erd(model)
+
+        pbip_parser = PbipParser(self.pbip_folder)
+        out = io.StringIO()
+        write_mermaid_erd(pbip_parser.iter_tables(), pbip_parser.parse_relationships(), out)
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_diagram_content(self):
+        diagram = generate_mermaid_erd(PbipParser(self.pbip_folder).parse())
+        self.assertTrue(diagram.startswith("erDiagram"))
+        self.assertIn("        decimal Sales_Amount", diagram)
+        self.assertIn('"FactSales" }o--|| "DimDate" : "DateKey to DateKey"', diagram)
+        self.assertNotIn("LocalDateTable", diagram)
+
+if __name__ == '__main__':
+    unittest.main()
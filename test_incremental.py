@@ -0,0 +1,115 @@
+import unittest
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+from incremental import IncrementalConverter
+from pbip_parser import PbipParser
+from test_support import ProjectFiles
+
+class TestIncrementalConverter(unittest.TestCase):
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        self.pbip_folder = os.path.join(self.repo_dir, "TestReport")
+        self.files = ProjectFiles(self.pbip_folder, "TestModel")
+        self.tables_folder = self.files.path("tables")
+
+        self.files.write("model.tmdl", "model Model\n\tculture: en-US\n")
+        self.files.write("relationships.tmdl", "relationship r1\n\tfromColumn: FactSales.DateKey\n\ttoColumn: DimDate.DateKey\n")
+        self.files.write("tables/FactSales.tmdl", "table FactSales\n\tcolumn DateKey\n\t\tdataType: int64\n")
+        self.files.write("tables/DimDate.tmdl", "table DimDate\n\tcolumn DateKey\n\t\tdataType: int64\n")
+        self.files.write("tables/DimOld.tmdl", "table DimOld\n\tcolumn Id\n\t\tdataType: int64\n")
+
+        self._git('init', '-q')
+        self._commit("base")
+        self.base_model = PbipParser(self.pbip_folder).parse()
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+
+    def _git(self, *args):
+        subprocess.run(['git', '-C', self.repo_dir, '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                       check=True, capture_output=True)
+
+    def _commit(self, message):
+        self._git('add', '-A')
+        self._git('commit', '-q', '-m', message)
+
+    def test_update_matches_full_parse(self):
+        self.files.write("model.tmdl", "model Model\n\tculture: de-DE\n")
+        self.files.write("tables/FactSales.tmdl", "table FactSales\n\tcolumn DateKey\n\t\tdataType: int64\n\tcolumn Amount\n\t\tdataType: decimal\n")
+        self.files.write("tables/DimCustomer.tmdl", "table DimCustomer\n\tcolumn Id\n\t\tdataType: int64\n")
+        os.remove(os.path.join(self.tables_folder, "DimOld.tmdl"))
+        self._commit("head")
+
+        # Edits in the working tree after the head commit must be ignored
+        self.files.write("tables/DimDate.tmdl", "table DimDate\n\tcolumn Uncommitted\n")
+
+        converter = IncrementalConverter(self.pbip_folder, self.repo_dir)
+        model, change_list = converter.update(json.loads(json.dumps(self.base_model)), "HEAD~1", "HEAD")
+
+        self._git('stash', '-q')
+        expected = PbipParser(self.pbip_folder).parse()
+        self.assertEqual(model['model'], expected['model'])
+        self.assertEqual(sorted(model['tables'], key=lambda t: t['name']), sorted(expected['tables'], key=lambda t: t['name']))
+
+        statuses = {(c['status'], c.get('name') or c['object']) for c in change_list}
+        # DimOld.tmdl -> DimCustomer.tmdl is similar enough for git to report a rename
+        self.assertEqual(statuses, {('modified', 'model'), ('modified', 'FactSales'), ('renamed', 'DimCustomer')})
+        renamed = [c for c in change_list if c['status'] == 'renamed'][0]
+        self.assertEqual(renamed['previousName'], 'DimOld')
+
+    def test_added_and_deleted_tables(self):
+        os.remove(os.path.join(self.tables_folder, "DimOld.tmdl"))
+        self._commit("delete")
+        self.files.write("tables/Budget.tmdl", "table Budget\n\tmeasure Total = SUM(Budget[Amount])\n\tpartition Budget = m\n\t\tmode: import\n")
+        self._commit("add")
+
+        converter = IncrementalConverter(self.pbip_folder, self.repo_dir)
+        model, change_list = converter.update(json.loads(json.dumps(self.base_model)), "HEAD~2", "HEAD")
+
+        self.assertEqual(sorted(t['name'] for t in model['tables']), ['Budget', 'DimDate', 'FactSales'])
+        self.assertEqual(sorted((c['status'], c['name']) for c in change_list), [('added', 'Budget'), ('deleted', 'DimOld')])
+
+    def test_renames_across_tables_folder(self):
+        # A table file moved out of the tables folder is a deleted table; one moved in is a new table
+        os.makedirs(self.files.path("archive"))
+        os.rename(self.files.path("tables/DimOld.tmdl"), self.files.path("archive/DimOld.tmdl"))
+        self._commit("archive")
+
+        converter = IncrementalConverter(self.pbip_folder, self.repo_dir)
+        model, change_list = converter.update(json.loads(json.dumps(self.base_model)), "HEAD~1", "HEAD")
+
+        self.assertEqual(sorted(t['name'] for t in model['tables']), ['DimDate', 'FactSales'])
+        self.assertEqual([(c['status'], c.get('name') or c['object']) for c in change_list],
+                         [('deleted', 'DimOld'), ('added', None)])
+
+        os.rename(self.files.path("archive/DimOld.tmdl"), self.files.path("tables/DimOld.tmdl"))
+        self._commit("restore")
+
+        model, change_list = converter.update(model, "HEAD~1", "HEAD")
+
+        self.assertEqual(sorted(t['name'] for t in model['tables']), ['DimDate', 'DimOld', 'FactSales'])
+        self.assertEqual([(c['status'], c.get('name') or c['object']) for c in change_list],
+                         [('deleted', None), ('added', 'DimOld')])
+
+    def test_project_in_subfolder_without_repo(self):
+        # The project folder is below the top level of the clone and git runs from it
+        self.files.write("tables/FactSales.tmdl", "table FactSales\n\tcolumn Amount\n\t\tdataType: decimal\n")
+        self._commit("head")
+
+        converter = IncrementalConverter(self.pbip_folder)
+        model, change_list = converter.update(json.loads(json.dumps(self.base_model)), "HEAD~1", "HEAD")
+
+        self.assertEqual([(c['status'], c['name']) for c in change_list], [('modified', 'FactSales')])
+        self.assertEqual(model['tables'], PbipParser(self.pbip_folder).parse()['tables'])
+
+    def test_no_changes(self):
+        converter = IncrementalConverter(self.pbip_folder, self.repo_dir)
+        model, change_list = converter.update(json.loads(json.dumps(self.base_model)), "HEAD", "HEAD")
+        self.assertEqual(change_list, [])
+        self.assertEqual(model, self.base_model)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import shutil
+import tempfile
+from m_dependencies import graph_from_model, graph_from_project, referenced_names
+from pbip_parser import PbipParser
+
+EXPRESSIONS = """expression Server = "srv" meta [IsParameterQuery=true, Type="Text", IsParameterQueryRequired=true]
+expression Database = "db" meta [IsParameterQuery=true, Type="Text", IsParameterQueryRequired=true]
+expression 'Staging Sales' =
+		let
+		    Source = Sql.Database(Server, Database),
+		    Sales = Source{[Schema="dbo",Item="Sales"]}[Data]
+		in
+		    Sales
+	lineageTag: 1
+expression Unused = "x"
+"""
+
+FACT_SALES = """table FactSales
+	partition FactSales = m
+		mode: import
+		source =
+				let
+				    Source = #"Staging Sales",
+				    // Database is only mentioned in a comment
+				    Filtered = Table.SelectRows(Source, each [Amount] > 0)
+				in
+				    Filtered
+"""
+
+DIM_DATE = """table 'Dim Date'
+	partition 'Dim Date' = m
+		mode: import
+		source =
+				let
+				    Server = "shadowed",
+				    Source = Sql.Database(Server, Database)
+				in
+				    Source
+	partition Calc = calculated
+		source = CALENDARAUTO()
+"""
+
+class TestMDependencies(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.project = os.path.join(self.test_dir, "Sales")
+        definition = os.path.join(self.project, "Sales.SemanticModel", "definition")
+        os.makedirs(os.path.join(definition, "tables"))
+        for relative_path, content in (("expressions.tmdl", EXPRESSIONS), ("tables/FactSales.tmdl", FACT_SALES),
+                                       ("tables/Dim Date.tmdl", DIM_DATE)):
+            with open(os.path.join(definition, *relative_path.split('/')), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_referenced_names(self):
+        known = {"Server", "Database", "Staging Sales"}
+        self.assertEqual(referenced_names('let S = #"Staging Sales" in S // Server', known), ["Staging Sales"])
+        self.assertEqual(referenced_names('let Server = "x" in Sql.Database(Server, Database)', known), ["Database"])
+        self.assertEqual(referenced_names('"Server"', known), [])
+
+    def test_names_inside_records(self):
+        known = {"Server", "SchemaParam", "StartDate", "Schema", "Data"}
+        source = 'let Source = Sql.Database(Server, "db") in Source{[Schema=SchemaParam,Item="Sales"]}[Data]'
+        # Field names (Schema=, [Data]) are not references, field values are
+        self.assertEqual(referenced_names(source, known), ["Server", "SchemaParam"])
+        native = 'Value.NativeQuery(Source, "SELECT 1", null, [Query="SELECT * WHERE d > " & StartDate, EnableFolding=true])'
+        self.assertEqual(referenced_names(native, known), ["StartDate"])
+        self.assertEqual(referenced_names('[Query="..." & StartDate]', known), ["StartDate"])
+
+    def test_graph_and_refresh_plan(self):
+        graph = graph_from_project(self.project)
+        self.assertEqual(graph.kinds[('expression', 'Server')], 'parameter')
+        self.assertEqual(graph.kinds[('expression', 'Staging Sales')], 'expression')
+        self.assertNotIn(('partition', 'Dim Date', 'Calc'), graph.kinds)
+
+        order = graph.topological_order()
+        self.assertLess(order.index(('expression', 'Server')), order.index(('expression', 'Staging Sales')))
+        self.assertLess(order.index(('expression', 'Staging Sales')), order.index(('partition', 'FactSales', 'FactSales')))
+        self.assertEqual(graph.cycle_nodes(), [])
+
+        plan = graph.refresh_plan(["Server"])
+        self.assertEqual(plan['expressions'], ["Staging Sales"])
+        self.assertEqual(plan['partitions'], [{'table': 'FactSales', 'partition': 'FactSales'}])
+
+        plan = graph.refresh_plan(["Database", "Nope"])
+        self.assertEqual(sorted(p['table'] for p in plan['partitions']), ['Dim Date', 'FactSales'])
+        self.assertEqual(plan['unknown'], ["Nope"])
+        self.assertEqual(graph.refresh_plan(["Unused"])['partitions'], [])
+
+    def test_streaming_matches_parsed_model(self):
+        from_model = graph_from_model(PbipParser(self.project).parse())
+        from_project = graph_from_project(self.project)
+        self.assertEqual(sorted(map(str, from_model.to_dict()['edges'])), sorted(map(str, from_project.to_dict()['edges'])))
+
+    def test_cycles_are_reported(self):
+        graph = graph_from_model({'expressions': {'expression A': 'B + 1', 'expression B': 'A + 1', 'expression C': '1'}})
+        self.assertEqual(graph.topological_order(), [('expression', 'C')])
+        self.assertEqual(sorted(graph.cycle_nodes()), [('expression', 'A'), ('expression', 'B')])
+        self.assertEqual(graph.downstream(('expression', 'A')), {('expression', 'B')})
+
+if __name__ == '__main__':
+    unittest.main()
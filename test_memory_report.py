@@ -0,0 +1,112 @@
+import unittest
+import os
+import io
+import json
+import random
+import shutil
+import tempfile
+from unittest import mock
+from memory_report import MemoryBudget, MemoryReport, dump_model, is_spilled, load_spilled_table
+from pbip_parser import PbipParser
+from tmdl_corpus import generate_table_tmdl
+
+class TestMemoryReport(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.pbip_folder = os.path.join(self.test_dir, "TestReport.pbip")
+        definition_folder = os.path.join(self.pbip_folder, "TestModel.SemanticModel", "definition")
+        tables_folder = os.path.join(definition_folder, "tables")
+        os.makedirs(tables_folder)
+        with open(os.path.join(definition_folder, "model.tmdl"), 'w') as f:
+            f.write("model Model\n\tculture: en-US\n")
+
+        rng = random.Random(3)
+        for i in range(4):
+            with open(os.path.join(tables_folder, f"Table{i}.tmdl"), 'w', encoding='utf-8') as f:
+                f.write(generate_table_tmdl(rng, columns=30, measures=10, partitions=3))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_report_attributes_files_and_handlers(self):
+        report = MemoryReport()
+        report.start()
+        try:
+            PbipParser(self.pbip_folder, memory_report=report).parse()
+        finally:
+            report.stop()
+
+        summary = report.summary()
+        self.assertEqual(len(summary['files']), 5)
+        self.assertTrue(all(entry['peakBytes'] >= 0 for entry in summary['files']))
+        self.assertIn('_normalize_block', summary['handlers'])
+        self.assertIn('Peak allocation by file', report.format())
+
+    def test_budget_degrades_instead_of_failing(self):
+        expected = PbipParser(self.pbip_folder).parse()
+
+        budget = MemoryBudget(max_bytes=1, spill_dir=os.path.join(self.test_dir, "spill"))
+        result = PbipParser(self.pbip_folder, memory_budget=budget).parse()
+
+        self.assertEqual(budget.level, 2)
+        self.assertTrue(all(is_spilled(table) for table in result['tables']))
+
+        out = io.StringIO()
+        dump_model(result, out)
+        restored = json.loads(out.getvalue())
+        self.assertEqual([t['name'] for t in restored['tables']], [t['name'] for t in expected['tables']])
+        for table in restored['tables']:
+            for partition in table.get('partitions', []):
+                for detail in partition.get('sourceDetails', []):
+                    self.assertNotIn('content', detail)
+
+    def test_memory_error_drops_payloads_and_spills(self):
+        from contextlib import redirect_stderr
+        from tmdl_parser import TmdlParser
+
+        original_parse = TmdlParser.parse
+        def parse(parser):
+            # The first attempt at Table2 runs out of memory; the retry succeeds
+            if parser.file_path.endswith("Table2.tmdl") and parser.decode_payloads:
+                raise MemoryError()
+            return original_parse(parser)
+
+        budget = MemoryBudget(max_bytes=1 << 50, spill_dir=os.path.join(self.test_dir, "spill"))
+        with mock.patch.object(TmdlParser, 'parse', parse), redirect_stderr(io.StringIO()) as err:
+            result = PbipParser(self.pbip_folder, memory_budget=budget).parse()
+
+        self.assertEqual(budget.level, 2)
+        self.assertIn("degraded mode 1", err.getvalue())
+        self.assertIn("degraded mode 2", err.getvalue())
+        self.assertTrue(all(is_spilled(table) for table in result['tables']))
+        # Tables parsed before the error had their decoded payloads dropped before spilling
+        details = [detail for table in result['tables'][:2]
+                   for partition in load_spilled_table(table).get('partitions', [])
+                   for detail in partition.get('sourceDetails', []) if 'contentType' in detail]
+        self.assertTrue(details)
+        self.assertTrue(all(detail['contentType'] == 'dropped' and 'content' not in detail for detail in details))
+
+    def test_budget_reads_rss_and_removes_its_spill_dir(self):
+        budget = MemoryBudget(max_bytes=1)
+        self.assertGreater(budget.used_bytes(), 0)
+        result = PbipParser(self.pbip_folder, memory_budget=budget).parse()
+        spill_dir = budget.spill_dir
+        self.assertTrue(os.path.isdir(spill_dir))
+        dump_model(result, io.StringIO())
+        budget.close()
+        self.assertFalse(os.path.exists(spill_dir))
+
+    def test_cli_rejects_budget_with_shards(self):
+        from contextlib import redirect_stderr
+        from pbip_parser import main
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main([self.pbip_folder, "--shard-dir", os.path.join(self.test_dir, "shards"), "--max-memory", "64"])
+
+    def test_dump_model_matches_json_dumps(self):
+        model = PbipParser(self.pbip_folder).parse()
+        out = io.StringIO()
+        dump_model(model, out)
+        self.assertEqual(out.getvalue(), json.dumps(model, indent=4))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+import parser_oracle
+from parser_oracle import ENGINES, compare, diff_structures, iter_cases, run_harness
+
+class TestParserOracle(unittest.TestCase):
+    def test_engines_match_reference(self):
+        self.assertEqual(run_harness(seed=0, cases=300), [])
+
+    def test_parallel_engine(self):
+        self.assertEqual(run_harness(seed=1, cases=5, engines=('parallel',)), [])
+
+    def test_cases_are_reproducible(self):
+        self.assertEqual(list(iter_cases(7, 20)), list(iter_cases(7, 20)))
+
+    def test_diff_structures(self):
+        expected = {'name': 'T', 'columns': [{'name': 'a'}, {'name': 'b'}]}
+        actual = {'name': 'T', 'columns': [{'name': 'a', 'x': '1'}], 'extra': 1}
+        self.assertEqual(diff_structures(expected, actual), [
+            ('$.columns[0].x', '<missing>', '1'),
+            ('$.columns.length', 2, 1),
+            ('$.extra', '<missing>', 1),
+        ])
+
+    def test_detects_and_shrinks_divergence(self):
+        def drops_column_annotations(lines):
+            root = ENGINES['serial'](lines)
+            for column in root.get('columns', []):
+                column.pop('annotations', None)
+            return root
+
+        with mock.patch.dict(ENGINES, {'broken': drops_column_annotations}):
+            text = "table T\n\tcolumn a\n\t\tdataType: int64\n\n\t\tannotation K = V\n\tmeasure m = 1\n"
+            self.assertEqual(compare(text, 'broken'), [('$.columns[0].annotations', [{'name': 'K', 'value': 'V'}], '<missing>')])
+            minimal = parser_oracle.shrink(text, 'broken')
+            self.assertEqual(minimal.split("\n"), ["\tcolumn a", "\t\tannotation K = V"])
+
+            failures = run_harness(seed=0, cases=50, engines=('broken',), shrink_failures=False)
+            self.assertTrue(failures)
+            self.assertTrue(all(failure['engine'] == 'broken' for failure in failures))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ import os
 import shutil
 import tempfile
 import json
-from pbip_parser import PbipParser
+from pbip_parser import PbipParser, shared_expressions
+from tmdl_parser import parse_tmdl_text
 
 class TestPbipParser(unittest.TestCase):
     def setUp(self):
@@ -59,5 +60,21 @@ class TestPbipParser(unittest.TestCase):
         self.assertEqual(len(result['tables']), 1)
         self.assertEqual(result['tables'][0]['name'], 'DimDate')
 
+    def test_shared_expressions(self):
+        content = "expression Server = \"srv\" meta [IsParameterQuery=true]\n" \
+                  "\tlineageTag: 1\n" \
+                  "\n" \
+                  "expression 'Staging Query' =\n" \
+                  "\t\tlet\n" \
+                  "\t\t    Source = Server\n" \
+                  "\t\tin\n" \
+                  "\t\t    Source\n" \
+                  "\tlineageTag: 2\n" \
+                  "\n" \
+                  "\tannotation PBI_ResultType = Table\n"
+        expressions = dict(shared_expressions(parse_tmdl_text(content)))
+        self.assertEqual(expressions['Server'], '"srv" meta [IsParameterQuery=true]')
+        self.assertEqual(expressions['Staging Query'], "let\n    Source = Server\nin\n    Source")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from pbip_parser import PbipParser
+from pbip_shards import write_sharded_model, load_manifest, load_table, load_sharded_model
+
+class TestPbipShards(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.pbip_folder = os.path.join(self.test_dir, "TestReport.pbip")
+        definition_folder = os.path.join(self.pbip_folder, "TestModel.SemanticModel", "definition")
+        tables_folder = os.path.join(definition_folder, "tables")
+        os.makedirs(tables_folder)
+
+        with open(os.path.join(definition_folder, "database.tmdl"), 'w') as f:
+            f.write("database TestDB\n\tcompatibilityLevel: 1567\n")
+        with open(os.path.join(definition_folder, "model.tmdl"), 'w') as f:
+            f.write("model Model\n\tculture: en-US\n")
+        with open(os.path.join(definition_folder, "relationships.tmdl"), 'w') as f:
+            f.write("relationship r1\n\tfromColumn: FactSales.DateKey\n\ttoColumn: 'Dim Date'.DateKey\n")
+        with open(os.path.join(tables_folder, "FactSales.tmdl"), 'w') as f:
+            f.write("table FactSales\n\tcolumn DateKey\n\t\tdataType: int64\n")
+        with open(os.path.join(tables_folder, "Dim Date.tmdl"), 'w') as f:
+            f.write("table 'Dim Date'\n\tcolumn DateKey\n\t\tdataType: int64\n")
+
+        self.shard_dir = os.path.join(self.test_dir, "shards")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_sharded_model_matches_monolithic(self):
+        write_sharded_model(PbipParser(self.pbip_folder), self.shard_dir, workers=2)
+        expected = PbipParser(self.pbip_folder).parse()
+        self.assertEqual(json.dumps(load_sharded_model(self.shard_dir)), json.dumps(expected))
+
+    def test_manifest_entries(self):
+        manifest = write_sharded_model(PbipParser(self.pbip_folder), self.shard_dir, workers=2)
+        self.assertEqual(manifest, load_manifest(self.shard_dir))
+        self.assertEqual(set(manifest['shards']), {'database', 'model', 'relationships'})
+        self.assertEqual(sorted(entry['name'] for entry in manifest['tables']), ["'Dim Date'", 'FactSales'])
+
+        for entry in list(manifest['shards'].values()) + manifest['tables']:
+            with open(os.path.join(self.shard_dir, entry['path']), 'rb') as f:
+                payload = f.read()
+            self.assertEqual(entry['size'], len(payload))
+            self.assertEqual(entry['sha256'], hashlib.sha256(payload).hexdigest())
+
+    def test_load_single_table(self):
+        write_sharded_model(PbipParser(self.pbip_folder), self.shard_dir, workers=2)
+        table = load_table(self.shard_dir, "'Dim Date'")
+        self.assertEqual(table['columns'][0]['name'], 'DateKey')
+        # Names are looked up unquoted and ignoring case, like table names in the model
+        self.assertEqual(load_table(self.shard_dir, "Dim Date"), table)
+        self.assertEqual(load_table(self.shard_dir, "DIM DATE"), table)
+        self.assertIsNone(load_table(self.shard_dir, 'Missing'))
+
+    def test_rewrite_drops_deleted_tables(self):
+        write_sharded_model(PbipParser(self.pbip_folder), self.shard_dir, workers=2)
+        os.remove(os.path.join(self.pbip_folder, "TestModel.SemanticModel", "definition", "tables", "Dim Date.tmdl"))
+        write_sharded_model(PbipParser(self.pbip_folder), self.shard_dir, workers=2)
+        self.assertIsNone(load_table(self.shard_dir, "Dim Date"))
+        self.assertEqual(os.listdir(os.path.join(self.shard_dir, "tables")), ["factsales.json"])
+
+    def test_tables_differing_in_case_collide(self):
+        with open(os.path.join(self.pbip_folder, "TestModel.SemanticModel", "definition", "tables", "factsales2.tmdl"), 'w') as f:
+            f.write("table factsales\n\tcolumn Id\n")
+        with self.assertRaisesRegex(ValueError, "same name as another table"):
+            write_sharded_model(PbipParser(self.pbip_folder), self.shard_dir, workers=2)
+
+if __name__ == '__main__':
+    unittest.main()
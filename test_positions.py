@@ -0,0 +1,87 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+from positions import PositionIndex, positions_path
+from tmdl_parser import TmdlParser, convert_tmdl_to_json
+
+SALES_TMDL = """table Sales
+\tlineageTag: t
+
+\tcolumn Amount
+\t\tdataType: decimal
+
+\t\tannotation K = V
+
+\tmeasure 'Total Sales' = ```
+\t\t\tSUM ( Sales[Amount] )
+\t\t\t```
+\t\tformatString: 0
+
+\tmeasure Implicit =
+\t\t\tVAR a = 1
+\t\t\tRETURN a
+\t\tformatString: 0
+\tpartition Sales = m
+\t\tsource =
+\t\t\tlet
+\t\t\t    x = 1
+\t\t\tin
+\t\t\t    x
+
+\tannotation PBI = 1
+"""
+
+class TestPositions(unittest.TestCase):
+    def _parse(self, text):
+        parser = TmdlParser("Sales.tmdl", record_positions=True)
+        data = parser.parse_lines(io.StringIO(text).readlines())
+        return parser.positions, data
+
+    def test_spans(self):
+        positions, data = self._parse(SALES_TMDL)
+        self.assertEqual(positions.span('table', 'Sales'), (1, 25))
+        self.assertEqual(positions.span('column', 'Sales', 'Amount'), (4, 7))
+        self.assertEqual(positions.span('annotation', 'Sales', 'Amount', 'K'), (7, 7))
+        self.assertEqual(positions.span('measure', 'Sales', 'Total Sales'), (9, 12))
+        self.assertEqual(positions.span('property', 'Sales', 'Total Sales', 'expression'), (9, 11))
+        self.assertEqual(positions.span('property', 'Sales', 'Implicit', 'expression'), (14, 16))
+        self.assertEqual(positions.span('partition', 'Sales', 'Sales'), (18, 23))
+        self.assertEqual(positions.span('property', 'Sales', 'Sales', 'source'), (19, 23))
+        self.assertIsNone(positions.span('column', 'Sales', 'Missing'))
+        self.assertEqual(positions.entry(positions.find('column', 'Sales', 'Amount'))['column'], 2)
+        self.assertEqual(data, TmdlParser(None).parse_lines(io.StringIO(SALES_TMDL).readlines()))
+
+    def test_relationships_and_disabled_by_default(self):
+        positions, _ = self._parse("relationship r1\n\tfromColumn: A.B\n\ttoColumn: C.D\n\nrelationship r2\n\ttoColumn: C.D\n")
+        self.assertEqual(positions.span('relationship', 'r1'), (1, 3))
+        self.assertEqual(positions.span('relationship', 'r2'), (5, 6))
+
+        parser = TmdlParser(None)
+        parser.parse_lines(["table T\n"])
+        self.assertIsNone(parser.positions)
+
+    def test_persisted_alongside_json(self):
+        test_dir = tempfile.mkdtemp()
+        try:
+            tmdl_path = os.path.join(test_dir, "Sales.tmdl")
+            with open(tmdl_path, 'w', encoding='utf-8') as f:
+                f.write(SALES_TMDL)
+            output_path = os.path.join(test_dir, "Sales.json")
+            convert_tmdl_to_json(tmdl_path, output_path, positions=True)
+
+            self.assertEqual(positions_path(output_path), os.path.join(test_dir, "Sales.positions.json"))
+            with open(positions_path(output_path), 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            self.assertEqual(raw['file'], tmdl_path)
+            self.assertEqual(len(raw['start']), 10)
+
+            loaded = PositionIndex.load(positions_path(output_path))
+            self.assertEqual(loaded.span('measure', 'Sales', 'Implicit'), (14, 17))
+        finally:
+            shutil.rmtree(test_dir)
+
+if __name__ == '__main__':
+    unittest.main()
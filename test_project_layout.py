@@ -0,0 +1,71 @@
+import unittest
+import os
+import shutil
+import tempfile
+import project_layout
+from bench_discovery import count_calls, legacy_discovery
+from pbip_parser import PbipParser
+from project_layout import get_layout
+from vfs import MemorySource
+
+class TestProjectLayout(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.project = os.path.join(self.test_dir, "Sales")
+        self.definition = os.path.join(self.project, "Sales.SemanticModel", "definition")
+        self.tables = os.path.join(self.definition, "tables")
+        os.makedirs(self.tables)
+        os.makedirs(os.path.join(self.project, "Sales.Report"))
+        for path in (os.path.join(self.project, "Sales.pbip"), os.path.join(self.definition, "model.tmdl"),
+                     os.path.join(self.definition, "relationships.tmdl"), os.path.join(self.tables, "DimDate.tmdl"),
+                     os.path.join(self.tables, ".hidden.tmdl"), os.path.join(self.tables, "notes.txt")):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("table DimDate\n" if path.endswith("DimDate.tmdl") else "")
+        self._backdate()
+        project_layout.clear_layout_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _backdate(self):
+        # Folder mtimes set just now are racy and would always be rescanned
+        for path in (self.project, self.definition, self.tables):
+            os.utime(path, ns=(0, 0))
+
+    def test_layout_matches_glob_discovery(self):
+        layout = get_layout(self.project)
+        self.assertEqual(layout.pbip_files, [os.path.join(self.project, "Sales.pbip")])
+        self.assertEqual(layout.definition_path, self.definition)
+        self.assertEqual(list(layout.definition_files), ["model_tmdl", "relationships_tmdl"])
+        self.assertEqual(layout.table_files, [os.path.join(self.tables, "DimDate.tmdl")])
+        self.assertEqual(sorted(PbipParser(self.project).definition_files()),
+                         sorted(legacy_discovery(self.project, "pbip_definition.json")))
+
+    def test_cached_layout_is_revalidated_with_stat_only(self):
+        first = get_layout(self.project)
+        with count_calls() as counts:
+            self.assertIs(get_layout(self.project), first)
+        self.assertEqual((counts['scandir'], counts['stat']), (0, 3))
+
+        with open(os.path.join(self.tables, "Budget.tmdl"), 'w', encoding='utf-8') as f:
+            f.write("table Budget\n")
+        os.utime(self.tables, ns=(10**9, 10**9))
+        second = get_layout(self.project)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second.table_files), 2)
+
+    def test_racy_layout_is_rescanned(self):
+        os.utime(self.tables)
+        first = get_layout(self.project)
+        self.assertIsNot(get_layout(self.project), first)
+
+    def test_memory_source(self):
+        source = MemorySource({"M.SemanticModel/definition/model.tmdl": "model Model\n",
+                               "M.SemanticModel/definition/tables/T.tmdl": "table T\n"})
+        layout = get_layout("", source=source)
+        self.assertEqual(layout.definition_files, {"model_tmdl": "M.SemanticModel/definition/model.tmdl"})
+        self.assertEqual(layout.table_files, ["M.SemanticModel/definition/tables/T.tmdl"])
+        self.assertIs(get_layout("", source=source), layout)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from erd_generator import generate_png_from_mermaid, write_erd_output
+from render_cache import RenderCache
+
+class _FakeMermaidInk(BaseHTTPRequestHandler):
+    request_count = 0
+
+    def do_GET(self):
+        type(self).request_count += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.end_headers()
+        self.wfile.write(b'\x89PNG fake ' + self.path.encode('ascii'))
+
+    def log_message(self, format, *args):
+        pass
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = RenderCache(os.path.join(self.test_dir, "cache"))
+
+        _FakeMermaidInk.request_count = 0
+        self.server = HTTPServer(('127.0.0.1', 0), _FakeMermaidInk)
+        self.api_url = f"http://127.0.0.1:{self.server.server_address[1]}/img/"
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+
+    def test_png_cache_hit_skips_fetch(self):
+        diagram = 'erDiagram\n    "A" {\n        int x\n    }'
+        first = os.path.join(self.test_dir, "first.png")
+        second = os.path.join(self.test_dir, "second.png")
+
+        generate_png_from_mermaid(diagram, first, self.cache, self.api_url)
+        generate_png_from_mermaid(diagram, second, self.cache, self.api_url)
+
+        self.assertEqual(_FakeMermaidInk.request_count, 1)
+        with open(first, 'rb') as f1, open(second, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_changed_diagram_is_fetched(self):
+        generate_png_from_mermaid('erDiagram', os.path.join(self.test_dir, "a.png"), self.cache, self.api_url)
+        generate_png_from_mermaid('erDiagram\n    "B" {\n    }', os.path.join(self.test_dir, "b.png"), self.cache, self.api_url)
+        self.assertEqual(_FakeMermaidInk.request_count, 2)
+
+    def test_text_output_cached_per_format(self):
+        diagram = 'erDiagram'
+        md_path = os.path.join(self.test_dir, "out.md")
+        self.assertFalse(write_erd_output(diagram, md_path, self.cache))
+        self.assertTrue(write_erd_output(diagram, md_path, self.cache))
+        self.assertFalse(write_erd_output(diagram, os.path.join(self.test_dir, "out.mmd"), self.cache))
+        with open(md_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "```mermaid\nerDiagram\n```")
+
+    def test_lru_eviction(self):
+        cache = RenderCache(os.path.join(self.test_dir, "small"), max_bytes=250)
+        cache.put('a', '.png', b'x' * 100)
+        cache.put('b', '.png', b'x' * 100)
+        # Make 'a' the most recently used entry, then overflow the cap
+        os.utime(cache._entry_path('b', '.png'), (0, 0))
+        self.assertIsNotNone(cache.get('a', '.png'))
+        cache.put('c', '.png', b'x' * 100)
+
+        self.assertIsNotNone(cache.get('a', '.png'))
+        self.assertIsNone(cache.get('b', '.png'))
+        self.assertIsNotNone(cache.get('c', '.png'))
+
+    def test_oversized_entries_are_not_cached(self):
+        cache = RenderCache(os.path.join(self.test_dir, "small"), max_bytes=250)
+        cache.put('a', '.png', b'x' * 100)
+        self.assertIsNone(cache.put('big', '.png', b'x' * 251))
+        self.assertIsNone(cache.get('big', '.png'))
+        # The entries already cached survive
+        self.assertIsNotNone(cache.get('a', '.png'))
+
+        big_path = os.path.join(self.test_dir, "big.mmd")
+        with open(big_path, 'wb') as f:
+            f.write(b'x' * 251)
+        self.assertIsNone(cache.put_file('big', '.mmd', big_path))
+        self.assertEqual(os.listdir(cache.cache_dir), ['a.png'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from service import ModelCache, ModelServer
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.tables_folder = os.path.join(self.test_dir, "Sales", "Sales.SemanticModel", "definition", "tables")
+        os.makedirs(self.tables_folder)
+        self._write_table("DimDate", "table DimDate\n\tcolumn DateKey\n\t\tdataType: int64\n")
+
+        self.cache = ModelCache()
+        self.server = ModelServer(('127.0.0.1', 0), self.test_dir, self.cache)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+
+    def _write_table(self, name, content):
+        with open(os.path.join(self.tables_folder, name + ".tmdl"), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _get(self, route, etag=None):
+        request = urllib.request.Request(self.base_url + route)
+        if etag:
+            request.add_header('If-None-Match', etag)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers.get('ETag'), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('ETag'), e.read()
+
+    def test_model_table_and_erd(self):
+        status, etag, body = self._get("/model?path=Sales")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['tables'][0]['name'], 'DimDate')
+
+        status, _, body = self._get("/table?path=Sales&name=dimdate")
+        self.assertEqual((status, json.loads(body)['columns'][0]['name']), (200, 'DateKey'))
+        status, _, body = self._get("/erd?path=Sales")
+        self.assertTrue(body.startswith(b"erDiagram"))
+        self.assertEqual(self.cache.parse_count, 1)
+
+        self.assertEqual(self._get("/table?path=Sales&name=Missing")[0], 404)
+        self.assertEqual(self._get("/model?path=../..")[0], 400)
+
+    def test_etag_and_invalidation(self):
+        _, etag, _ = self._get("/model?path=Sales")
+        status, same_etag, body = self._get("/model?path=Sales", etag)
+        self.assertEqual((status, same_etag, body), (304, etag, b''))
+
+        self._write_table("Budget", "table Budget\n\tcolumn Amount\n\t\tdataType: decimal\n")
+        status, new_etag, body = self._get("/model?path=Sales", etag)
+        self.assertEqual(status, 200)
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(len(json.loads(body)['tables']), 2)
+        self.assertEqual(self.cache.parse_count, 2)
+
+    def test_concurrent_requests_are_coalesced(self):
+        release = threading.Event()
+        original_load = self.cache._load
+
+        def slow_load(*args):
+            release.wait(5)
+            return original_load(*args)
+
+        self.cache._load = slow_load
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self._get("/model?path=Sales")[0])) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        # Give every request time to reach the cache before the parse completes
+        threading.Event().wait(0.3)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [200] * 4)
+        self.assertEqual(self.cache.parse_count, 1)
+
+    def test_handler_errors_return_500(self):
+        import io
+        from contextlib import redirect_stderr
+
+        def failing_load(*args):
+            raise RuntimeError("parse failed")
+
+        original_load = self.cache._load
+        self.cache._load = failing_load
+        with redirect_stderr(io.StringIO()) as err:
+            status, _, body = self._get("/model?path=Sales")
+        self.assertEqual((status, json.loads(body)), (500, {'error': "RuntimeError: parse failed"}))
+        self.assertIn("RuntimeError: parse failed", err.getvalue())
+
+        # The server keeps serving, and the failed parse was not cached
+        self.cache._load = original_load
+        self.assertEqual(self._get("/model?path=Sales")[0], 200)
+
+    def test_lru_eviction(self):
+        cache = ModelCache(max_bytes=1)
+        other = os.path.join(self.test_dir, "Other")
+        shutil.copytree(os.path.join(self.test_dir, "Sales"), other)
+        cache.get(os.path.join(self.test_dir, "Sales"))
+        cache.get(other)
+        self.assertEqual(list(cache.entries), [other])
+
+if __name__ == '__main__':
+    unittest.main()
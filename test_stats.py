@@ -0,0 +1,56 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+from stats import collect_all, collect_stats, write_csv
+from test_support import ProjectFiles
+
+PAYLOAD = "i45WcqnMS8zNTFZwyy9KTU4sLlGK1YlWcivKr0rNQxULKUrNS1FIqlQIqSxIVYBqwyID0asUGwsA"
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.fleet = os.path.join(self.test_dir, "fleet")
+        self.projects = {name: ProjectFiles(os.path.join(self.fleet, name)) for name in ("A", "B")}
+        self.projects["A"].write("tables/Sales.tmdl", "table Sales\n"
+                    "\tcolumn Amount\n\t\tdataType: decimal\n"
+                    "\tcolumn Net = [Amount] * 2\n\t\tdataType: decimal\n"
+                    "\tmeasure Total = SUM(Sales[Amount])\n"
+                    "\tpartition Sales = m\n\t\tmode: directQuery\n\t\tsource = Sql.Database(\"srv\", \"db\")\n")
+        self.projects["A"].write("tables/Pages.tmdl", "table Pages\n"
+                    "\tpartition Pages = m\n\t\tsource =\n"
+                    f"\t\t\t\tBinary.FromText(\"{PAYLOAD}\", BinaryEncoding.Base64)\n")
+        self.projects["A"].write("relationships.tmdl", "relationship r1\n\tfromColumn: Sales.Amount\n\ttoColumn: Pages.Id\n"
+                    "relationship r2\n\tfromColumn: Sales.Net\n\ttoColumn: Pages.Id\n\ttoCardinality: many\n")
+        self.projects["A"].write("expressions.tmdl", "expression Server = \"srv\" meta [IsParameterQuery=true]\n")
+        self.projects["B"].write("tables/Dim.tmdl", "table Dim\n\tcolumn Id\n\t\tdataType: int64\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_model_stats(self):
+        stats = collect_stats(os.path.join(self.fleet, "A"))
+        self.assertEqual((stats['tables'], stats['columns'], stats['calculatedColumns'], stats['measures'],
+                          stats['partitions'], stats['relationships']), (2, 2, 1, 1, 2, 2))
+        self.assertEqual(stats['payloadEncodedBytes'], len(PAYLOAD))
+        self.assertEqual(stats['partitionModes'], {'directQuery': 1, 'import': 1})
+        self.assertEqual(stats['relationshipCardinalities'], {'many:one': 1, 'many:many': 1})
+        # Calculated column, measure, two partition sources and the shared expression
+        self.assertEqual(stats['expressions'], 5)
+        self.assertEqual(stats['maxExpressionLength'], len(f"Binary.FromText(\"{PAYLOAD}\", BinaryEncoding.Base64)"))
+
+    def test_parallel_matches_serial_and_csv(self):
+        serial = collect_all([self.fleet], workers=1)
+        self.assertEqual(collect_all([self.fleet], workers=2), serial)
+        self.assertEqual([os.path.basename(s['project']) for s in serial], ["A", "B"])
+
+        out = io.StringIO()
+        write_csv(serial, out)
+        header, row_a, row_b = out.getvalue().splitlines()
+        self.assertTrue(header.endswith("partitionModes.directQuery,partitionModes.import,"
+                                        "relationshipCardinalities.many:many,relationshipCardinalities.many:one"))
+        self.assertTrue(row_b.endswith(",0,0,0,0"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import os
+
+# Shared fixture helper for tests that build PBIP projects on disk
+
+class ProjectFiles:
+    """Writes and reads files in a project's semantic model definition folder.
+
+    Paths are relative to the definition folder and use '/'. Content is written
+    verbatim, so '\r\n' line endings survive.
+    """
+
+    def __init__(self, project_folder, model_name=None):
+        self.project_folder = project_folder
+        model_name = model_name or os.path.basename(project_folder)
+        self.definition = os.path.join(project_folder, f"{model_name}.SemanticModel", "definition")
+
+    def path(self, relative_path):
+        return os.path.join(self.definition, *relative_path.split('/'))
+
+    def write(self, relative_path, content):
+        path = self.path(relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+
+    def read(self, relative_path):
+        with open(self.path(relative_path), 'r', encoding='utf-8', newline='') as f:
+            return f.read()
@@ -0,0 +1,43 @@
+import unittest
+import os
+import io
+import json
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+import tmdl2json
+
+class TestTmdl2JsonCli(unittest.TestCase):
+    def test_help_lists_commands(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(tmdl2json.main(['--help']), 0)
+        for command in tmdl2json.COMMANDS:
+            self.assertIn(command, out.getvalue())
+
+    def test_unknown_command(self):
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(tmdl2json.main(['nope']), 2)
+
+    def test_convert_dispatch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmdl_path = os.path.join(tmp_dir, 'T.tmdl')
+            out_path = os.path.join(tmp_dir, 'T.json')
+            with open(tmdl_path, 'w', encoding='utf-8') as f:
+                f.write("table T\n\tcolumn C\n\t\tdataType: string\n")
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(tmdl2json.main(['convert', tmdl_path, '-o', out_path]), 0)
+            with open(out_path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['columns'][0]['name'], 'C')
+
+    def test_help_does_not_import_heavy_modules(self):
+        cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmdl2json.py')
+        probe = (f"import sys, runpy; sys.argv = [{cli!r}, '--help']\n"
+                 f"try:\n    runpy.run_path({cli!r}, run_name='__main__')\nexcept SystemExit:\n    pass\n"
+                 "print(sorted(m for m in ('argparse', 'json', 'urllib.request', 'zlib', 'tmdl_parser') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[]')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
 import unittest
 import os
 import json
+import random
 import tempfile
-from tmdl_parser import TmdlParser
+from tmdl_parser import TmdlParser, find_split_points, parse_file_parallel, parse_lines_parallel, iter_objects_from_lines
+from tmdl_corpus import generate_corpus, generate_table_tmdl
 
 class TestTmdlParser(unittest.TestCase):
     def setUp(self):
@@ -240,5 +242,106 @@ relationship 6a714e8c-01ad-40bf-b082-bc734e0434db
         self.assertEqual(rel2['fromTable'], 'DimRegion')
         self.assertEqual(rel2['fromColumnName'], 'loaddate')
 
+class TestParallelParsing(unittest.TestCase):
+    def test_parallel_matches_serial_on_generated_corpus(self):
+        for seed in range(3):
+            for content in generate_corpus(seed, tables=2, columns=60, measures=30):
+                lines = content.splitlines(keepends=True)
+                serial = TmdlParser(None).parse_lines(lines)
+                parallel = parse_lines_parallel(lines, workers=4, min_chunk_bytes=200)
+                self.assertEqual(json.dumps(serial), json.dumps(parallel))
+
+    def test_split_points_skip_block_bodies(self):
+        content = "table T\n" \
+                  "\tmeasure M = ```\n" \
+                  "\tcolumn NotAColumn\n" \
+                  "\t```\n" \
+                  "\tcolumn C\n" \
+                  "expression E =\n" \
+                  "\tcolumn AlsoNotAColumn\n"
+        lines = content.splitlines(keepends=True)
+        self.assertEqual(find_split_points(lines), [0, 1, 4, 5])
+
+    def test_no_indent_one_splits_inside_relationship(self):
+        content = "relationship R1\n" \
+                  "\tfromColumn: A.x\n" \
+                  "relationship R2\n"
+        lines = content.splitlines(keepends=True)
+        self.assertEqual(find_split_points(lines), [0, 2])
+
+    def test_file_chunks_match_serial(self):
+        # Workers cut the file themselves at byte offsets; CRLF must read as in text mode
+        content = generate_table_tmdl(random.Random(3), columns=80, measures=40).replace('\n', '\r\n')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "Large.tmdl")
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            serial = TmdlParser(path).parse()
+            for workers in (2, 5, 16):
+                self.assertEqual(parse_file_parallel(path, workers=workers, min_chunk_bytes=100), serial)
+
+    def test_cut_inside_block_falls_back_to_serial(self):
+        # Every fence line looks like a column declaration, so most cuts land inside the block
+        content = "table T\n\tmeasure M = ```\n" + "\tcolumn NotAColumn\n" * 200 + "\t```\n\tcolumn C\n"
+        lines = content.splitlines(keepends=True)
+        expected = TmdlParser(None).parse_lines(lines)
+        self.assertEqual(parse_lines_parallel(lines, workers=4, min_chunk_bytes=100), expected)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "Fence.tmdl")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.assertEqual(parse_file_parallel(path, workers=4, min_chunk_bytes=100), expected)
+
+    def test_small_file_parsed_serially(self):
+        content = generate_table_tmdl(random.Random(7), columns=3, measures=2)
+        lines = content.splitlines(keepends=True)
+        self.assertEqual(parse_lines_parallel(lines, workers=4), TmdlParser(None).parse_lines(lines))
+
+class TestStreamingObjects(unittest.TestCase):
+    def _rebuild(self, events):
+        # Attach top-level objects to the root event, which always comes last
+        kind, parent, root = events[-1]
+        root = dict(root)
+        root_path = (root['name'],) if 'name' in root else ()
+        for kind, parent, obj in events[:-1]:
+            if parent == root_path:
+                root.setdefault(kind + 's', []).append(obj)
+        return root
+
+    def test_stream_matches_serial_on_generated_corpus(self):
+        for seed in range(3):
+            for content in generate_corpus(seed, tables=2, columns=30, measures=15):
+                lines = content.splitlines(keepends=True)
+                events = list(iter_objects_from_lines(lines))
+                self.assertEqual(self._rebuild(events), TmdlParser(None).parse_lines(lines))
+
+    def test_events_are_post_order_with_parent_paths(self):
+        content = "table Sales\n" \
+                  "\tcolumn Amount\n" \
+                  "\t\tdataType: decimal\n" \
+                  "\t\tannotation SummarizationSetBy = Automatic\n" \
+                  "\tmeasure Total = SUM(Sales[Amount])\n"
+        events = [(kind, parent, obj.get('name')) for kind, parent, obj in iter_objects_from_lines(content.splitlines(keepends=True))]
+        self.assertEqual(events, [
+            ('annotation', ('Sales', 'Amount'), 'SummarizationSetBy'),
+            ('column', ('Sales',), 'Amount'),
+            ('measure', ('Sales',), 'Total'),
+            ('table', (), 'Sales'),
+        ])
+
+    def test_lines_are_consumed_lazily(self):
+        content = generate_table_tmdl(random.Random(3), columns=200, measures=0)
+        lines = content.splitlines(keepends=True)
+        consumed = []
+
+        def counting_lines():
+            for line in lines:
+                consumed.append(line)
+                yield line
+
+        events = iter_objects_from_lines(counting_lines())
+        next(events)
+        self.assertLess(len(consumed), len(lines) // 10)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from pbip_parser import PbipParser
+from test_support import ProjectFiles
+from tmdl_corpus import generate_corpus
+from tmdl_parser import TmdlParser, parse_tmdl_text
+from tmdl_writer import apply_model, apply_models, preserve_layout, to_tmdl
+
+class TestToTmdl(unittest.TestCase):
+    def test_corpus_round_trip(self):
+        for seed in range(5):
+            for content in generate_corpus(seed, tables=3, columns=150, measures=80):
+                parsed = parse_tmdl_text(content)
+                text = to_tmdl(parsed)
+                self.assertEqual(parse_tmdl_text(text), parsed)
+                self.assertEqual(to_tmdl(parse_tmdl_text(text)), text)
+
+    def test_quoting_blocks_and_derived_keys(self):
+        table = {'name': "'Fact Sales'", 'type': 'table',
+                 'measures': [{'name': 'Margin %', 'type': 'measure', 'expression': 'DIVIDE([A], [B])'},
+                              {'name': 'Total', 'type': 'measure', 'expression': 'VAR x = 1\nRETURN x',
+                               'formatString': '0.00'}],
+                 'partitions': [{'name': 'p', 'partitionType': 'm', 'type': 'partition',
+                                 'source': 'Source{[Schema="dbo",Item="Sales"]}[Data]',
+                                 'sourceDetails': [{'schema': 'dbo', 'item': 'Sales'}]}]}
+        text = to_tmdl(table)
+        self.assertIn("\tmeasure 'Margin %' = DIVIDE([A], [B])\n", text)
+        self.assertIn("\tmeasure Total = ```\n\t\t\tVAR x = 1\n\t\t\tRETURN x\n\t\t\t```\n\t\tformatString: 0.00\n", text)
+        # A single-line source is still written as a block so sourceDetails is re-derived
+        self.assertIn("\t\tsource =\n\t\t\tSource{", text)
+        self.assertEqual(parse_tmdl_text(text), table)
+
+        relationships = parse_tmdl_text("relationship r1\n\tfromColumn: Sales.Id\n\ttoColumn: Dim.Id\n")
+        self.assertEqual(to_tmdl(relationships), "relationship r1\n\tfromColumn: Sales.Id\n\ttoColumn: Dim.Id\n")
+
+    def test_round_trips_irregular_input(self):
+        for text in ("\tmeasure M = \n\t\t\t```\n",
+                     "\tmeasure M = \n\t\t\t =\n",
+                     "\tcolumn C\n\tlineageTag: x\n",
+                     "relationship r\n\tfromColumn =\tT.C\n",
+                     "expression P = \"v\" meta [IsParameterQuery=true]\n\tlineageTag: x\n"):
+            parsed = parse_tmdl_text(text)
+            self.assertEqual(parse_tmdl_text(to_tmdl(parsed)), parsed, text)
+
+    def test_repeated_block_is_unparsed(self):
+        parser = TmdlParser(None)
+        parser.parse_lines(["table T\n", "\tdescription =\n", "\t\ta\n", "\tdescription =\n", "\t\tb\n"])
+        self.assertEqual(parser.unparsed_lines, [3])
+
+    def test_preserve_layout_splices_objects(self):
+        original = ("table Sales\n\tlineageTag: a\n\n"
+                    "\tmeasure Total = SUM(Sales[Amount])\n\n"
+                    "\tcolumn Amount\n\t\tdataType = decimal\n\t\tannotation A = 1\n\n"
+                    "\tmeasure Old = 1\n\n\n"
+                    "\tcolumn Id\n\t\tdataType = int64\n")
+        model = parse_tmdl_text(original)
+        model['description'] = 'Sales facts'
+        model['columns'][0]['formatString'] = '0.00'
+        model['columns'].insert(1, {'name': 'Key', 'type': 'column', 'dataType': 'string'})
+        del model['measures'][1]
+        # Unchanged objects keep their lines, blank lines and place among interleaved
+        # lists; edited objects get regenerated properties but keep unchanged children
+        self.assertEqual(preserve_layout(original, to_tmdl(model)),
+                         "table Sales\n\tlineageTag: a\n\tdescription: Sales facts\n\n"
+                         "\tmeasure Total = SUM(Sales[Amount])\n\n"
+                         "\tcolumn Amount\n\t\tdataType: decimal\n\t\tformatString: 0.00\n\t\tannotation A = 1\n\n"
+                         "\tcolumn Key\n\t\tdataType: string\n\n\n"
+                         "\tcolumn Id\n\t\tdataType = int64\n")
+
+    def test_rejects_unwritable_values(self):
+        with self.assertRaises(ValueError):
+            to_tmdl({'name': 'T', 'type': 'table', 'lineageTag': ['a']})
+
+class TestApplyModel(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.project = os.path.join(self.test_dir, "Proj")
+        self.files = ProjectFiles(self.project)
+        self.definition = self.files.definition
+        self.files.write("tables/Sales.tmdl", "table Sales\r\n\tcolumn Amount\r\n\t\tdataType: decimal\r\n")
+        self.files.write("tables/Dim.tmdl", "table Dim\n\tisHidden\n\tcolumn Id\n\t\tdataType: int64\n")
+        self.files.write("relationships.tmdl", "relationship r1\n\tfromColumn: Sales.Amount\n\ttoColumn: Dim.Id\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_writes_only_changed_files(self):
+        model = PbipParser(self.project).parse()
+        self.assertEqual(apply_model(self.project, model)['unchanged'], 3)
+
+        tables = {table['name']: table for table in model['tables']}
+        tables['Sales']['columns'][0]['formatString'] = '#,0.00'
+        tables['Dim']['columns'][0]['formatString'] = '0'
+        model['tables'].append({'name': "'New Table'", 'type': 'table', 'columns': []})
+        report = apply_model(self.project, model)
+
+        self.assertEqual(sorted(report['written']), [os.path.join("tables", "New Table.tmdl"), os.path.join("tables", "Sales.tmdl")])
+        self.assertEqual(report['unchanged'], 1)
+        # Dim.tmdl has a bare flag the JSON model cannot hold, so it is left alone
+        self.assertEqual(report['skipped'], [{'file': os.path.join("tables", "Dim.tmdl"), 'lines': [2]}])
+        self.assertEqual(self.files.read("tables/Sales.tmdl"),
+                         "table Sales\r\n\tcolumn Amount\r\n\t\tdataType: decimal\r\n\t\tformatString: #,0.00\r\n")
+        self.assertEqual(TmdlParser(os.path.join(self.definition, "tables", "New Table.tmdl")).parse()['name'], "'New Table'")
+
+        forced = apply_model(self.project, model, force=True)
+        self.assertEqual(forced['written'], [os.path.join("tables", "Dim.tmdl")])
+        self.assertNotIn("isHidden", self.files.read("tables/Dim.tmdl"))
+
+    def test_rewrite_keeps_untouched_lines(self):
+        original = ("table Sales\n\tlineageTag: a\n\n\tcolumn Amount\n\t\tdataType = decimal\n"
+                    "\tcolumn Id\n\t\tdataType: int64\n\n\n\tmeasure Total = SUM(Sales[Amount])\n")
+        self.files.write("tables/Sales.tmdl", original)
+        model = PbipParser(self.project).parse()
+        tables = {table['name']: table for table in model['tables']}
+        tables['Sales']['columns'][1]['formatString'] = '0'
+        apply_model(self.project, model)
+        self.assertEqual(self.files.read("tables/Sales.tmdl"),
+                         original.replace("dataType: int64\n", "dataType: int64\n\t\tformatString: 0\n"))
+
+    def test_removed_tables_need_force(self):
+        model = PbipParser(self.project).parse()
+        model['tables'] = [table for table in model['tables'] if table['name'] != 'Dim']
+        dim = os.path.join("tables", "Dim.tmdl")
+
+        report = apply_model(self.project, model)
+        self.assertEqual((report['orphaned'], report['removed']), ([dim], []))
+        self.assertTrue(os.path.exists(self.files.path("tables/Dim.tmdl")))
+
+        report = apply_model(self.project, model, force=True, dry_run=True)
+        self.assertEqual((report['orphaned'], report['removed']), ([], [dim]))
+        self.assertTrue(os.path.exists(self.files.path("tables/Dim.tmdl")))
+
+        apply_model(self.project, model, force=True)
+        self.assertFalse(os.path.exists(self.files.path("tables/Dim.tmdl")))
+        self.assertEqual([table['name'] for table in PbipParser(self.project).parse()['tables']], ['Sales'])
+
+    def test_new_table_names_stay_in_tables_folder(self):
+        model = PbipParser(self.project).parse()
+        model['tables'].append({'name': "'../Escape'", 'type': 'table', 'columns': []})
+        report = apply_model(self.project, model)
+        self.assertIn(os.path.join("tables", "..%2FEscape.tmdl"), report['written'])
+        self.assertFalse(os.path.exists(os.path.join(self.definition, "Escape.tmdl")))
+
+    def test_parallel_projects(self):
+        other = os.path.join(self.test_dir, "Other")
+        shutil.copytree(self.project, other)
+        os.rename(os.path.join(other, "Proj.SemanticModel"), os.path.join(other, "Other.SemanticModel"))
+        pairs = []
+        for project in (self.project, other):
+            model = PbipParser(project).parse()
+            model['relationships'][0]['isActive'] = 'false'
+            model_path = os.path.join(self.test_dir, f"{os.path.basename(project)}.json")
+            with open(model_path, 'w', encoding='utf-8') as f:
+                json.dump(model, f)
+            pairs.append((project, model_path))
+
+        reports = apply_models(pairs, workers=2, dry_run=True)
+        self.assertEqual([report['written'] for report in reports], [["relationships.tmdl"]] * 2)
+        self.assertNotIn("isActive", self.files.read("relationships.tmdl"))
+        apply_models(pairs, workers=2)
+        self.assertIn("\tisActive: false\n", self.files.read("relationships.tmdl"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from tmdl_parser import parse_tmdl_text
+from validator import validate_model, split_reference
+
+DIM_DATE = """table 'Dim Date'
+	column Date
+		dataType: dateTime
+		variation Variation
+			isDefault
+			relationship: 6b1e5a8e-0000-4000-8000-000000000001
+			defaultHierarchy: LocalDateTable_1.'Date Hierarchy'
+	column 'Month Name'
+		dataType: string
+		sortByColumn: 'Month Number'
+	column 'Month Number' = MONTH('Dim Date'[Date])
+		dataType: int64
+	column Weekday
+		dataType: string
+		sortByColumn: WeekdayNumber
+"""
+
+FACT_SALES = """table FactSales
+	column DateKey
+		dataType: dateTime
+	column 'Amount.USD'
+		dataType: decimal
+"""
+
+LOCAL_DATE = """table LocalDateTable_1
+	column Date
+		dataType: dateTime
+"""
+
+RELATIONSHIPS = """relationship 6b1e5a8e-0000-4000-8000-000000000001
+	fromColumn: 'Dim Date'.Date
+	toColumn: LocalDateTable_1.Date
+
+relationship r2
+	fromColumn: FactSales.DateKey
+	toColumn: 'dim date'.date
+
+relationship r3
+	fromColumn: FactSales.Missing
+	toColumn: DimCustomer.Id
+
+relationship r4
+	fromColumn: FactSales.'Amount.USD'
+	toColumn: 'Dim Date'.'Month.Missing'
+"""
+
+class TestValidator(unittest.TestCase):
+    def _model(self, relationships=RELATIONSHIPS, tables=(DIM_DATE, FACT_SALES, LOCAL_DATE)):
+        return {
+            'relationships': parse_tmdl_text(relationships).get('relationships', []),
+            'tables': [parse_tmdl_text(table) for table in tables],
+        }
+
+    def test_dangling_references(self):
+        issues = validate_model(self._model())
+        found = sorted((issue['name'], issue['property'], issue['message']) for issue in issues)
+        self.assertEqual(found, [
+            ('Weekday', 'sortByColumn', "column 'WeekdayNumber' not found in table 'Dim Date'"),
+            ('r3', 'fromColumn', "column 'Missing' not found in table 'FactSales'"),
+            ('r3', 'toColumn', "table 'DimCustomer' not found"),
+            # Dots inside quotes do not split the reference
+            ('r4', 'toColumn', "column 'Month.Missing' not found in table 'Dim Date'"),
+        ])
+
+    def test_missing_relationship_and_hierarchy_table(self):
+        issues = validate_model(self._model(relationships="", tables=(DIM_DATE,)))
+        found = sorted((issue['property'], issue['message']) for issue in issues)
+        self.assertEqual(found, [
+            ('defaultHierarchy', "table 'LocalDateTable_1' not found"),
+            ('relationship', "relationship '6b1e5a8e-0000-4000-8000-000000000001' not found"),
+            ('sortByColumn', "column 'WeekdayNumber' not found in table 'Dim Date'"),
+        ])
+
+    def test_split_reference(self):
+        self.assertEqual(split_reference("'Dim.Date'.'Date Hierarchy'"), ("'Dim.Date'", "'Date Hierarchy'"))
+        self.assertIsNone(split_reference("NoDot"))
+
+if __name__ == '__main__':
+    unittest.main()
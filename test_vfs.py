@@ -0,0 +1,75 @@
+import unittest
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from pbip_parser import PbipParser
+from pbip_shards import write_sharded_model, load_sharded_model
+from vfs import MemorySource, open_source
+
+FILES = {
+    "TestModel.SemanticModel/definition/database.tmdl": "database TestDB\n\tcompatibilityLevel: 1567\n",
+    "TestModel.SemanticModel/definition/model.tmdl": "model Model\n\tculture: en-US\n",
+    "TestModel.SemanticModel/definition/relationships.tmdl": "relationship r1\n\tfromColumn: FactSales.DateKey\n\ttoColumn: DimDate.DateKey\n",
+    "TestModel.SemanticModel/definition/tables/DimDate.tmdl": "table DimDate\n\tcolumn DateKey\n\t\tdataType: int64\n",
+    "TestModel.SemanticModel/definition/tables/FactSales.tmdl": "table FactSales\n\tcolumn DateKey\n\t\tdataType: int64\n\tmeasure Total = SUM(FactSales[Amount])\n",
+}
+
+class TestVfs(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.pbip_folder = os.path.join(self.test_dir, "TestReport")
+        for relative_path, content in FILES.items():
+            path = os.path.join(self.pbip_folder, *relative_path.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        self.expected = self._sorted_tables(PbipParser(self.pbip_folder).parse())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    @staticmethod
+    def _sorted_tables(model_data):
+        model_data['tables'].sort(key=lambda table: table['name'])
+        return model_data
+
+    def _parse_archive(self, archive_path):
+        source, root = open_source(archive_path)
+        self.assertEqual(root, "TestReport")
+        with source:
+            return self._sorted_tables(PbipParser(root, source=source).parse())
+
+    def test_zip_archive(self):
+        archive_path = os.path.join(self.test_dir, "TestReport.zip")
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            for relative_path, content in FILES.items():
+                archive.writestr("TestReport/" + relative_path, content)
+        self.assertEqual(self._parse_archive(archive_path), self.expected)
+
+    def test_tar_archive(self):
+        for name, mode in (("TestReport.tar", 'w'), ("TestReport.tar.gz", 'w:gz')):
+            archive_path = os.path.join(self.test_dir, name)
+            with tarfile.open(archive_path, mode) as archive:
+                archive.add(self.pbip_folder, arcname="TestReport")
+            self.assertEqual(self._parse_archive(archive_path), self.expected)
+
+            source, _ = open_source(archive_path)
+            source.close()
+            # A compressed tar is read once up front; a plain one is read in place
+            self.assertEqual(source.contents is not None, name.endswith('.gz'))
+            if source.archive is not None:
+                self.assertTrue(source.archive.closed)
+
+    def test_memory_source(self):
+        source = MemorySource(FILES)
+        self.assertEqual(self._sorted_tables(PbipParser("", source=source).parse()), self.expected)
+
+    def test_sharded_output_from_memory_source(self):
+        shard_dir = os.path.join(self.test_dir, "shards")
+        write_sharded_model(PbipParser("", source=MemorySource(FILES)), shard_dir, workers=1)
+        self.assertEqual(self._sorted_tables(load_sharded_model(shard_dir)), self.expected)
+
+if __name__ == '__main__':
+    unittest.main()
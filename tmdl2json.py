@@ -0,0 +1,48 @@
+import sys
+
+# Single entry point for all tools: `python tmdl2json.py <command> [options]`.
+# Only the module behind the chosen command is imported, and top-level help is
+# printed without importing argparse, so hook/CI invocations start quickly.
+
+# command -> (module, summary)
+COMMANDS = {
+    'convert': ('tmdl_parser', 'Convert a TMDL file or directory to JSON'),
+    'pbip': ('pbip_parser', 'Parse a PBIP report folder into a single JSON model'),
+    'erd': ('erd_generator', 'Generate a Mermaid ERD (and optionally a PNG)'),
+    'dupes': ('duplicates', 'Find duplicate DAX measures and M queries across PBIP projects'),
+    'incremental': ('incremental', 'Re-parse only the TMDL files changed between two git refs'),
+    'validate': ('validator', 'Report dangling relationship and column references'),
+    'catalog': ('catalog', 'Ingest parsed models into a SQLite catalog and query it'),
+    'serve': ('service', 'Serve parsed models, tables and ERDs over a localhost HTTP API'),
+    'stats': ('stats', 'Report per-model inventory statistics across PBIP projects'),
+    'mdeps': ('m_dependencies', 'Build the M dependency graph and plan targeted partition refreshes'),
+    'write': ('tmdl_writer', 'Write edited JSON models back to the TMDL files of PBIP projects'),
+}
+
+def _usage():
+    lines = ["usage: tmdl2json <command> [options]", "", "commands:"]
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, summary) in COMMANDS.items():
+        lines.append(f"  {name.ljust(width)}  {summary}")
+    lines.append("")
+    lines.append("Run 'tmdl2json <command> --help' for command options.")
+    return "\n".join(lines)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(_usage())
+        return 0
+
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"tmdl2json: unknown command '{command}'", file=sys.stderr)
+        print(_usage(), file=sys.stderr)
+        return 2
+
+    import importlib
+    module = importlib.import_module(COMMANDS[command][0])
+    return module.main(argv[1:], prog=f"tmdl2json {command}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import base64
+import random
+import zlib
+
+# Generates synthetic TMDL documents shaped like real Power BI exports. Used by the
+# tests to compare alternative parsing paths against TmdlParser on large inputs.
+
+DATA_TYPES = ['string', 'int64', 'double', 'dateTime', 'boolean', 'decimal', 'binary']
+
+def _name(rng, prefix):
+    name = f"{prefix}{rng.randint(0, 99999)}"
+    if rng.random() < 0.3:
+        return f"'{name} {rng.choice(['Total', 'Key', 'Date', 'Amount'])}'"
+    return name
+
+def _annotations(rng, indent):
+    lines = []
+    for _ in range(rng.randint(0, 2)):
+        key = rng.choice(['PBI_FormatHint', 'SummarizationSetBy', 'PBI_ResultType'])
+        value = rng.choice(['Automatic', 'Table', '{"isGeneralNumber":true}'])
+        lines.append(f"{indent}annotation {key} = {value}")
+    return lines
+
+def _column(rng):
+    lines = [f"\tcolumn {_name(rng, 'Col')}"]
+    lines.append(f"\t\tdataType: {rng.choice(DATA_TYPES)}")
+    if rng.random() < 0.5:
+        lines.append(f"\t\tformatString: {rng.choice(['0', '#,0', 'General Date'])}")
+    lines.append(f"\t\tlineageTag: {rng.getrandbits(64):016x}")
+    lines.append(f"\t\tsummarizeBy: {rng.choice(['none', 'sum', 'count'])}")
+    if rng.random() < 0.2:
+        lines.append("\t\tsortByColumn: SortKey")
+    lines.append("")
+    lines.extend(_annotations(rng, "\t\t"))
+    lines.append("")
+    return lines
+
+def _measure(rng):
+    name = _name(rng, 'Measure')
+    style = rng.randint(0, 2)
+    if style == 0:
+        lines = [f"\tmeasure {name} = SUM(Sales[Amount{rng.randint(0, 9)}])"]
+    elif style == 1:
+        lines = [f"\tmeasure {name} = ```", "\t\t\t"]
+        lines.append(f"\t\t\tVAR x = {rng.randint(0, 100)}")
+        lines.append("\t\t\t")
+        lines.append("\t\t\tRETURN")
+        lines.append("\t\t\t    CALCULATE ( x, ALL ( 'Date' ) )")
+        lines.append("\t\t\t```")
+    else:
+        lines = [f"\tmeasure {name} = ", "\t\t\t"]
+        lines.append(f"\t\t\tVAR y = {rng.randint(0, 100)}")
+        lines.append("\t\t\tRETURN y")
+    lines.append(f"\t\tformatString: {rng.choice(['0', '0.00%', '#,0'])}")
+    if rng.random() < 0.5:
+        lines.append(f"\t\tdisplayFolder: Folder{rng.randint(0, 5)}")
+    lines.append(f"\t\tlineageTag: {rng.getrandbits(64):016x}")
+    lines.append("")
+    lines.extend(_annotations(rng, "\t\t"))
+    lines.append("")
+    return lines
+
+def _partition(rng, table_name):
+    lines = [f"\tpartition {table_name}-{rng.randint(0, 999)} = m", "\t\tmode: import", "\t\tsource ="]
+    lines.append("\t\t\t\tlet")
+    if rng.random() < 0.3:
+        payload = base64.b64encode(zlib.compress(b'[["a","b"]]')[2:-4]).decode('ascii')
+        lines.append(f'\t\t\t\t    Source = Table.FromRows(Json.Document(Binary.Decompress(Binary.FromText("{payload}", BinaryEncoding.Base64), Compression.Deflate)))')
+    else:
+        lines.append('\t\t\t\t    Source = Sql.Database("server", "db"),')
+        lines.append(f'\t\t\t\t    Data = Source{{[Schema="dbo",Item="T{rng.randint(0, 99)}"]}}[Data]')
+    lines.append("\t\t\t\t")
+    lines.append("\t\t\t\tin")
+    lines.append("\t\t\t\t    Source")
+    lines.append("")
+    return lines
+
+def generate_table_tmdl(rng, columns=20, measures=10, partitions=1):
+    table_name = _name(rng, 'Table')
+    lines = [f"table {table_name}", f"\tlineageTag: {rng.getrandbits(64):016x}", ""]
+    members = [_column] * columns + [_measure] * measures
+    rng.shuffle(members)
+    for member in members:
+        lines.extend(member(rng))
+    for _ in range(partitions):
+        lines.extend(_partition(rng, table_name))
+    lines.extend(_annotations(rng, "\t"))
+    return "\n".join(lines) + "\n"
+
+def generate_relationships_tmdl(rng, count=50):
+    lines = []
+    for _ in range(count):
+        lines.append(f"relationship {rng.getrandbits(128):032x}")
+        if rng.random() < 0.3:
+            lines.append("\tjoinOnDateBehavior: datePartOnly")
+        if rng.random() < 0.2:
+            lines.append("\tisActive: false")
+        lines.append(f"\tfromColumn: {_name(rng, 'Fact')}.{_name(rng, 'Key')}")
+        lines.append(f"\ttoColumn: {_name(rng, 'Dim')}.{_name(rng, 'Key')}")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+def generate_expressions_tmdl(rng, count=20):
+    lines = []
+    for i in range(count):
+        if rng.random() < 0.5:
+            lines.append(f'expression Param{i} = "value{i}" meta [IsParameterQuery=true, Type="Text", IsParameterQueryRequired=true]')
+        else:
+            lines.append(f"expression Query{i} =")
+            lines.append("\t\tlet")
+            lines.append(f"\t\t    Source = Param{rng.randint(0, count - 1)}")
+            lines.append("\t\tin")
+            lines.append("\t\t    Source")
+        lines.append(f"\tlineageTag: {rng.getrandbits(64):016x}")
+        lines.append("")
+        lines.append("\tannotation PBI_ResultType = Text")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+def generate_corpus(seed=0, tables=5, columns=20, measures=10):
+    rng = random.Random(seed)
+    corpus = [generate_table_tmdl(rng, columns, measures) for _ in range(tables)]
+    corpus.append(generate_relationships_tmdl(rng))
+    corpus.append(generate_expressions_tmdl(rng))
+    return corpus
@@ -1,23 +1,76 @@
-import json
-import re
-import sys
 import os
-import base64
-import zlib
+import io
+
+# Heavier modules (re, base64, zlib, json, concurrent.futures, argparse) are imported in
+# the code paths that need them so that short CLI invocations start quickly.
+
+# Keywords that _process_line dispatches on; anything else is a property line
+OBJECT_KEYWORDS = ('table ', 'database ', 'model ', 'column ', 'partition ',
+                   'annotation ', 'measure ', 'relationship ')
+
+# Objects that are pushed onto the stack and so own the lines indented below them
+STACK_OBJECT_KEYWORDS = ('column ', 'partition ', 'measure ', 'relationship ')
+
+# Root keys holding child object lists; these are concatenated when merging chunks
+CHILD_LIST_KEYS = ('columns', 'partitions', 'measures', 'annotations', 'relationships')
+# child list key -> kind reported by iter_objects
+CHILD_KINDS = {'columns': 'column', 'partitions': 'partition', 'measures': 'measure',
+               'annotations': 'annotation', 'relationships': 'relationship'}
+
+# Parallel parsing only splits input into chunks of at least this many bytes.
+# Measured with bench_parallel.py: a worker takes ~20 ms to start, and shipping its
+# result back (pickled in the worker, unpickled here) adds about 40% of its parse
+# time, so a chunk must parse for ~0.15 s, about 1 MB of TMDL, before a second
+# worker pays off. Smaller input is parsed serially.
+PARALLEL_MIN_CHUNK_BYTES = 1 << 20
 
 class TmdlParser:
-    def __init__(self, file_path):
+    def __init__(self, file_path, decode_payloads=True, source=None, record_positions=False):
         self.file_path = file_path
+        # Optional vfs source to read file_path from instead of the local filesystem
+        self.source = source
+        # When False, Base64 payloads are recorded by size instead of being decoded
+        self.decode_payloads = decode_payloads
         self.lines = []
         self.current_line_index = 0
         self.root = {}
         self.stack = [(self.root, -1)] # (current_dict, indent_level)
+        # Indices of non-blank lines that have no representation in the parsed dict
+        # (bare flags such as isHidden, ref lines, ...); see tmdl_writer
+        self.unparsed_lines = []
+        # When set, parsing also fills self.positions, a positions.PositionIndex of
+        # where each object and property block is defined
+        self.record_positions = record_positions
+        self.positions = None
 
     def parse(self):
+        self.lines = self._read_lines()
+        return self._parse_loaded_lines()
+
+    def _read_lines(self):
+        if self.source is not None:
+            return self.source.read_lines(self.file_path)
         with open(self.file_path, 'r', encoding='utf-8') as f:
-            self.lines = f.readlines()
-        
+            return f.readlines()
+
+    def parse_lines(self, lines):
+        self.lines = list(lines)
+        return self._parse_loaded_lines()
+
+    def parse_parallel(self, workers=None, min_chunk_bytes=PARALLEL_MIN_CHUNK_BYTES):
+        if self.source is None:
+            # Workers read their own byte range of the file
+            self.root = parse_file_parallel(self.file_path, workers, min_chunk_bytes)
+        else:
+            self.lines = self._read_lines()
+            self.root = parse_lines_parallel(self.lines, workers, min_chunk_bytes)
+        return self.root
+
+    def _parse_loaded_lines(self):
         self.current_line_index = 0
+        if self.record_positions:
+            from positions import PositionIndex
+            self.positions = PositionIndex(self.file_path)
         while self.current_line_index < len(self.lines):
             line = self.lines[self.current_line_index].rstrip()
             if not line.strip():
@@ -29,18 +82,46 @@ class TmdlParser:
 
             # Adjust stack
             while len(self.stack) > 1 and self.stack[-1][1] >= indent:
-                self.stack.pop()
+                popped = self.stack.pop()[0]
+                if self.positions is not None:
+                    self.positions.close(popped, self._last_content_line(self.current_line_index - 1))
             
             parent = self.stack[-1][0]
 
             self._process_line(content, parent, indent)
             self.current_line_index += 1
         
+        if self.positions is not None:
+            self.positions.close_all(self._last_content_line(len(self.lines) - 1))
         return self.root
 
     def _get_indent(self, line):
         return len(line) - len(line.lstrip('\t'))
 
+    def _last_content_line(self, index):
+        # 1-based number of the last non-blank line at or before index
+        while index > 0 and not self.lines[index].strip():
+            index -= 1
+        return index + 1
+
+    def _record_position(self, kind, name, parent, obj=None):
+        # Entry starting at the current line; objects pushed on the stack stay open
+        # until they are popped, which sets their end line
+        parent_entry = self.positions.entry_of(parent) if parent is not None else -1
+        entry = self.positions.add(kind, name, parent_entry, self.current_line_index + 1,
+                                   self._get_indent(self.lines[self.current_line_index]) + 1)
+        if obj is not None:
+            self.positions.open(obj, entry)
+        return entry
+
+    def _reset_root_stack(self, type_name, name):
+        if self.positions is not None:
+            end = self._last_content_line(self.current_line_index - 1)
+            for obj, _ in self.stack:
+                self.positions.close(obj, end)
+            self._record_position(type_name, name, None, self.root)
+        self.stack = [(self.root, 0)]
+
     def _process_line(self, content, parent, indent):
         if content.startswith('table '):
             self._handle_table(content)
@@ -71,6 +152,8 @@ class TmdlParser:
             self.root['relationships'] = []
             
         self.root['relationships'].append(new_rel)
+        if self.positions is not None:
+            self._record_position('relationship', rel_def, self.root, new_rel)
         # Relationship properties are indented under it, so we push to stack
         self.stack.append((new_rel, indent))
 
@@ -79,14 +162,14 @@ class TmdlParser:
         self.root['name'] = table_name
         self.root['type'] = 'table'
         # Reset stack for root properties
-        self.stack = [(self.root, 0)]
+        self._reset_root_stack('table', table_name)
 
     def _handle_root_object(self, content, type_name):
         obj_name = content.split(' ', 1)[1]
         self.root['name'] = obj_name
         self.root['type'] = type_name
         # Reset stack for root properties
-        self.stack = [(self.root, 0)]
+        self._reset_root_stack(type_name, obj_name)
     
     def _handle_column(self, content, parent, indent):
         col_name = content.split(' ', 1)[1]
@@ -94,6 +177,8 @@ class TmdlParser:
         if 'columns' not in parent:
             parent['columns'] = []
         parent['columns'].append(new_col)
+        if self.positions is not None:
+            self._record_position('column', col_name, parent, new_col)
         self.stack.append((new_col, indent))
 
     def _handle_partition(self, content, parent, indent):
@@ -107,6 +192,8 @@ class TmdlParser:
         if 'partitions' not in parent:
             parent['partitions'] = []
         parent['partitions'].append(new_part)
+        if self.positions is not None:
+            self._record_position('partition', new_part['name'], parent, new_part)
         self.stack.append((new_part, indent))
 
     def _handle_annotation(self, content, parent):
@@ -116,9 +203,14 @@ class TmdlParser:
             if 'annotations' not in parent:
                 parent['annotations'] = []
             parent['annotations'].append({'name': key, 'value': value})
+            if self.positions is not None:
+                self._record_position('annotation', key, parent)
+        else:
+            self.unparsed_lines.append(self.current_line_index)
 
     def _handle_measure(self, content, parent, indent):
         if '=' not in content:
+             self.unparsed_lines.append(self.current_line_index)
              return
 
         name_part, expression_part = content.split('=', 1)
@@ -136,10 +228,14 @@ class TmdlParser:
             'type': 'measure',
             'expression': ''
         }
+        if self.positions is not None:
+            # Recorded before the expression block so the block can name it as parent
+            measure_entry = self._record_position('measure', measure_name, parent, new_measure)
         
         if expression_part == '```':
             # Case 1: Delimited block
             block_lines = []
+            start_index = self.current_line_index
             self.current_line_index += 1
             while self.current_line_index < len(self.lines):
                 line = self.lines[self.current_line_index]
@@ -148,6 +244,10 @@ class TmdlParser:
                 block_lines.append(line.rstrip())
                 self.current_line_index += 1
             new_measure['expression'] = self._normalize_block(block_lines)
+            if self.positions is not None:
+                self.positions.add('property', 'expression', measure_entry, start_index + 1,
+                                   self._get_indent(self.lines[start_index]) + 1,
+                                   self._last_content_line(min(self.current_line_index, len(self.lines) - 1)))
 
         elif not expression_part:
             # Case 3: Implicit block (indented)
@@ -174,16 +274,25 @@ class TmdlParser:
     def _handle_property(self, content, parent, indent):
         if ': ' in content:
             key, value = content.split(': ', 1)
+            if key in parent:
+                # Repeated property: the earlier value is overwritten
+                self.unparsed_lines.append(self.current_line_index)
             if key in ('fromColumn', 'toColumn'):
                 self._handle_column_reference(key, value, parent)
             else:
                 parent[key] = value
         elif content.endswith(' ='):
             key = content[:-2]
+            if key in parent:
+                self.unparsed_lines.append(self.current_line_index)
             self._handle_multiline_block(key, parent, indent)
         elif '=' in content:
             key, value = [x.strip() for x in content.split('=', 1)]
+            if key in parent:
+                self.unparsed_lines.append(self.current_line_index)
             parent[key] = value
+        else:
+            self.unparsed_lines.append(self.current_line_index)
 
     def _handle_column_reference(self, key, value, parent):
         parent[key] = value
@@ -216,6 +325,8 @@ class TmdlParser:
 
     def _handle_multiline_block(self, key, parent, indent):
         block_lines = []
+        if self.positions is not None:
+            block_entry = self._record_position('property', key, parent)
         self.current_line_index += 1
         
         # Look ahead
@@ -234,6 +345,9 @@ class TmdlParser:
             block_lines.append(next_line.rstrip())
             self.current_line_index += 1
             
+        if self.positions is not None:
+            self.positions.set_end(block_entry, self._last_content_line(min(self.current_line_index, len(self.lines) - 1)))
+
         # Normalize
         normalized_block = self._normalize_block(block_lines)
         parent[key] = normalized_block
@@ -244,6 +358,10 @@ class TmdlParser:
             self._extract_base64_content(normalized_block, parent)
 
     def _extract_base64_content(self, source_code, parent):
+        import base64
+        import re
+        import zlib
+
         # Look for pattern: Binary.FromText("...", BinaryEncoding.Base64)
         pattern = re.compile(r'Binary\.FromText\(\s*"([^"]+)"\s*,\s*BinaryEncoding\.Base64\s*\)')
         
@@ -252,6 +370,12 @@ class TmdlParser:
         if matches:
             extracted_info = []
             for b64_str in matches:
+                if not self.decode_payloads:
+                    extracted_info.append({
+                        'contentType': 'skipped',
+                        'encodedLength': len(b64_str)
+                    })
+                    continue
                 try:
                     # Decode Base64
                     decoded_bytes = base64.b64decode(b64_str)
@@ -288,6 +412,8 @@ class TmdlParser:
                 parent['sourceDetails'].extend(extracted_info)
 
     def _extract_schema_item(self, source_code, parent):
+        import re
+
         # Look for pattern: {[Schema="Value",Item="Value"]} or similar variations
         # Note: M code can be complex, this regex targets the specific pattern seen in examples
         
@@ -326,29 +452,303 @@ class TmdlParser:
              return '\n'.join(cleaned_lines)
         return '\n'.join(block_lines)
 
-def parse_tmdl(file_path):
+def iter_split_flags(lines):
+    # Mirrors the line consumption rules of TmdlParser (``` blocks, implicit measure
+    # blocks and multi-line property bodies) without building any objects, and yields
+    # True for every line at which a fresh parser would produce the same result as the
+    # serial one. Those are lines at indent 0, and lines at indent 1 while no indent-0
+    # object (e.g. a relationship) is still open on the stack.
+    in_fence = False
+    block_indent = None
+    pending_measure_indent = None
+    top_level_open = False
+
+    for raw_line in lines:
+        if pending_measure_indent is not None:
+            # TmdlParser peeks at the raw next line to detect an implicit block
+            if len(raw_line) - len(raw_line.lstrip('\t')) > pending_measure_indent + 1:
+                block_indent = pending_measure_indent + 1
+            pending_measure_indent = None
+
+        if in_fence:
+            if raw_line.strip() == '```':
+                in_fence = False
+            yield False
+            continue
+
+        if block_indent is not None:
+            if not raw_line.strip() or len(raw_line) - len(raw_line.lstrip('\t')) > block_indent:
+                yield False
+                continue
+            block_indent = None
+
+        line = raw_line.rstrip()
+        if not line.strip():
+            yield False
+            continue
+
+        indent = len(line) - len(line.lstrip('\t'))
+        content = line.strip()
+
+        yield indent == 0 or (indent == 1 and not top_level_open)
+
+        if indent == 0:
+            top_level_open = content.startswith(STACK_OBJECT_KEYWORDS)
+            if content.startswith('measure ') and '=' not in content:
+                top_level_open = False
+
+        if content.startswith('measure '):
+            if '=' in content:
+                expression_part = content.split('=', 1)[1].strip()
+                if expression_part == '```':
+                    in_fence = True
+                elif not expression_part:
+                    pending_measure_indent = indent
+        elif not content.startswith(OBJECT_KEYWORDS) and ': ' not in content and content.endswith(' ='):
+            block_indent = indent
+
+def find_split_points(lines):
+    return [i for i, is_safe in enumerate(iter_split_flags(lines)) if is_safe]
+
+def merge_chunk_roots(target, source):
+    # Later chunks overwrite scalar properties and extend child lists, which is what
+    # the serial parser does when it reaches the same lines
+    for key, value in source.items():
+        if key in CHILD_LIST_KEYS and isinstance(value, list) and isinstance(target.get(key), list):
+            target[key].extend(value)
+        else:
+            target[key] = value
+    return target
+
+def _parse_chunk(chunk_text):
+    # StringIO splits on '\n' only, exactly like the readlines() call that produced the chunk
+    return TmdlParser(None).parse_lines(io.StringIO(chunk_text).readlines())
+
+def _chunk_lines(lines, chunk_count):
+    # Chunks at exact split points; used by parser_oracle to check the merge
+    split_points = find_split_points(lines)
+    target_size = len(lines) / chunk_count
+    boundaries = [0]
+    for point in split_points:
+        if point - boundaries[-1] >= target_size:
+            boundaries.append(point)
+    boundaries.append(len(lines))
+    return [''.join(lines[start:end]) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+def _is_cut_candidate(line):
+    # Local guess at a split point: an object declaration at indent 0 or 1. Whether
+    # it really is one depends on the lines before it (it may sit in a ``` block),
+    # which the worker parsing the previous chunk checks
+    content = line.lstrip('\t')
+    return len(line) - len(content) <= 1 and content.startswith(OBJECT_KEYWORDS)
+
+def _parse_checked_chunk(lines, next_line):
+    """Parses lines as if they start at a split point; returns (root, whether
+    next_line, the first line of the following chunk, is a split point)."""
+    from itertools import chain
+
+    root = TmdlParser(None).parse_lines(lines)
+    if next_line is None:
+        return root, True
+    is_safe = False
+    for is_safe in iter_split_flags(chain(lines, (next_line,))):
+        pass
+    return root, is_safe
+
+def _parse_text_chunk(job):
+    chunk_text, next_line = job
+    # StringIO splits on '\n' only, exactly like the readlines() call that produced the chunk
+    return _parse_checked_chunk(io.StringIO(chunk_text).readlines(), next_line)
+
+def _find_cut(f, offset, size):
+    # Byte offset of the first candidate line starting at or after offset. Neighbouring
+    # workers call this with the same offset, so they agree on their shared boundary.
+    if offset <= 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    while True:
+        position = f.tell()
+        line = f.readline()
+        if not line:
+            return size
+        if _is_cut_candidate(line.decode('utf-8', 'replace')):
+            return position
+
+def _parse_file_chunk(job):
+    # Runs in a worker: finds its own cuts near the given byte offsets and reads
+    # only its range, so the parent never scans or ships the file
+    file_path, start_offset, end_offset = job
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        start = _find_cut(f, start_offset, size)
+        end = _find_cut(f, end_offset, size) if end_offset < size else size
+        f.seek(start)
+        data = f.read(end - start)
+        next_line = f.readline().decode('utf-8') if end < size else None
+    # Universal newlines, like the serial parser reading the file in text mode
+    lines = io.StringIO(data.decode('utf-8'), newline=None).readlines()
+    if next_line is not None:
+        next_line = io.StringIO(next_line, newline=None).readline()
+    return _parse_checked_chunk(lines, next_line)
+
+def _merge_checked_chunks(parse_chunk, jobs, workers, parse_serially):
+    from concurrent.futures import ProcessPoolExecutor
+
+    root = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        # map() yields results in submission order, so chunks merge in file order
+        for chunk_root, next_is_safe in executor.map(parse_chunk, jobs):
+            if not next_is_safe:
+                # A cut landed inside a block; rare enough to just start over serially
+                executor.shutdown(cancel_futures=True)
+                return parse_serially()
+            merge_chunk_roots(root, chunk_root)
+    return root
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def parse_file_parallel(file_path, workers=None, min_chunk_bytes=PARALLEL_MIN_CHUNK_BYTES):
+    """Parses a TMDL file in up to `workers` processes; the result equals TmdlParser(file_path).parse()."""
+    size = os.path.getsize(file_path)
+    chunk_count = min(workers or 1, size // max(min_chunk_bytes, 1))
+    if chunk_count < 2:
+        return TmdlParser(file_path).parse()
+    offsets = [size * index // chunk_count for index in range(chunk_count + 1)]
+    jobs = [(file_path, start, end) for start, end in zip(offsets, offsets[1:])]
+    return _merge_checked_chunks(_parse_file_chunk, jobs, chunk_count, lambda: TmdlParser(file_path).parse())
+
+def parse_lines_parallel(lines, workers=None, min_chunk_bytes=PARALLEL_MIN_CHUNK_BYTES):
+    """parse_file_parallel for lines already in memory; chunks are shipped to workers as text."""
+    chunk_count = min(workers or 1, sum(map(len, lines)) // max(min_chunk_bytes, 1))
+    if chunk_count < 2:
+        return TmdlParser(None).parse_lines(lines)
+
+    cuts = [0]
+    for index in range(1, chunk_count):
+        cut = max(len(lines) * index // chunk_count, cuts[-1])
+        while cut < len(lines) and not _is_cut_candidate(lines[cut]):
+            cut += 1
+        cuts.append(cut)
+    cuts.append(len(lines))
+    # Chunks are shipped as single strings, which pickle far faster than lists
+    jobs = [(''.join(lines[start:end]), lines[end] if end < len(lines) else None)
+            for start, end in zip(cuts, cuts[1:]) if end > start]
+    if len(jobs) < 2:
+        return TmdlParser(None).parse_lines(lines)
+    return _merge_checked_chunks(_parse_text_chunk, jobs, chunk_count, lambda: TmdlParser(None).parse_lines(lines))
+
+def _iter_file_lines(file_path, source=None):
+    if source is not None:
+        yield from source.read_lines(file_path)
+        return
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from f
+
+def _iter_subtree(kind, parent_path, obj):
+    # Post-order: nested children (e.g. a column's annotations) come before their owner
+    path = parent_path + (obj.get('name'),)
+    for key in CHILD_LIST_KEYS:
+        for child in obj.get(key, ()):
+            yield from _iter_subtree(CHILD_KINDS[key], path, child)
+    yield kind, parent_path, obj
+
+def _iter_segment_objects(segment, root, decode_payloads):
+    segment_root = TmdlParser(None, decode_payloads=decode_payloads).parse_lines(segment)
+    children = []
+    for key, value in segment_root.items():
+        if key in CHILD_LIST_KEYS and isinstance(value, list):
+            children.append((key, value))
+        else:
+            root[key] = value
+    root_path = (root['name'],) if 'name' in root else ()
+    for key, objects in children:
+        for obj in objects:
+            yield from _iter_subtree(CHILD_KINDS[key], root_path, obj)
+
+def iter_objects_from_lines(lines, decode_payloads=True):
+    """Streaming counterpart of TmdlParser.parse_lines; see iter_objects."""
+    from itertools import tee
+
+    # The split-point scanner and the segment buffer read the same line iterator in
+    # lockstep, so lines are pulled lazily and tee only ever buffers one of them
+    lines, scan_lines = tee(lines)
+    root = {}
+    segment = []
+    for line, is_safe in zip(lines, iter_split_flags(scan_lines)):
+        # Any split point is safe; cutting only where an object starts keeps one
+        # object per segment instead of one segment per property line
+        if is_safe and segment and line.strip().startswith(OBJECT_KEYWORDS):
+            yield from _iter_segment_objects(segment, root, decode_payloads)
+            segment = []
+        segment.append(line)
+    if segment:
+        yield from _iter_segment_objects(segment, root, decode_payloads)
+    yield root.get('type', 'root'), (), root
+
+def iter_objects(file_path, decode_payloads=True, source=None):
+    """Yields (kind, parent_path, obj) for each object of a TMDL file as soon as it is complete.
+
+    kind is 'column', 'measure', 'partition', 'annotation' or 'relationship', and
+    parent_path is the tuple of owner names (e.g. ('DimDate',) for a table's columns).
+    Objects are complete, so nested children are yielded on their own and again inside
+    their owner. The file's root object (its 'type', or 'root' if it has none) comes
+    last with only its own properties. The file is read lazily and cut at the same safe
+    split points as parse_parallel, so memory is bounded by the largest object.
+    """
+    return iter_objects_from_lines(_iter_file_lines(file_path, source), decode_payloads)
+
+def parse_tmdl_text(text):
+    # Splits lines like reading the file in text mode would (universal newlines)
+    return TmdlParser(None).parse_lines(io.StringIO(text, newline=None).readlines())
+
+def parse_tmdl(file_path, workers=None):
     parser = TmdlParser(file_path)
+    # Workers beyond the CPUs this process may run on only add overhead
+    workers = min(workers or 1, available_cpus())
+    if workers > 1:
+        return parser.parse_parallel(workers)
     return parser.parse()
 
-def convert_tmdl_to_json(tmdl_path, output_path=None):
-    data = parse_tmdl(tmdl_path)
+def convert_tmdl_to_json(tmdl_path, output_path=None, workers=None, positions=False):
+    import json
+
+    if positions:
+        # Positions are recorded by the serial parser only
+        parser = TmdlParser(tmdl_path, record_positions=True)
+        data = parser.parse()
+    else:
+        data = parse_tmdl(tmdl_path, workers)
     json_output = json.dumps(data, indent=2)
     
     if output_path:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(json_output)
+        if positions:
+            from positions import positions_path
+            parser.positions.save(positions_path(output_path))
+            return f"JSON saved to {output_path} (positions in {positions_path(output_path)})"
         return f"JSON saved to {output_path}"
     else:
         return json_output
 
-if __name__ == "__main__":
+def main(argv=None, prog=None):
     import argparse
     
-    parser = argparse.ArgumentParser(description='Convert TMDL file to JSON.')
+    parser = argparse.ArgumentParser(prog=prog, description='Convert TMDL file to JSON.')
     parser.add_argument('input', help='Path to TMDL file or directory')
     parser.add_argument('-o', '--output', help='Path to output JSON file or directory')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Parse very large files in parallel using this many worker processes')
+    parser.add_argument('--positions', action='store_true',
+                        help='Also write the line span of every object to <output>.positions.json (parses serially)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.positions and not args.output:
+        parser.error("--positions requires --output")
     
     tmdl_input = args.input
     output_target = args.output
@@ -358,7 +758,7 @@ if __name__ == "__main__":
         if output_target:
              if os.path.exists(output_target) and not os.path.isdir(output_target):
                  print(f"Error: Output path '{output_target}' exists and is not a directory. Cannot output multiple files to a single file.")
-                 sys.exit(1)
+                 return 1
              if not os.path.exists(output_target):
                  os.makedirs(output_target)
                  
@@ -369,10 +769,10 @@ if __name__ == "__main__":
                 if output_target:
                     json_filename = filename.replace('.tmdl', '.json')
                     out_path = os.path.join(output_target, json_filename)
-                    print(convert_tmdl_to_json(full_path, out_path))
+                    print(convert_tmdl_to_json(full_path, out_path, args.workers, args.positions))
                 else:
                     print(f"--- {filename} ---")
-                    print(convert_tmdl_to_json(full_path))
+                    print(convert_tmdl_to_json(full_path, workers=args.workers))
                     print("\n")
     else:
         if output_target:
@@ -381,9 +781,14 @@ if __name__ == "__main__":
                 filename = os.path.basename(tmdl_input)
                 json_filename = filename.replace('.tmdl', '.json')
                 out_path = os.path.join(output_target, json_filename)
-                print(convert_tmdl_to_json(tmdl_input, out_path))
+                print(convert_tmdl_to_json(tmdl_input, out_path, args.workers, args.positions))
             else:
                 # Assume it's a file path
-                print(convert_tmdl_to_json(tmdl_input, output_target))
+                print(convert_tmdl_to_json(tmdl_input, output_target, args.workers, args.positions))
         else:
-            print(convert_tmdl_to_json(tmdl_input))
+            print(convert_tmdl_to_json(tmdl_input, workers=args.workers))
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
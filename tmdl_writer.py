@@ -0,0 +1,513 @@
+import os
+import re
+from pbip_parser import DEFINITION_FILE_KEYS
+
+# Serializes the TmdlParser dict shape back to TMDL, so scripted edits (format
+# strings, display folders, annotations, ...) can be made on the parsed JSON and
+# written back. The output re-parses to the same dict: multi-line values become
+# `key =` blocks indented one level deeper, multi-line measures use ``` blocks, and
+# keys the parser derives itself (relationship column splits, partition sourceDetails)
+# are not written. Files are only rewritten when their parsed content differs, and
+# files with lines the dict cannot represent are left alone unless forced. A rewrite
+# keeps the file's own lines wherever they parse to the same content, so only the
+# edited lines show up in a diff.
+
+# Keys filled in by the parser from other lines; regenerated when the output is parsed
+DERIVED_KEYS = ('fromTable', 'fromColumnName', 'toTable', 'toColumnName', 'sourceDetails')
+
+# child list key -> declaration keyword
+CHILD_OBJECT_KEYWORDS = {'columns': 'column', 'measures': 'measure', 'partitions': 'partition',
+                         'relationships': 'relationship'}
+
+ROOT_TYPES = ('table', 'database', 'model')
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Position index kind -> child list key, for the objects preserve_layout splices
+# separately; property blocks stay part of the object that owns them
+SPLICE_KINDS = {'column': 'columns', 'measure': 'measures', 'partition': 'partitions',
+                'relationship': 'relationships', 'annotation': 'annotations'}
+
+def _format_scalar(key, value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float, str)):
+        return str(value)
+    raise ValueError(f"Cannot write property '{key}' of type {type(value).__name__} to TMDL")
+
+def _quote_measure_name(name):
+    # The parser strips one pair of surrounding quotes from measure names
+    return name if _IDENTIFIER.fullmatch(name) else f"'{name}'"
+
+class TmdlWriter:
+    def __init__(self):
+        self.lines = []
+        # True right after a `key =` block: a blank line would be read back into it
+        self._after_block = False
+
+    def write(self, root):
+        """Returns the TMDL text for a parsed root dict."""
+        self.lines = []
+        self._after_block = False
+        root_type = root.get('type')
+        if root_type in ROOT_TYPES:
+            self._emit(0, f"{root_type} {root.get('name', '')}")
+            self._write_body(root, 1, ('name', 'type'))
+        else:
+            self._write_typeless_root(root)
+        return '\n'.join(self.lines) + '\n' if self.lines else ''
+
+    def _write_typeless_root(self, root):
+        # relationships.tmdl, expressions.tmdl: declarations at indent 0. Any other root
+        # property was read from under a single-line expression (its lineageTag or
+        # annotations) and is put back there, unless it would join a preceding block
+        nested = not any(key in CHILD_OBJECT_KEYWORDS for key in root)
+        for key, value in root.items():
+            member = nested and not key.startswith('expression ')
+            indent = 1 if member and self.lines and not self._after_block else 0
+            if key not in DERIVED_KEYS:
+                self._write_member(root, key, value, indent)
+
+    def _emit(self, indent, text):
+        self.lines.append('\t' * indent + text if text else '')
+        self._after_block = False
+
+    def _write_body(self, obj, indent, skip):
+        for key, value in obj.items():
+            if key not in skip and key not in DERIVED_KEYS:
+                self._write_member(obj, key, value, indent)
+
+    def _write_member(self, obj, key, value, indent):
+        if key == 'annotations':
+            for annotation in value:
+                self._emit(indent, f"annotation {annotation['name']} = {_format_scalar(key, annotation['value'])}")
+        elif key in CHILD_OBJECT_KEYWORDS:
+            for child in value:
+                self._write_object(CHILD_OBJECT_KEYWORDS[key], child, indent)
+        else:
+            self._write_property(key, value, indent, obj)
+
+    def _write_object(self, keyword, obj, indent):
+        if self.lines and not self._after_block:
+            self._emit(0, '')
+        name = obj.get('name', '')
+        skip = ('name', 'type')
+        if keyword == 'measure':
+            self._write_measure(obj, indent)
+            skip = ('name', 'type', 'expression')
+        elif keyword == 'partition' and 'partitionType' in obj:
+            self._emit(indent, f"partition {name} = {obj['partitionType']}")
+            skip = ('name', 'type', 'partitionType')
+        else:
+            self._emit(indent, f"{keyword} {name}")
+        self._write_body(obj, indent + 1, skip)
+
+    def _write_measure(self, measure, indent):
+        declaration = f"measure {_quote_measure_name(measure.get('name', ''))} ="
+        expression = _format_scalar('expression', measure.get('expression', ''))
+        if '\n' not in expression and expression == expression.strip() and expression != '```':
+            self._emit(indent, f"{declaration} {expression}" if expression else declaration)
+            return
+        lines = expression.split('\n')
+        if any(line.strip() == '```' for line in lines):
+            # Cannot be fenced: write an implicit block, with blank lines kept indented
+            # so the parser's look-ahead sees the block
+            self._emit(indent, declaration)
+            for line in lines:
+                self.lines.append('\t' * (indent + 2) + line)
+            self._after_block = True
+            return
+        self._emit(indent, f"{declaration} ```")
+        for line in lines:
+            self._emit(indent + 2, line)
+        self._emit(indent + 2, '```')
+
+    def _write_property(self, key, value, indent, parent):
+        value = _format_scalar(key, value)
+        if ': ' in key:
+            raise ValueError(f"Cannot write property '{key}' to TMDL: keys may not contain ': '")
+        # Partition sources are only mined for sourceDetails when written as blocks
+        as_block = '\n' in value or not value or (
+            key == 'source' and parent.get('type') == 'partition' and 'sourceDetails' in parent)
+        if as_block:
+            self._emit(indent, f"{key} =")
+            for line in value.split('\n') if value else ():
+                self._emit(indent + 1, line)
+            self._after_block = True
+        elif ((' ' in key or self._unsplit_reference(key, value, parent)) and '=' not in key
+              and ': ' not in value and value == value.strip() and not value.endswith('=')):
+            # e.g. expression Param = "value" meta [...]
+            self._emit(indent, f"{key} = {value}")
+        else:
+            self._emit(indent, f"{key}: {value}")
+
+    @staticmethod
+    def _unsplit_reference(key, value, parent):
+        # `fromColumn: T.C` is split into fromTable/fromColumnName, `fromColumn = T.C` is not
+        return key in ('fromColumn', 'toColumn') and '.' in value and f"{key[:-len('Column')]}Table" not in parent
+
+def to_tmdl(root):
+    return TmdlWriter().write(root)
+
+def _detect_newline(file_path):
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        return '\r\n' if f.readline().endswith('\r\n') else '\n'
+
+def _write_text(file_path, text, newline='\n'):
+    import tempfile
+
+    # Write to a temp file and rename so an interrupted run never leaves a partial file
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8', newline=newline) as f:
+        f.write(text)
+    os.replace(tmp_path, file_path)
+
+def table_filename(table_name):
+    from urllib.parse import quote
+    # Table names may contain '/', '\\' or '..'; percent-encode so the file always
+    # lands inside the tables folder
+    return quote(table_name, safe=" -_.'") + ".tmdl"
+
+def _parses_to(lines, expected):
+    import io
+    from tmdl_parser import TmdlParser
+
+    parser = TmdlParser(None)
+    parsed = parser.parse_lines(io.StringIO('\n'.join(lines)).readlines())
+    return parsed == expected and not parser.unparsed_lines
+
+class _LayoutMismatch(Exception):
+    pass
+
+class _Layout:
+    # A text's lines with its parsed root and the span of every object in it
+    def __init__(self, text):
+        import io
+        from positions import KINDS
+        from tmdl_parser import TmdlParser
+
+        self.lines = text.split('\n')
+        parser = TmdlParser(None, record_positions=True)
+        self.root = parser.parse_lines(io.StringIO(text).readlines())
+        self.positions = parser.positions
+        self.kinds = [KINDS[code] for code in self.positions.kinds]
+        self.root_entry = -1
+        self.children = {}
+        for entry, kind in enumerate(self.kinds):
+            parent = self.positions.parents[entry]
+            if parent == -1 and kind in ROOT_TYPES and self.root_entry == -1:
+                self.root_entry = entry
+            elif kind in SPLICE_KINDS:
+                self.children.setdefault(parent, []).append(entry)
+
+    def region(self, entry):
+        # 0-based [start, end) line range of an entry
+        return self.positions.starts[entry] - 1, self.positions.ends[entry]
+
+    def slots(self, entry, obj, region_start):
+        # (key, entry, parsed object, slot start) for each child object in file order.
+        # The key is the list, the name and how many earlier children share both, and a
+        # slot starts at the blank lines in front of the child's declaration.
+        slots = []
+        counts = {}
+        occurrences = {}
+        for child in self.children.get(entry, ()):
+            list_key = SPLICE_KINDS[self.kinds[child]]
+            position = counts.get(list_key, 0)
+            counts[list_key] = position + 1
+            items = obj.get(list_key, [])
+            if position >= len(items):
+                raise _LayoutMismatch()
+            start = self.positions.starts[child] - 1
+            while start > region_start and not self.lines[start - 1].strip():
+                start -= 1
+            name = (list_key, self.positions.names[child])
+            occurrences[name] = occurrences.get(name, -1) + 1
+            slots.append(((*name, occurrences[name]), child, items[position], start))
+        if any(counts.get(list_key, 0) != len(obj[list_key]) for list_key in SPLICE_KINDS.values()
+               if isinstance(obj.get(list_key), list)):
+            raise _LayoutMismatch()
+        return slots
+
+    def content_after_children(self, slots, region_end):
+        # Whether any non-blank line follows the first child outside the child spans
+        ends = [self.region(entry)[1] for _, entry, _, _ in slots]
+        starts = [start for _, _, _, start in slots[1:]] + [region_end]
+        return any(line.strip() for end, start in zip(ends, starts) for line in self.lines[end:start])
+
+def _own_content(obj):
+    return {key: value for key, value in obj.items() if key not in SPLICE_KINDS.values()}
+
+def _header_lines(original, new, entries, objects, regions, slots):
+    # Declaration and own properties of the new object, to go in front of its first
+    # child in the original layout, or None when the original has own properties after
+    # its children
+    original_entry = entries[0]
+    (_, original_end), (new_start, new_end) = regions
+    original_slots, new_slots = slots
+    if not original_slots or original.content_after_children(original_slots, original_end):
+        return None
+    own = _own_content(objects[1])
+    if original_entry == -1:
+        # A file without a declaration: only the generated text knows where these go
+        if not new_slots or new.content_after_children(new_slots, new_end):
+            return None
+        return new.lines[new_start:new_slots[0][3]]
+    writer = TmdlWriter()
+    kind = original.kinds[original_entry]
+    if kind in ROOT_TYPES:
+        return writer.write(own).split('\n')[:-1]
+    writer._write_object(kind, own, original.positions.columns[original_entry] - 1)
+    return writer.lines
+
+def _splice(original, new, entries, objects, regions):
+    # Lines for the new object: the original span where its parsed content is unchanged,
+    # otherwise its skeleton with every child object spliced the same way
+    original_entry, new_entry = entries
+    original_obj, new_obj = objects
+    (original_start, original_end), (new_start, new_end) = regions
+    if original_obj == new_obj:
+        return original.lines[original_start:original_end]
+
+    original_slots = original.slots(original_entry, original_obj, original_start)
+    new_slots = new.slots(new_entry, new_obj, new_start)
+    matches = {key: (entry, obj) for key, entry, obj, _ in original_slots}
+    new_by_key = {key: (entry, obj) for key, entry, obj, _ in new_slots}
+
+    def child_lines(key, entry, obj):
+        original_child, original_child_obj = matches[key]
+        return _splice(original, new, (original_child, entry), (original_child_obj, obj),
+                       (original.region(original_child), new.region(entry)))
+
+    lines = []
+    # Stable sorts by list key keep the order within each list
+    surviving = sorted((key for key, _, _, _ in new_slots if key in matches), key=lambda key: key[0])
+    own_equal = _own_content(original_obj) == _own_content(new_obj)
+    # Changed own properties are regenerated in front of the first child
+    header = None if own_equal else _header_lines(original, new, entries, objects, regions,
+                                                  (original_slots, new_slots))
+    if (own_equal or header is not None) and \
+            surviving == sorted((key for key, _, _, _ in original_slots if key in new_by_key), key=lambda key: key[0]):
+        # Keep the original text around the children. Only the order within each child
+        # list matters, so an added child goes in front of the next surviving child of
+        # its list, or after the last one.
+        before, after, tail = {}, {}, []
+        for list_key in SPLICE_KINDS.values():
+            added, last = [], None
+            for key, entry, _, start in new_slots:
+                if key[0] != list_key:
+                    continue
+                if key in matches:
+                    before[key], added, last = added, [], key
+                else:
+                    added.append((start, entry))
+            if last is None:
+                tail.extend(added)
+            else:
+                after[last] = added
+
+        def added_lines(slots):
+            for start, entry in slots:
+                lines.extend(new.lines[start:new.region(entry)[1]])
+
+        position = original_start
+        for key, entry, _, start in original_slots:
+            if position == original_start and header is not None:
+                lines.extend(header)
+            else:
+                lines.extend(original.lines[position:start])
+            position = original.region(entry)[1]
+            if key not in new_by_key:
+                continue
+            added_lines(before[key])
+            lines.extend(original.lines[start:original.region(entry)[0]])
+            lines.extend(child_lines(key, *new_by_key[key]))
+            added_lines(after.get(key, ()))
+        # Children of a list that had none go last, in front of any trailing blank lines
+        end = original_end
+        while end > position and not original.lines[end - 1].strip():
+            end -= 1
+        lines.extend(original.lines[position:end])
+        added_lines(tail)
+        lines.extend(original.lines[end:original_end])
+    else:
+        # Own properties or child order changed: use the generated text around the children
+        position = new_start
+        for key, entry, obj, start in new_slots:
+            child_start, child_end = new.region(entry)
+            lines.extend(new.lines[position:child_start])
+            position = child_end
+            if key in matches:
+                lines.extend(child_lines(key, entry, obj))
+            else:
+                lines.extend(new.lines[child_start:child_end])
+        lines.extend(new.lines[position:new_end])
+    return lines
+
+def preserve_layout(original_text, text):
+    """Returns text with the original file's lines kept wherever they parse to the same
+    content, so a rewrite only shows the edited objects in a diff.
+
+    Objects are matched by kind and name through the position index of both texts.
+    An unchanged object keeps its original lines. A changed one keeps its original
+    surroundings when only its children differ, and is spliced child by child. The
+    result is parsed once and the generated text is returned if it differs.
+    """
+    try:
+        original, new = _Layout(original_text), _Layout(text)
+        lines = _splice(original, new, (original.root_entry, new.root_entry), (original.root, new.root),
+                        ((0, len(original.lines)), (0, len(new.lines))))
+    except _LayoutMismatch:
+        return text
+    # Blank lines can be significant inside blocks, so the splice is checked by parsing
+    if not _parses_to(lines, new.root):
+        return text
+    merged = '\n'.join(lines)
+    return merged if merged.endswith('\n') else merged + '\n'
+
+def _parse_existing(file_path):
+    from tmdl_parser import TmdlParser
+
+    parser = TmdlParser(file_path)
+    return parser, parser.parse()
+
+def _sync_file(file_path, root, existing, definition_path, report, force=False, dry_run=False):
+    text = to_tmdl(root)
+    relative_path = os.path.relpath(file_path, definition_path)
+    newline = '\n'
+    if existing is None and os.path.isfile(file_path):
+        existing = _parse_existing(file_path)
+    if existing is not None:
+        parser, parsed = existing
+        if to_tmdl(parsed) == text:
+            report['unchanged'] += 1
+            return
+        if parser.unparsed_lines and not force:
+            # Rewriting would drop these lines
+            report['skipped'].append({'file': relative_path, 'lines': [index + 1 for index in parser.unparsed_lines]})
+            return
+        newline = _detect_newline(file_path)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = preserve_layout(f.read(), text)
+    report['written'].append(relative_path)
+    if not dry_run:
+        _write_text(file_path, text, newline)
+
+def apply_model(pbip_folder_path, model_data, force=False, dry_run=False, config_path="pbip_definition.json"):
+    """Writes a (possibly edited) parsed model back to a project's TMDL files.
+
+    Only files whose parsed content differs from model_data are rewritten. Table files
+    whose table is missing from model_data are deleted when forced and reported as
+    orphaned otherwise. Returns a report dict, or None if the project has no semantic
+    model definition.
+    """
+    from pbip_parser import PbipParser
+    from project_layout import compile_config
+    from validator import object_name
+
+    pbip_parser = PbipParser(pbip_folder_path, config_path)
+    definition_path = pbip_parser.definition_path()
+    if definition_path is None:
+        return None
+    layout = pbip_parser.layout
+    compiled = compile_config(config_path)
+    report = {'project': pbip_folder_path, 'written': [], 'removed': [], 'orphaned': [], 'unchanged': 0, 'skipped': []}
+
+    file_names = compiled.loader.get_definition_files()
+    for config_key, key in DEFINITION_FILE_KEYS.items():
+        if key not in model_data or config_key not in file_names:
+            continue
+        root = {'relationships': model_data[key]} if key == 'relationships' else model_data[key]
+        file_path = layout.definition_files.get(config_key) or os.path.join(definition_path, file_names[config_key])
+        _sync_file(file_path, root, None, definition_path, report, force, dry_run)
+
+    if 'tables' in model_data:
+        # Tables are matched to their files by name; new tables get a file of their own
+        existing_tables = {}
+        for file_path in layout.table_files or ():
+            parser, parsed = _parse_existing(file_path)
+            existing_tables[object_name(parsed.get('name', '')).lower()] = (file_path, (parser, parsed))
+        tables_path = layout.tables_path or os.path.join(definition_path, compiled.tables_folder)
+        kept = set()
+        for table in model_data['tables']:
+            name = object_name(table.get('name', ''))
+            file_path, existing = existing_tables.get(name.lower(), (os.path.join(tables_path, table_filename(name)), None))
+            kept.add(file_path)
+            _sync_file(file_path, table, existing, definition_path, report, force, dry_run)
+        # Files of tables dropped from the JSON; a partial model must not delete them silently
+        for file_path in layout.table_files or ():
+            if file_path in kept:
+                continue
+            relative_path = os.path.relpath(file_path, definition_path)
+            if not force:
+                report['orphaned'].append(relative_path)
+                continue
+            report['removed'].append(relative_path)
+            if not dry_run:
+                os.remove(file_path)
+    return report
+
+def _apply_job(job):
+    # Worker entry point: the model JSON is loaded in the worker instead of being pickled
+    import sys
+    import json
+    from contextlib import redirect_stdout
+
+    pbip_folder_path, model_json_path, force, dry_run = job
+    with open(model_json_path, 'r', encoding='utf-8') as f:
+        model_data = json.load(f)
+    with redirect_stdout(sys.stderr):
+        return apply_model(pbip_folder_path, model_data, force, dry_run)
+
+def apply_models(pairs, workers=None, force=False, dry_run=False):
+    """Applies (project folder, model JSON path) pairs, in parallel across projects."""
+    jobs = [(pbip_folder_path, model_json_path, force, dry_run) for pbip_folder_path, model_json_path in pairs]
+    if workers == 1 or len(jobs) < 2:
+        return [_apply_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_apply_job, jobs))
+
+def main(argv=None, prog=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog=prog, description="Write edited JSON models back to the TMDL files of PBIP projects.")
+    parser.add_argument("pairs", nargs='+', metavar="PROJECT MODEL_JSON",
+                        help="PBIP project folder followed by the model JSON to write into it; repeat for more projects")
+    parser.add_argument("--workers", type=int, help="Worker processes used across projects", default=None)
+    parser.add_argument("--force", action="store_true",
+                        help="Also rewrite files containing lines the JSON model cannot represent, "
+                             "and delete table files whose table is not in the JSON model")
+    parser.add_argument("--dry-run", action="store_true", help="Report the files that would be written without writing them")
+
+    args = parser.parse_args(argv)
+    if len(args.pairs) % 2:
+        parser.error("arguments must be PROJECT MODEL_JSON pairs")
+
+    pairs = list(zip(args.pairs[::2], args.pairs[1::2]))
+    exit_code = 0
+    for (pbip_folder_path, _), report in zip(pairs, apply_models(pairs, args.workers, args.force, args.dry_run)):
+        if report is None:
+            print(f"{pbip_folder_path}: no semantic model definition found")
+            exit_code = 1
+            continue
+        verb = "would be written" if args.dry_run else "written"
+        removed = "would be removed" if args.dry_run else "removed"
+        print(f"{pbip_folder_path}: {len(report['written'])} file(s) {verb}, {len(report['removed'])} {removed}, "
+              f"{report['unchanged']} unchanged, {len(report['skipped'])} skipped")
+        for skipped in report['skipped']:
+            lines = ', '.join(str(line) for line in skipped['lines'][:10])
+            print(f"  Skipped {skipped['file']}: lines {lines} are not represented in the JSON model (use --force to rewrite)",
+                  file=sys.stderr)
+            exit_code = 1
+        for orphaned in report['orphaned']:
+            print(f"  Kept {orphaned}: its table is not in the JSON model (use --force to delete it)", file=sys.stderr)
+            exit_code = 1
+    return exit_code
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
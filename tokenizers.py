@@ -0,0 +1,86 @@
+import re
+
+# Lexers for the two expression languages found in a model: DAX (measures,
+# calculated columns and tables) and Power Query M (partition sources, shared
+# expressions). Both yield (kind, text) pairs with whitespace and comments dropped;
+# the text is the raw source of the token.
+
+# One alternation per token class; the first matching group names the token kind
+_DAX_PATTERN = re.compile(r'''
+    (?P<comment>/\*.*?(?:\*/|$)|//[^\n]*|--[^\n]*)
+  | (?P<string>"(?:[^"]|"")*"?)
+  | (?P<table>'(?:[^']|'')*'?)
+  | (?P<column>\[(?:[^\]]|\]\])*\]?)
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][\w.]*)
+  | (?P<space>\s+)
+  | (?P<op><=|>=|<>|==|&&|\|\||.)
+''', re.VERBOSE | re.DOTALL)
+
+# M has no '--' comments and no quoted table names. Brackets are tokenized inside,
+# since records ([Schema="dbo", Item=Param]) hold expressions; only a bracket pair
+# that cannot be a record, like [Data] or [Order Date], is kept as one field token.
+_M_PATTERN = re.compile(r'''
+    (?P<comment>/\*.*?(?:\*/|$)|//[^\n]*)
+  | (?P<string>"(?:[^"]|"")*"?)
+  | (?P<quoted_identifier>\#"(?:[^"]|"")*"?)
+  | (?P<field>\[[^\[\]"=,/]*\])
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][\w.]*)
+  | (?P<space>\s+)
+  | (?P<op>=>|<=|>=|<>|\.\.\.|\.\.|\?\?|.)
+''', re.VERBOSE | re.DOTALL)
+
+_OPENING = {'(': ')', '[': ']', '{': '}'}
+
+def _tokenize(pattern, expression):
+    for match in pattern.finditer(expression):
+        kind = match.lastgroup
+        if kind not in ('space', 'comment'):
+            yield kind, match.group()
+
+def tokenize_dax(expression):
+    """Yields (kind, text) for a DAX expression: string, table ('Quoted'), column
+    ([Name]), number, word or op."""
+    return _tokenize(_DAX_PATTERN, expression)
+
+def tokenize_m(expression):
+    """Yields (kind, text) for an M expression: string, quoted_identifier (#"Name"),
+    field ([Name]), number, word or op."""
+    return _tokenize(_M_PATTERN, expression)
+
+def unquote_m_identifier(text):
+    # #"Step 1" -> Step 1; an unterminated identifier runs to the end of the text
+    name = text[2:-1] if len(text) > 2 and text.endswith('"') else text[2:]
+    return name.replace('""', '"')
+
+def _bindings(tokens):
+    # Yields (index, scope) for every name followed by '=' that starts a let binding
+    # (scope 'let') or a record field (scope ']')
+    scopes = []  # open lets and brackets, innermost last
+    for index, (kind, text) in enumerate(tokens):
+        if kind == 'word' and text == 'let':
+            scopes.append('let')
+        elif kind == 'word' and text == 'in':
+            while scopes and scopes.pop() != 'let':
+                pass
+        elif kind == 'op' and text in _OPENING:
+            scopes.append(_OPENING[text])
+        elif kind == 'op' and text in _OPENING.values():
+            if scopes and scopes[-1] == text:
+                scopes.pop()
+        elif (kind in ('word', 'quoted_identifier') and 0 < index < len(tokens) - 1
+              and tokens[index + 1] == ('op', '=') and scopes):
+            previous = tokens[index - 1][1]
+            if scopes[-1] == 'let' and previous in ('let', ','):
+                yield index, 'let'
+            elif scopes[-1] == ']' and previous in ('[', ','):
+                yield index, ']'
+
+def let_bindings(tokens):
+    """Indexes of the names bound by let expressions in a tokenize_m token list."""
+    return [index for index, scope in _bindings(tokens) if scope == 'let']
+
+def record_fields(tokens):
+    """Indexes of the field names of record literals ([A=1, B=2]) in a tokenize_m token list."""
+    return [index for index, scope in _bindings(tokens) if scope == ']']
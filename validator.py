@@ -0,0 +1,193 @@
+import sys
+
+# Referential-integrity checks for a parsed model (PbipParser output). Tables and
+# columns are indexed once by normalized name, so every reference is a dict lookup
+# and the whole pass is linear in the size of the model.
+
+def _unquote(name):
+    name = name.strip()
+    if len(name) >= 2 and name[0] == name[-1] and name[0] in ("'", '"'):
+        name = name[1:-1].replace(name[0] * 2, name[0])
+    return name
+
+def _name_key(name):
+    # Object names in a semantic model are case-insensitive
+    return _unquote(name).lower()
+
+def _declared_name(declaration):
+    # 'column Name = <DAX>' declares a calculated column; only the name is indexed
+    declaration = declaration.strip()
+    if declaration.startswith("'"):
+        index = 1
+        while index < len(declaration):
+            if declaration[index] == "'":
+                if declaration[index + 1:index + 2] != "'":
+                    return declaration[:index + 1]
+                index += 1
+            index += 1
+        return declaration
+    return declaration.split('=', 1)[0].strip()
+
+def object_name(declaration):
+    """Plain name of a table/column declaration: unquoted, without a calculated column's expression."""
+    return _unquote(_declared_name(declaration))
+
+def column_expression(declaration):
+    """DAX of a calculated column declared as 'Name = <DAX>', or None for a regular column."""
+    rest = declaration.strip()[len(_declared_name(declaration)):].strip()
+    return rest[1:].strip() if rest.startswith('=') else None
+
+def split_reference(reference):
+    """Splits 'Table'.Object at the last dot outside quotes; returns (table, object) or None."""
+    quote = None
+    split_at = None
+    for index, char in enumerate(reference):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '.':
+            split_at = index
+    if split_at is None:
+        return None
+    return reference[:split_at], reference[split_at + 1:]
+
+def relationship_endpoint(relationship, prefix):
+    """Unquoted (table, column) of a relationship's fromColumn/toColumn ('from'/'to' prefix), or None.
+
+    The parser's fromTable/fromColumnName split at the last dot even inside quotes
+    (Sales.'Amount.USD'), so the reference is split again here.
+    """
+    reference = relationship.get(prefix + 'Column')
+    parts = split_reference(reference) if reference is not None else None
+    if parts is None:
+        return None
+    return _unquote(parts[0]), _unquote(parts[1])
+
+class ModelIndex:
+    def __init__(self, model_data):
+        self.tables = {}
+        self.columns = {}
+        self.relationships = set()
+        for table in model_data.get('tables', []):
+            table_key = _name_key(table.get('name', ''))
+            self.tables[table_key] = table
+            self.columns[table_key] = {_name_key(_declared_name(column.get('name', ''))): column
+                                       for column in table.get('columns', [])}
+        for relationship in model_data.get('relationships', []):
+            self.relationships.add(_name_key(relationship.get('name', '')))
+
+    def has_table(self, table_name):
+        return _name_key(table_name) in self.tables
+
+    def has_column(self, table_name, column_name):
+        return _name_key(column_name) in self.columns.get(_name_key(table_name), ())
+
+def _issue(kind, name, prop, reference, message, table=None):
+    issue = {'object': kind, 'name': name, 'property': prop, 'reference': reference, 'message': message}
+    if table is not None:
+        issue['table'] = table
+    return issue
+
+def _check_endpoint(index, relationship, prefix):
+    key = prefix + 'Column'
+    reference = relationship.get(key)
+    name = relationship.get('name')
+    if reference is None:
+        return _issue('relationship', name, key, None, f"missing {key}")
+
+    endpoint = relationship_endpoint(relationship, prefix)
+    if endpoint is None:
+        return _issue('relationship', name, key, reference, "not a Table.Column reference")
+    table_name, column_name = endpoint
+    if not index.has_table(table_name):
+        return _issue('relationship', name, key, reference, f"table '{table_name}' not found")
+    if not index.has_column(table_name, column_name):
+        return _issue('relationship', name, key, reference, f"column '{column_name}' not found in table '{table_name}'")
+    return None
+
+def validate_model(model_data):
+    """Returns a list of dangling-reference issues (empty if the model is consistent)."""
+    index = ModelIndex(model_data)
+    issues = []
+
+    for relationship in model_data.get('relationships', []):
+        for prefix in ('from', 'to'):
+            issue = _check_endpoint(index, relationship, prefix)
+            if issue:
+                issues.append(issue)
+
+    for table in model_data.get('tables', []):
+        table_name = _unquote(table.get('name', ''))
+        table_columns = index.columns.get(table_name.lower(), {})
+        for column in table.get('columns', []):
+            column_name = _unquote(_declared_name(column.get('name', '')))
+
+            sort_by = column.get('sortByColumn')
+            if sort_by is not None and _name_key(sort_by) not in table_columns:
+                issues.append(_issue('column', column_name, 'sortByColumn', sort_by,
+                                     f"column '{_unquote(sort_by)}' not found in table '{table_name}'", table_name))
+
+            relationship = column.get('relationship')
+            if relationship is not None and _name_key(relationship) not in index.relationships:
+                issues.append(_issue('column', column_name, 'relationship', relationship,
+                                     f"relationship '{_unquote(relationship)}' not found", table_name))
+
+            # Hierarchies are not parsed, so only the table part can be checked
+            hierarchy = column.get('defaultHierarchy')
+            if hierarchy is not None:
+                parts = split_reference(hierarchy)
+                if parts is None:
+                    issues.append(_issue('column', column_name, 'defaultHierarchy', hierarchy,
+                                         "not a Table.Hierarchy reference", table_name))
+                elif not index.has_table(parts[0]):
+                    issues.append(_issue('column', column_name, 'defaultHierarchy', hierarchy,
+                                         f"table '{_unquote(parts[0])}' not found", table_name))
+    return issues
+
+def format_issue(issue):
+    owner = f"{issue['table']}[{issue['name']}]" if 'table' in issue else f"{issue['object']} {issue['name']}"
+    return f"{owner}.{issue['property']}: {issue['message']}"
+
+def _load_model(path):
+    import json
+    import os
+    from vfs import is_archive
+
+    if os.path.isdir(path) or is_archive(path):
+        from pbip_parser import PbipParser
+        from vfs import open_source
+        source, pbip_folder_path = open_source(path)
+        with source:
+            return PbipParser(pbip_folder_path, source=source).parse()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main(argv=None, prog=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog=prog, description="Check relationships and column references for dangling references.")
+    parser.add_argument("input", help="PBIP folder or archive, or a JSON model produced by pbip_parser.py")
+    parser.add_argument("--json", action="store_true", help="Print issues as JSON")
+
+    args = parser.parse_args(argv)
+
+    model_data = _load_model(args.input)
+    if not model_data:
+        print(f"Error: Could not parse '{args.input}'", file=sys.stderr)
+        return 2
+
+    issues = validate_model(model_data)
+    if args.json:
+        print(json.dumps(issues, indent=4))
+    else:
+        for issue in issues:
+            print(format_issue(issue))
+        if issues:
+            print(f"{len(issues)} dangling reference(s) found", file=sys.stderr)
+    return 1 if issues else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
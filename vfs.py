@@ -0,0 +1,227 @@
+import os
+import io
+import posixpath
+from abc import ABC, abstractmethod
+
+# File sources for PbipParser/TmdlParser. OsSource reads the local filesystem; the
+# archive and in-memory sources index their entries once and serve definition files
+# straight from memory or the archive, so nothing has to be extracted to disk.
+# Archive sources hold the archive open until close(); every source is a context
+# manager, so `with open_source(path)[0]:` works whatever the path is.
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+def _split_lines(text):
+    # Same line splitting as reading a file in text mode (universal newlines)
+    return io.StringIO(text, newline=None).readlines()
+
+class _Closeable:
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class OsSource(_Closeable):
+    join = staticmethod(os.path.join)
+
+    def read_text(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def read_lines(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.readlines()
+
+    def signature(self, path):
+        # Cheap change detection: (size, mtime) without reading the file
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def dir_version(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def scan_dir(self, path):
+        # Returns (version, [(name, is_dir), ...]) or None; the mtime is taken before
+        # listing so a change made during the scan invalidates it
+        try:
+            version = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                return version, [(entry.name, entry.is_dir()) for entry in entries]
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+OS_SOURCE = OsSource()
+
+class _IndexedSource(_Closeable, ABC):
+    """Base for sources whose file list is known up front.
+
+    Paths are POSIX-style and relative to the archive root ('' is the root).
+    """
+
+    def __init__(self, file_paths):
+        self.files = set()
+        self.dirs = {''}
+        self.children = {}
+        for path in file_paths:
+            self._add_file(self._normalize(path))
+
+    @staticmethod
+    def _normalize(path):
+        path = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+        return '' if path == '.' else path
+
+    def _add_dir(self, path):
+        while path not in self.dirs:
+            self.dirs.add(path)
+            parent = posixpath.dirname(path)
+            self.children.setdefault(parent, set()).add(path)
+            path = parent
+
+    def _add_file(self, path):
+        if not path:
+            return
+        self.files.add(path)
+        parent = posixpath.dirname(path)
+        self.children.setdefault(parent, set()).add(path)
+        self._add_dir(parent)
+
+    def join(self, *parts):
+        return posixpath.join(*parts)
+
+    def dir_version(self, path):
+        # Archive and in-memory contents never change once indexed
+        return 0 if self._normalize(path) in self.dirs else None
+
+    def scan_dir(self, path):
+        path = self._normalize(path)
+        if path not in self.dirs:
+            return None
+        return 0, [(posixpath.basename(child), child in self.dirs) for child in sorted(self.children.get(path, ()))]
+
+    def top_level_folder(self):
+        # Archives of a single exported project usually wrap it in one folder, unless
+        # the archive holds just the semantic model or report folder itself
+        top = self.children.get('', set())
+        if len(top) == 1:
+            (only,) = top
+            if only in self.dirs and not only.endswith(('.SemanticModel', '.Report')):
+                return only
+        return ''
+
+    @abstractmethod
+    def read_bytes(self, path):
+        """Content of a normalized file path."""
+
+    def read_text(self, path):
+        return self.read_bytes(self._normalize(path)).decode('utf-8')
+
+    def read_lines(self, path):
+        return _split_lines(self.read_text(path))
+
+    @abstractmethod
+    def signature(self, path):
+        """Cheap change-detection value for a file path."""
+
+class MemorySource(_IndexedSource):
+    def __init__(self, mapping):
+        self.mapping = {self._normalize(path): content for path, content in mapping.items()}
+        super().__init__(self.mapping)
+
+    def read_bytes(self, path):
+        content = self.mapping[path]
+        return content.encode('utf-8') if isinstance(content, str) else content
+
+    def signature(self, path):
+        # In-memory content has no mtime, so hash it
+        import hashlib
+        return hashlib.sha1(self.read_bytes(self._normalize(path))).hexdigest()
+
+class ZipSource(_IndexedSource):
+    def __init__(self, archive):
+        import zipfile
+        self.archive = zipfile.ZipFile(archive)
+        self.members = {}
+        for info in self.archive.infolist():
+            if not info.is_dir():
+                self.members[self._normalize(info.filename)] = info
+        super().__init__(self.members)
+
+    def read_bytes(self, path):
+        return self.archive.read(self.members[path])
+
+    def signature(self, path):
+        info = self.members[self._normalize(path)]
+        return info.file_size, info.CRC
+
+    def close(self):
+        self.archive.close()
+
+class TarSource(_IndexedSource):
+    """Reads a plain tar in place. A compressed tar cannot seek backwards without
+    decompressing again from the start, and PbipParser does not read files in
+    archive order, so a compressed tar is decompressed once, in archive order, and
+    its files are held in memory.
+    """
+
+    def __init__(self, archive):
+        import tarfile
+        self.members = {}
+        self.contents = None
+        try:
+            self.archive = self._open(archive, 'r:')
+        except tarfile.ReadError:
+            self.archive = None
+            self.contents = {}
+            if not isinstance(archive, (str, os.PathLike)):
+                archive.seek(0)
+            with self._open(archive, 'r|*') as stream:
+                for member in stream:
+                    if member.isfile():
+                        path = self._normalize(member.name)
+                        self.members[path] = member
+                        self.contents[path] = stream.extractfile(member).read()
+        else:
+            for member in self.archive.getmembers():
+                if member.isfile():
+                    self.members[self._normalize(member.name)] = member
+        super().__init__(self.members)
+
+    @staticmethod
+    def _open(archive, mode):
+        import tarfile
+        if isinstance(archive, (str, os.PathLike)):
+            return tarfile.open(archive, mode)
+        return tarfile.open(fileobj=archive, mode=mode)
+
+    def read_bytes(self, path):
+        if self.contents is not None:
+            return self.contents[path]
+        return self.archive.extractfile(self.members[path]).read()
+
+    def signature(self, path):
+        member = self.members[self._normalize(path)]
+        return member.size, member.mtime
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+def is_archive(path):
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def open_source(path):
+    # Returns (source, root) for a PBIP folder or an archive of one
+    if not is_archive(path):
+        return OS_SOURCE, path
+    if path.lower().endswith('.zip'):
+        source = ZipSource(path)
+    else:
+        source = TarSource(path)
+    return source, source.top_level_folder()